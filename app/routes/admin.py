@@ -4,6 +4,12 @@ from app.services.auth import get_current_user
 from typing import Optional
 import json
 from app.services.payment import PaymentService
+from app.services.transaction import checkout_stats
+from app.services.batch_loader import BatchLoader
+from app.services import design_cache, home_feed, sales_dashboard
+from app.utils.user import username_cache
+from app.utils.item_codec import DESIGN, USER
+from app.utils.pagination import encode_cursor, parse_cursor, check_limit
 from datetime import datetime
 import os
 
@@ -13,7 +19,11 @@ USERS_TABLE = os.getenv('DYNAMODB_USER_TABLE')
 DESIGN_TABLE = os.getenv('DYNAMODB_DESIGN_TABLE')
 
 @router.get("/users")
-async def get_all_users(current_user: dict = Depends(get_current_user)):
+async def get_all_users(
+    limit: int = 50,
+    cursor: Optional[str] = None,
+    current_user: dict = Depends(get_current_user)
+):
     try:
         # Check if user is admin
         user_data = dynamodb_service.get_item(
@@ -23,58 +33,34 @@ async def get_all_users(current_user: dict = Depends(get_current_user)):
         
         if not user_data.get('isAdmin', {}).get('BOOL', False):
             raise HTTPException(status_code=403, detail="Not authorized")        
-        # Scan all users
-        users = dynamodb_service.scan_table(USERS_TABLE)
-        
-        # Process user data
-        processed_users = []
-        for user in users:
-            try:
-                # Query designs using DesignSellerGSI
-                designs = dynamodb_service.query_table(
-                    table_name=DESIGN_TABLE,
-                    index_name='DesignSellerGSI',
-                    key_condition_expression='seller_email = :email',
-                    expression_attribute_values={
-                        ':email': {'S': user['email']['S']}
-                    }
-                )
-                
-                # Filter for verified designs with unpaid sales
-                total_payment = 0
-                total_credits = 0
-                sold_designs = []
-                
-                for design in designs:
-                    if design.get('verification_status', {}).get('S') == 'Verified':
-                        unpaid_sales = payment_service.get_unpaid_sales(design)
-                        if unpaid_sales > 0:
-                            price = float(design.get('price', {}).get('N', 0))
-                            payment_method = design.get('payment_method', {}).get('S', '')
-                            
-                            cash, credits = payment_service.calculate_payment_and_credits(
-                                price * unpaid_sales,
-                                payment_method
-                            )
-                            
-                            total_payment += cash
-                            total_credits += credits
-                            sold_designs.append(design)
-                
-                if sold_designs:
-                    processed_users.append({
-                        'email': user.get('email', {}).get('S', ''),
-                        'designs_sold': len(sold_designs),
-                        'payment_due': total_payment,
-                        'credits_due': total_credits,
-                        'is_designer': user.get('isDesigner', {}).get('BOOL', False)
-                    })
-            except Exception as user_error:
-                print(f"Error processing user {user.get('email', {}).get('S', '')}: {str(user_error)}")
-                continue
-            
-        return processed_users
+        check_limit(limit)
+        context = {'list': 'admin_users'}
+        # Only sellers with an unpaid balance, read from the payout ledger
+        payouts, last_key = await payment_service.payouts_due(limit, parse_cursor(cursor, context))
+        users = await BatchLoader().load_many(
+            USERS_TABLE,
+            [{'email': {'S': payout['email']}} for payout in payouts],
+            attributes=('isDesigner',)
+        )
 
+        processed_users = [
+            {
+                'email': payout['email'],
+                'designs_sold': payout['designs_sold'],
+                'payment_due': payout['payment_due'],
+                'credits_due': payout['credits_due'],
+                'is_designer': (user or {}).get('isDesigner', {}).get('BOOL', False)
+            }
+            for payout, user in zip(payouts, users)
+        ]
+
+        return {
+            "users": processed_users,
+            "next_cursor": encode_cursor(last_key, context)
+        }
+
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Admin route error: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -95,32 +81,31 @@ async def get_user_designs(
             raise HTTPException(status_code=403, detail="Not authorized")
 
         # Query designs using DesignSellerGSI
-        designs = dynamodb_service.query_table(
+        designs = DESIGN.decode_many(dynamodb_service.query_table(
             table_name=DESIGN_TABLE,
             index_name='DesignSellerGSI',
             key_condition_expression='seller_email = :email',
             expression_attribute_values={
                 ':email': {'S': email}
             }
-        )
+        ))
         
         # Process designs data - only include verified designs with sales
         processed_designs = []
         for design in designs:
             # Check if design is verified and has sales
-            if (design.get('verification_status', {}).get('S') == 'Verified' and 
-                int(design.get('total_sold', {}).get('N', '0')) > 0):
+            if design['verification_status'] == 'Verified' and design['total_sold'] > 0:
                 
                 processed_designs.append({
-                    'design_name': design.get('title', {}).get('S', ''),
-                    'category': design.get('category', {}).get('S', ''),
-                    'price': float(design.get('price', {}).get('N', 0)),
-                    'sold_count': int(design.get('total_sold', {}).get('N', 0)),
-                    'unpaid_sales':int(payment_service.get_unpaid_sales(design)),
-                    'rating': float(design.get('rating', {}).get('N', 0)),
-                    'image_url': design.get('thumbnail_url', {}).get('S', ''),
-                    'status': design.get('verification_status', {}).get('S', 'Pending'),
-                    'payment_method': design.get('payment_method', {}).get('S', ''),
+                    'design_name': design['title'],
+                    'category': design['category'],
+                    'price': design['price'],
+                    'sold_count': design['total_sold'],
+                    'unpaid_sales': design['total_sold'] - design['last_payout_sold'],
+                    'rating': design['rating'],
+                    'image_url': design['thumbnail_url'],
+                    'status': design['verification_status'],
+                    'payment_method': design['payment_method'],
                 })
             
         return processed_designs
@@ -148,10 +133,15 @@ async def mark_user_paid(
 
         payment_service = PaymentService(dynamodb_service._get_dynamodb_client())
         payment_details['admin_email'] = current_user['email']
-        success_db = payment_service.update_payment_details(email, payment_details)
-        success = await payment_service.mark_designs_as_paid(email)
+        # Designs, ledger, payment history and rollups are written together
+        success = await payment_service.mark_designs_as_paid(email, payment_details)
+        if success:
+            try:
+                await sales_dashboard.rebuild(email)
+            except Exception as e:
+                print(f"Error refreshing sales dashboard: {str(e)}")
         
-        if success_db and success:
+        if success:
             return {"message": "Successfully marked designs as paid"}
         else:
             raise HTTPException(status_code=500, detail="Failed to mark designs as paid")
@@ -200,7 +190,11 @@ async def get_payment_details(
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/pending-verification")
-async def get_pending_verification(current_user: dict = Depends(get_current_user)):
+async def get_pending_verification(
+    limit: int = 50,
+    cursor: Optional[str] = None,
+    current_user: dict = Depends(get_current_user)
+):
     try:
         # Check if user is admin
         user_data = dynamodb_service.get_item(
@@ -211,24 +205,38 @@ async def get_pending_verification(current_user: dict = Depends(get_current_user
         if not user_data.get('isAdmin', {}).get('BOOL', False):
             raise HTTPException(status_code=403, detail="Not authorized")
         
-        # Scan users and filter for pending verification
-        users = dynamodb_service.scan_table(USERS_TABLE)
+        check_limit(limit)
+        context = {'list': 'pending_verification'}
+        # Scan one page of users pending verification
+        users, last_key = dynamodb_service.scan_page(
+            USERS_TABLE,
+            limit=limit,
+            exclusive_start_key=parse_cursor(cursor, context),
+            key_attributes=('email',),
+            filter_expression='isVerified = :pending',
+            expression_attribute_values={':pending': {'S': 'PENDING'}}
+        )
         pending_users = []
         
-        for user in users:
-            if user.get('isVerified', {}).get('S') == 'PENDING':
-                seller_profile = user.get('SellerProfile', {}).get('M', {})
+        for user in map(USER.decode, users):
+            if user['isVerified'] == 'PENDING':
+                seller_profile = user['SellerProfile']
                 pending_users.append({
-                    'email': user.get('email', {}).get('S', ''),
-                    'fullname': user.get('fullname', {}).get('S', ''),
-                    'mobile_number': user.get('mobile', {}).get('S', ''),
-                    'pan_number': seller_profile.get('panNumber', {}).get('S', ''),
-                    'aadhar_number': seller_profile.get('aadharNumber', {}).get('S', ''),
-                    'upi_id': seller_profile.get('upiId', {}).get('S', '')
+                    'email': user['email'],
+                    'fullname': user['fullname'],
+                    'mobile_number': user['mobile'],
+                    'pan_number': seller_profile.get('panNumber', ''),
+                    'aadhar_number': seller_profile.get('aadharNumber', ''),
+                    'upi_id': seller_profile.get('upiId', '')
                 })
         
-        return pending_users
+        return {
+            "users": pending_users,
+            "next_cursor": encode_cursor(last_key, context)
+        }
         
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Error fetching unverified users: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -283,7 +291,11 @@ async def verify_user(
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/unverified-users")
-async def get_unverified_users(current_user: dict = Depends(get_current_user)):
+async def get_unverified_users(
+    limit: int = 50,
+    cursor: Optional[str] = None,
+    current_user: dict = Depends(get_current_user)
+):
     try:
         # Check if user is admin
         user_data = dynamodb_service.get_item(
@@ -294,24 +306,41 @@ async def get_unverified_users(current_user: dict = Depends(get_current_user)):
         if not user_data.get('isAdmin', {}).get('BOOL', False):
             raise HTTPException(status_code=403, detail="Not authorized")
         
-        # Scan users and filter for unverified/rejected users
-        users = dynamodb_service.scan_table(USERS_TABLE)
+        check_limit(limit)
+        context = {'list': 'unverified_users'}
+        # Scan one page of unverified/rejected users
+        users, last_key = dynamodb_service.scan_page(
+            USERS_TABLE,
+            limit=limit,
+            exclusive_start_key=parse_cursor(cursor, context),
+            key_attributes=('email',),
+            filter_expression='attribute_not_exists(isVerified) OR isVerified IN (:unverified, :rejected)',
+            expression_attribute_values={
+                ':unverified': {'S': 'UNVERIFIED'},
+                ':rejected': {'S': 'REJECTED'}
+            }
+        )
         unverified_users = []
         
-        for user in users:
-            status = user.get('isVerified', {}).get('S', 'UNVERIFIED')
+        for user in map(USER.decode, users):
+            status = user['isVerified']
             if status in ['UNVERIFIED', 'REJECTED']:
                 unverified_users.append({
-                    'email': user.get('email', {}).get('S', ''),
-                    'fullname': user.get('fullname', {}).get('S', ''),
-                    'mobile': user.get('mobile', {}).get('S', ''),
+                    'email': user['email'],
+                    'fullname': user['fullname'],
+                    'mobile': user['mobile'],
                     'status': status,
-                    'isDesigner': user.get('isDesigner', {}).get('BOOL', False),
-                    'created_at': user.get('created_at', {}).get('S', '')
+                    'isDesigner': user['isDesigner'],
+                    'created_at': user['created_at']
                 })
         
-        return unverified_users
+        return {
+            "users": unverified_users,
+            "next_cursor": encode_cursor(last_key, context)
+        }
         
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Error fetching unverified users: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -354,3 +383,77 @@ async def mark_as_designer(
         print(f"Error marking user as designer: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
     
+
+@router.get("/cache-stats")
+async def get_cache_stats(current_user: dict = Depends(get_current_user)):
+    """Hit/miss counters of the in-process caches, for sizing them per Lambda memory tier, and checkout latency by cart size"""
+    try:
+        # Check if user is admin
+        user_data = dynamodb_service.get_item(
+            table_name=USERS_TABLE,
+            key={'email': {'S': current_user['email']}}
+        )
+        
+        if not user_data.get('isAdmin', {}).get('BOOL', False):
+            raise HTTPException(status_code=403, detail="Not authorized")
+
+        return {
+            "design_cache": design_cache.cache_stats(),
+            "username_cache": username_cache.stats(),
+            "checkout_latency": checkout_stats()
+        }
+
+    except HTTPException as he:
+        raise he
+    except Exception as e:
+        print(f"Error fetching cache stats: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/home-feed/rebuild")
+async def rebuild_home_feed(current_user: dict = Depends(get_current_user)):
+    """Rebuild the precomputed home feed from the design table (e.g. after a backfill)"""
+    try:
+        # Check if user is admin
+        user_data = dynamodb_service.get_item(
+            table_name=USERS_TABLE,
+            key={'email': {'S': current_user['email']}}
+        )
+        
+        if not user_data.get('isAdmin', {}).get('BOOL', False):
+            raise HTTPException(status_code=403, detail="Not authorized")
+
+        snapshot = await home_feed.rebuild()
+        return {"message": "Home feed rebuilt", "version": snapshot.version, "etag": snapshot.etag}
+
+    except HTTPException as he:
+        raise he
+    except Exception as e:
+        print(f"Error rebuilding home feed: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/payouts/settle-all")
+async def settle_all_payouts(current_user: dict = Depends(get_current_user)):
+    """Pay every seller with an unpaid balance at their payout ledger amounts"""
+    try:
+        # Check if user is admin
+        user_data = dynamodb_service.get_item(
+            table_name=USERS_TABLE,
+            key={'email': {'S': current_user['email']}}
+        )
+        
+        if not user_data.get('isAdmin', {}).get('BOOL', False):
+            raise HTTPException(status_code=403, detail="Not authorized")
+
+        settled = await payment_service.settle_all_due(current_user['email'])
+        for email in settled:
+            try:
+                await sales_dashboard.rebuild(email)
+            except Exception as e:
+                print(f"Error refreshing sales dashboard: {str(e)}")
+        return {"message": "Payouts settled", "sellers": settled}
+
+    except HTTPException as he:
+        raise he
+    except Exception as e:
+        print(f"Error settling payouts: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
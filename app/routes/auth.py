@@ -6,6 +6,7 @@ import os
 from typing import Optional
 from app.services import dynamodb as dynamodb_service
 from app.utils.referral import generate_referral_code
+from app.utils.user import invalidate_username
 import uuid
 from datetime import datetime
 import names
@@ -39,6 +40,7 @@ async def signup(data: SignUpUserData):
         response = await auth_service.user_sign_up(data)
         # print(response)
         dynamodb_service.put_item(table_name=USERS_TABLE, item=user_item)
+        invalidate_username(data.email)
         return Response(
             status_code=200, 
             content=json.dumps(response),
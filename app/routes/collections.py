@@ -1,10 +1,14 @@
 from fastapi import APIRouter, Depends, HTTPException
-from typing import List
+from typing import List, Optional
 from datetime import datetime
 import pytz
 from app.schemas.collection import CollectionCreate, CollectionDesign, Collection
 from app.services.auth import get_current_user
 from app.services import dynamodb as dynamodb_service
+from app.services.batch_loader import BatchLoader, get_batch_loader
+from app.services import design_cache
+from app.services import async_dynamodb
+from app.utils.pagination import encode_cursor, parse_cursor, check_limit
 import os
 
 COLLECTION_TABLE = os.getenv('DYNAMODB_COLLECTION_TABLE')
@@ -14,24 +18,40 @@ DESIGN_TABLE = os.getenv('DYNAMODB_DESIGN_TABLE')
 router = APIRouter()
 
 @router.get("")
-async def get_collections(current_user: dict = Depends(get_current_user)):
+async def get_collections(
+    limit: int = 50,
+    cursor: Optional[str] = None,
+    current_user: dict = Depends(get_current_user),
+    dynamodb = Depends(dynamodb_service._get_dynamodb_client)
+):
     try:
         user_email = current_user['email']
+        check_limit(limit)
+        context = {'list': 'collections', 'owner': user_email}
 
-        # Query collections for the user
-        response = dynamodb_service.query(
-            table_name=COLLECTION_TABLE,
+        # Query one page of the user's collections; the designs list is not needed here
+        items, last_key = await async_dynamodb.query_page(
+            COLLECTION_TABLE,
             key_condition_expression='#user_email = :email',
             expression_attribute_names={
-                '#user_email': 'user_email'
+                '#user_email': 'user_email',
+                '#name': 'collection_name',
+                '#description': 'description',
+                '#count': 'design_count',
+                '#created': 'created_at',
+                '#updated': 'updated_at'
             },
             expression_attribute_values={
                 ':email': {'S': user_email}
-            }
+            },
+            projection_expression='#name, #description, #count, #created, #updated',
+            limit=limit,
+            exclusive_start_key=parse_cursor(cursor, context),
+            client=dynamodb
         )
 
         collections = []
-        for item in response:
+        for item in items:
             collection_data = {
                 'name': item['collection_name']['S'],
                 'description': item.get('description', {}).get('S', ''),
@@ -41,8 +61,13 @@ async def get_collections(current_user: dict = Depends(get_current_user)):
             }
             collections.append(collection_data)
 
-        return {"collections": collections}
+        return {
+            "collections": collections,
+            "next_cursor": encode_cursor(last_key, context)
+        }
 
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -183,7 +208,8 @@ async def add_design_to_collection(
 @router.get("/{collection_name}/designs")
 async def get_collection_designs(
     collection_name: str,
-    current_user: dict = Depends(get_current_user)
+    current_user: dict = Depends(get_current_user),
+    loader: BatchLoader = Depends(get_batch_loader)
 ):
     try:
         user_email = current_user['email']
@@ -201,19 +227,17 @@ async def get_collection_designs(
         if not collection:
             raise HTTPException(status_code=404, detail="Collection not found")
 
+        collection_designs = collection.get('designs', {}).get('L', [])
+        design_items = await design_cache.load_designs(
+            (d['M']['design_id']['S'] for d in collection_designs),
+            loader
+        )
+
         designs = []
-        for design_item in collection.get('designs', {}).get('L', []):
+        for design_item, design_data in zip(collection_designs, design_items):
             design_id = design_item['M']['design_id']['S']
             added_at = design_item['M']['added_at']['S']
-            
-            design_data = dynamodb_service.get_item(
-                table_name=DESIGN_TABLE,
-                key={
-                    'design_id': {'S': design_id}
-                }
-            )
-
-            
+
             if design_data:
                 designs.append({
                     'id': design_id,
@@ -1,18 +1,25 @@
-from fastapi import APIRouter, UploadFile, File, Form, HTTPException, Depends
+from fastapi import APIRouter, UploadFile, File, Form, HTTPException, Depends, Request, Response
 from datetime import datetime
 from app.services.storage import upload_design_files
 from app.services.auth import get_current_user, verify_designer_status
 from typing import Optional, Dict, Any
 from app.schemas.design import ApproveDesignRequest, BundleDiscountRequest
-from app.utils.user import get_username_from_email
+from app.utils.user import get_username_from_email, get_usernames_from_emails, get_email_from_username
+from app.services.batch_loader import BatchLoader, get_batch_loader
 import json
 from app.services import dynamodb as dynamodb_service
+from app.services import async_dynamodb
+from app.services.aio import run_blocking
+from app.services import design_cache, design_events, entitlements, home_feed, search_index, variants
+from app.utils.item_codec import DESIGN
+from app.utils.pagination import encode_cursor, parse_cursor, check_limit
 from app.utils.s3_utils import S3Handler
 from fastapi.responses import JSONResponse
 import os
 from pydantic import BaseModel
 from app.services.image_search import ImageSearchService
 from app.services.text_search import TextSearchService
+import asyncio
 import base64
 import logging
 import io
@@ -26,6 +33,17 @@ router = APIRouter()
 # Set up logging
 logger = logging.getLogger(__name__)
 
+# Sparse moderation queue: pending designs carry pending_queue, removed on approval or rejection
+PENDING_QUEUE_INDEX = 'PendingQueueGSI'
+PENDING_QUEUE = 'PENDING'
+
+# Gallery sort orders -> (sparse GSI keyed on gallery_category, ascending)
+GALLERY_SORT_INDEXES = {
+    'newest': ('GalleryCreatedGSI', False),
+    'price': ('GalleryPriceGSI', True),
+    'price_desc': ('GalleryPriceGSI', False)
+}
+
 # Define request model for base64 image
 class ImageSearchRequest(BaseModel):
     image_base64: str
@@ -78,6 +96,8 @@ async def upload_design(
             'thumbnail_url': {'S': thumbnail_url},
             'seller_email': {'S': current_user['email']},
             'verification_status': {'S': 'Pending'},
+            'pending_queue': {'S': PENDING_QUEUE},
+            'variant_family_id': {'S': design_id},
             # 'verified_by': {'S': ''},
             # 'verified_at': {'S': ''},
             # 'verification_comments': {'S': ''},
@@ -90,7 +110,8 @@ async def upload_design(
         }
 
         # Save to DynamoDB
-        response = dynamodb.put_item(
+        response = await run_blocking(
+            dynamodb.put_item,
             TableName=DESIGN_TABLE,
             Item=design_item
         )
@@ -108,11 +129,14 @@ async def upload_design(
 
 @router.get("/pending")
 async def get_pending_designs(
+    limit: int = 20,
+    cursor: Optional[str] = None,
     current_user: dict = Depends(get_current_user),
     dynamodb = Depends(dynamodb_service._get_dynamodb_client),
-    s3_handler = Depends(S3Handler)
+    s3_handler = Depends(S3Handler),
+    loader: BatchLoader = Depends(get_batch_loader)
 ):
-    """Get all designs with verification_status = 'Pending'"""
+    """One page of designs with verification_status = 'Pending', oldest submission first"""
     try:
         is_designer = await verify_designer_status(current_user, dynamodb)
         if not is_designer:
@@ -120,55 +144,69 @@ async def get_pending_designs(
                 status_code=403,
                 detail="Only designers can view pending designs"
             )
-
-        response = dynamodb.scan(
-            TableName=DESIGN_TABLE,
-            FilterExpression='verification_status = :status',
-            ExpressionAttributeValues={
-                ':status': {'S': 'Pending'}
-            }
+        check_limit(limit)
+        context = {'list': 'pending'}
+
+        # Only pending designs carry pending_queue, so the index holds just the moderation queue
+        pending_items, last_key = await async_dynamodb.query_page(
+            DESIGN_TABLE,
+            index_name=PENDING_QUEUE_INDEX,
+            key_condition_expression='pending_queue = :queue',
+            expression_attribute_values={':queue': {'S': PENDING_QUEUE}},
+            limit=limit,
+            exclusive_start_key=parse_cursor(cursor, context),
+            client=dynamodb
         )
 
+        # Originals of color matching submissions in one batch read
+        original_ids = [
+            item.get('color_matching_design_id', {}).get('S', '')
+            if item.get('is_color_matching', {}).get('BOOL', False) else ''
+            for item in pending_items
+        ]
+        wanted = [original_id for original_id in original_ids if original_id]
+        originals = dict(zip(wanted, await design_cache.load_designs(wanted, loader)))
+
+        # Every URL of the page presigned in one batch: design, thumbnail and original thumbnail per item,
+        # with each item's offset into the batch so a skipped item cannot shift the next one's URLs
+        objects = []
+        offsets = []
+        for item, original_id in zip(pending_items, original_ids):
+            try:
+                item_objects = [
+                    (s3_handler.designs_bucket, item['design_url']['S'].split('amazonaws.com/')[-1]),
+                    (s3_handler.thumbnails_bucket, item['thumbnail_url']['S'].split('amazonaws.com/')[-1])
+                ]
+                original_design = originals.get(original_id)
+                if original_design:
+                    item_objects.append((s3_handler.thumbnails_bucket, original_design['thumbnail_url']['S'].split('amazonaws.com/')[-1]))
+            except Exception as e:
+                print(f"Error processing design item: {str(e)}")
+                offsets.append(None)
+                continue
+            offsets.append(len(objects))
+            objects.extend(item_objects)
+        urls = await s3_handler.generate_presigned_urls(objects)
+
         designs = []
-        for item in response.get('Items', []):
+        for item, original_id, offset in zip(pending_items, original_ids, offsets):
+            if offset is None:
+                continue
             try:
-                # Extract just the path part from the full S3 URL
-                design_key = item['design_url']['S'].split('amazonaws.com/')[-1]
-                thumbnail_key = item['thumbnail_url']['S'].split('amazonaws.com/')[-1]
-                
-                design_url = await s3_handler.generate_presigned_url(
-                    s3_handler.designs_bucket,
-                    design_key
-                )
-                thumbnail_url = await s3_handler.generate_presigned_url(
-                    s3_handler.thumbnails_bucket,
-                    thumbnail_key
-                )
+                design_url = urls[offset]
+                thumbnail_url = urls[offset + 1]
 
                 # Get original design details if this is a color matching design
                 color_matching_info = None
-                if item.get('is_color_matching', {}).get('BOOL', False):
-                    original_design_id = item.get('color_matching_design_id', {}).get('S')
-                    if original_design_id:
-                        original_design = dynamodb.get_item(
-                            TableName=DESIGN_TABLE,
-                            Key={'design_id': {'S': original_design_id}}
-                        ).get('Item')
-                        
-                        if original_design:
-                            original_thumbnail_key = original_design['thumbnail_url']['S'].split('amazonaws.com/')[-1]
-                            original_thumbnail_url = await s3_handler.generate_presigned_url(
-                                s3_handler.thumbnails_bucket,
-                                original_thumbnail_key
-                            )
-                            
-                            color_matching_info = {
-                                'original_design_id': original_design_id,
-                                'original_title': original_design['title']['S'],
-                                'original_thumbnail_url': original_thumbnail_url,
-                                'original_category': original_design['category']['S'],
-                                'original_status': original_design['verification_status']['S']
-                            }
+                original_design = originals.get(original_id)
+                if original_design:
+                    color_matching_info = {
+                        'original_design_id': original_id,
+                        'original_title': original_design['title']['S'],
+                        'original_thumbnail_url': urls[offset + 2],
+                        'original_category': original_design['category']['S'],
+                        'original_status': original_design['verification_status']['S']
+                    }
 
                 # Parse metadata for file type and resolution
                 try:
@@ -196,7 +234,7 @@ async def get_pending_designs(
                 print(f"Error processing design item: {str(e)}")
                 continue
 
-        return JSONResponse(content={"designs": designs})
+        return JSONResponse(content={"designs": designs, "next_cursor": encode_cursor(last_key, context)})
     except HTTPException as he:
         # Re-raise HTTP exceptions as they are already properly formatted
         raise he
@@ -222,7 +260,8 @@ async def approve_design(
 
     try:
         # Check if design exists
-        design_check = dynamodb.get_item(
+        design_check = await run_blocking(
+            dynamodb.get_item,
             TableName=DESIGN_TABLE,
             Key={'design_id': {'S': design_id}}
         )
@@ -234,13 +273,18 @@ async def approve_design(
             )
 
         # Start with base update expression
-        update_expr = 'SET verification_status = :status, verified_by = :approver, verified_at = :time, is_color_matching = :is_color_matching, color_matching_design_id = :color_matching_design_id'
+        update_expr = 'SET verification_status = :status, verified_by = :approver, verified_at = :time, is_color_matching = :is_color_matching, color_matching_design_id = :color_matching_design_id, variant_family_id = :variant_family_id'
         expr_attrs = {
             ':status': {'S': 'Verified'},
             ':approver': {'S': current_user['email']},
             ':time': {'S': str(datetime.now())},
             ':is_color_matching': {'BOOL': request.is_color_matching},
-            ':color_matching_design_id': {'S': request.color_matching_design_id}
+            ':color_matching_design_id': {'S': request.color_matching_design_id},
+            ':variant_family_id': {'S': variants.family_id({
+                'design_id': {'S': design_id},
+                'is_color_matching': {'BOOL': request.is_color_matching},
+                'color_matching_design_id': {'S': request.color_matching_design_id or ''}
+            })}
         }
 
         # Add verification comments if present
@@ -253,6 +297,12 @@ async def approve_design(
             update_expr += ', category = :category'
             expr_attrs[':category'] = {'S': request.modified_category}
 
+        # Verified designs join the sparse gallery indexes under their (final) category
+        gallery_category = request.modified_category or design_check['Item'].get('category', {}).get('S')
+        if gallery_category:
+            update_expr += ', gallery_category = :gallery_category'
+            expr_attrs[':gallery_category'] = {'S': gallery_category}
+
         # Add or update tags if present
         if request.modified_tags:
             update_expr += ', tags = :tags'
@@ -278,12 +328,28 @@ async def approve_design(
                 update_expr += ', metadata = :metadata'
                 expr_attrs[':metadata'] = {'S': json.dumps({'layers': layers_data})}
 
+        # Leaves the moderation queue
+        update_expr += ' REMOVE pending_queue'
+
         # Update DynamoDB
-        response = dynamodb.update_item(
+        response = await run_blocking(
+            dynamodb.update_item,
             TableName=DESIGN_TABLE,
             Key={'design_id': {'S': design_id}},
             UpdateExpression=update_expr,
-            ExpressionAttributeValues=expr_attrs
+            ExpressionAttributeValues=expr_attrs,
+            ReturnValues='UPDATED_OLD'
+        )
+        await design_events.verification_changed(
+            design_check['Item'],
+            response.get('Attributes', {}).get('verification_status', {}).get('S') == 'Verified',
+            True,
+            dynamodb
+        )
+        await design_events.design_changed(
+            [design_id],
+            [design_check['Item'].get('category', {}).get('S'), request.modified_category],
+            dynamodb
         )
 
         return JSONResponse(
@@ -319,7 +385,8 @@ async def reject_design(
 
     try:
         # Check if design exists
-        design_check = dynamodb.get_item(
+        design_check = await run_blocking(
+            dynamodb.get_item,
             TableName=DESIGN_TABLE,
             Key={'design_id': {'S': design_id}}
         )
@@ -330,17 +397,26 @@ async def reject_design(
                 detail="Design not found"
             )
 
-        response = dynamodb.update_item(
+        response = await run_blocking(
+            dynamodb.update_item,
             TableName=DESIGN_TABLE, 
             Key={'design_id': {'S': design_id}},
-            UpdateExpression='SET verification_status = :status, verified_by = :rejector, verified_at = :time, verification_comments = :comments',
+            UpdateExpression='SET verification_status = :status, verified_by = :rejector, verified_at = :time, verification_comments = :comments REMOVE gallery_category, pending_queue',
             ExpressionAttributeValues={
                 ':status': {'S': 'Rejected'},
                 ':rejector': {'S': current_user['email']},
                 ':time': {'S': str(datetime.now())},
                 ':comments': {'S': verification_comments}
-            }
+            },
+            ReturnValues='UPDATED_OLD'
+        )
+        await design_events.verification_changed(
+            design_check['Item'],
+            response.get('Attributes', {}).get('verification_status', {}).get('S') == 'Verified',
+            False,
+            dynamodb
         )
+        await design_events.design_changed([design_id], [design_check['Item'].get('category', {}).get('S')], dynamodb)
 
         return JSONResponse(
             content={"message": "Design rejected successfully"},
@@ -370,39 +446,16 @@ async def get_design_download_url(
         is_designer = await verify_designer_status(current_user, dynamodb)
         
         if not is_designer:
-            # For regular users, check if they have purchased the design
-            purchase_response = dynamodb.query(
-                TableName=TRANSACTION_TABLE,
-                IndexName='buyer_email-created_at-index',
-                KeyConditionExpression='buyer_email = :email',
-                ExpressionAttributeValues={
-                    ':email': {'S': current_user['email']},
-                    ':status': {'S': 'COMPLETED'}
-                },
-                FilterExpression='#transaction_status = :status',
-                ExpressionAttributeNames={
-                    '#transaction_status': 'status'
-                }
-            )
-
-            # Check if the design exists in any completed transaction
-            design_found = False
-            for transaction in purchase_response.get('Items', []):
-                for design in transaction['designs']['L']:
-                    if design['M']['design_id']['S'] == design_id:
-                        design_found = True
-                        break
-                if design_found:
-                    break
-
-            if not design_found:
+            # For regular users, check the entitlement written when they bought the design
+            if not await entitlements.has_entitlement(current_user['email'], design_id, dynamodb):
                 raise HTTPException(
                     status_code=403,
                     detail="You haven't purchased this design"
                 )
 
         # Get design details from DynamoDB
-        response = dynamodb.get_item(
+        response = await run_blocking(
+            dynamodb.get_item,
             TableName=DESIGN_TABLE,
             Key={'design_id': {'S': design_id}}
         )
@@ -435,124 +488,116 @@ async def get_design_download_url(
 
 @router.get("/home")
 async def get_home_designs(
+    request: Request,
     dynamodb = Depends(dynamodb_service._get_dynamodb_client)
 ):
-    """Get verified designs for home page, no auth required"""
+    """Get verified designs for home page, no auth required. Served from the precomputed home feed."""
     try:
-        response = dynamodb.scan(
-            TableName=DESIGN_TABLE,
-            FilterExpression='verification_status = :status',
-            ExpressionAttributeValues={
-                ':status': {'S': 'Verified'}
-            }
-        )
-
-        # Group designs by category
-        designs_by_category = {}
-        for item in response.get('Items', []):
-            
-            category = item['category']['S']
-            if category not in designs_by_category:
-                designs_by_category[category] = []
-            
-            #Get seller username
-            seller_username = await get_username_from_email(item['seller_email']['S'], dynamodb)
-
-            # Parse metadata for file type and resolution
-            try:
-                metadata = json.loads(item.get('metadata', {}).get('S', '{}'))
-                file_type = metadata.get('fileType', '').upper() if 'fileType' in metadata else metadata.get('type', '').split('/')[-1].upper()
-                dimensions = metadata.get('dimensions', {})
-                resolution = f"{dimensions.get('width', '')}x{dimensions.get('height', '')}" if dimensions else ''
-                layers = metadata.get('layers',0)
-            except (json.JSONDecodeError, AttributeError):
-                file_type = ''
-                resolution = ''
-                layers = 0
-            
-            designs_by_category[category].append({
-                'id': item['design_id']['S'],
-                'title': item['title']['S'],
-                'thumbnail_url': item['thumbnail_url']['S'],
-                'price': float(item['price']['N']),
-                'category': category,
-                'created_at': item.get('created_at', {}).get('S'),
-                'file_type': file_type,
-                'resolution': resolution,
-                'layers': layers,
-                'is_color_matching': item.get('is_color_matching', {}).get('BOOL', False),
-                'color_matching_design_id': item.get('color_matching_design_id', {}).get('S', ''),
-                'seller_username': seller_username,
-                'bundle_discount': item.get('bundle_discount', {}).get('N', '0')
-            })
-
-        return {"designs": designs_by_category}
-
+        snapshot = await home_feed.get_home_feed(dynamodb)
     except Exception as e:
         print(f"Error fetching verified designs: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+    headers = {
+        'ETag': snapshot.etag,
+        'Cache-Control': f'public, max-age={int(home_feed.REFRESH_SECONDS)}'
+    }
+    if request.headers.get('if-none-match') == snapshot.etag:
+        return Response(status_code=304, headers=headers)
+    return Response(content=snapshot.body, media_type='application/json', headers=headers)
+
 @router.get("/gallery/{category}")
 async def get_gallery_designs(
     category: str,
-    page: int = 1,
     limit: int = 50,
-    dynamodb = Depends(dynamodb_service._get_dynamodb_client)
+    cursor: Optional[str] = None,
+    sort: Optional[str] = None,
+    dynamodb = Depends(dynamodb_service._get_dynamodb_client),
+    loader: BatchLoader = Depends(get_batch_loader)
 ):
-    """Get verified designs for a specific category with pagination"""
+    """
+    Get verified designs for a specific category, one index page per request.
+    Pass the returned next_cursor to fetch the following page; sort is one of
+    'newest', 'price' or 'price_desc' (default: category-status-index order).
+    """
+    if sort is not None and sort not in GALLERY_SORT_INDEXES:
+        raise HTTPException(status_code=400, detail=f"Invalid sort, expected one of: {', '.join(GALLERY_SORT_INDEXES)}")
+    check_limit(limit)
+    context = {'list': 'gallery', 'category': category, 'sort': sort}
+    exclusive_start_key = parse_cursor(cursor, context)
+
     try:
-        response = dynamodb.scan(
-            TableName=DESIGN_TABLE,
-            FilterExpression='verification_status = :status AND category = :category',
-            ExpressionAttributeValues={
-                ':status': {'S': 'Verified'},
-                ':category': {'S': category.replace('-', ' ').title()}
+        gallery_category = category.replace('-', ' ').title()
+        if sort is None:
+            query_params = {
+                'IndexName': 'category-status-index',
+                'KeyConditionExpression': 'category = :category AND verification_status = :status',
+                'ExpressionAttributeValues': {
+                    ':category': {'S': gallery_category},
+                    ':status': {'S': 'Verified'}
+                }
+            }
+        else:
+            # Sparse indexes: only verified designs carry gallery_category
+            index_name, ascending = GALLERY_SORT_INDEXES[sort]
+            query_params = {
+                'IndexName': index_name,
+                'KeyConditionExpression': 'gallery_category = :category',
+                'ExpressionAttributeValues': {
+                    ':category': {'S': gallery_category}
+                },
+                'ScanIndexForward': ascending
             }
+        if exclusive_start_key:
+            query_params['ExclusiveStartKey'] = exclusive_start_key
+
+        response = await run_blocking(
+            dynamodb.query,
+            TableName=DESIGN_TABLE,
+            Limit=limit,
+            **query_params
         )
+        gallery_items = DESIGN.decode_many(response.get('Items', []))
 
-        # Process and filter designs
-        all_designs = []
-        for item in response.get('Items', []):
+        # Get seller usernames in one batched read
+        usernames = await get_usernames_from_emails(
+            (item['seller_email'] for item in gallery_items),
+            loader
+        )
+
+        designs = []
+        for item in gallery_items:
 
-            #Get seller username
-            seller_username = await get_username_from_email(item['seller_email']['S'], dynamodb)
+            seller_username = usernames[item['seller_email']]
 
             # Parse metadata for file type and resolution
             try:
-                metadata = json.loads(item.get('metadata', {}).get('S', '{}'))
+                metadata = item['metadata']
                 file_type = metadata.get('fileType', '').upper() if 'fileType' in metadata else metadata.get('type', '').split('/')[-1].upper()
                 dimensions = metadata.get('dimensions', {})
                 resolution = f"{dimensions.get('width', '')}x{dimensions.get('height', '')}" if dimensions else ''
                 layers = metadata.get('layers',0)
-            except (json.JSONDecodeError, AttributeError):
+            except (AttributeError, TypeError):
                 file_type = ''
                 resolution = ''
                 layers = 0
 
-            all_designs.append({
-                'id': item['design_id']['S'],
-                'title': item['title']['S'],
-                'thumbnail_url': item['thumbnail_url']['S'],
-                'price': float(item['price']['N']),
-                'category': item['category']['S'],
-                'created_at': item.get('created_at', {}).get('S'),
+            designs.append({
+                'id': item['design_id'],
+                'title': item['title'],
+                'thumbnail_url': item['thumbnail_url'],
+                'price': item['price'],
+                'category': item['category'],
+                'created_at': item['created_at'],
                 'file_type': file_type,
                 'resolution': resolution,
                 'layers': layers,
                 'seller_username': seller_username,
             })
 
-        # Calculate pagination
-        start_idx = (page - 1) * limit
-        end_idx = start_idx + limit
-
-        # Slice designs for pagination
-        designs = all_designs[start_idx:end_idx]
-
         return {
             "designs": designs,
-            "total": len(all_designs),
-            "page": page,
+            "next_cursor": encode_cursor(response.get('LastEvaluatedKey'), context),
             "limit": limit
         }
 
@@ -595,22 +640,21 @@ async def search_by_image(
 async def search_designs(
     query: str,
     category: Optional[str] = None,
+    limit: int = 50,
     dynamodb = Depends(dynamodb_service._get_dynamodb_client),
-    text_search_service: TextSearchService = Depends(TextSearchService)
+    text_search_service: TextSearchService = Depends(TextSearchService),
+    loader: BatchLoader = Depends(get_batch_loader)
 ):
+    check_limit(limit)
     try:
         logger.info(f"Starting search with query: {query}, category: {category}")
         
         # First check if query is a design_id
         if query and query.strip():  # Only check if query is not empty
-            design_id_response = dynamodb.get_item(
-                TableName=DESIGN_TABLE,
-                Key={'design_id': {'S': query}}
-            )
+            item = await design_cache.get_design_async(query, dynamodb)
             
             # If design_id exists, return only that result
-            if 'Item' in design_id_response:
-                item = design_id_response['Item']
+            if item is not None:
                 metadata = json.loads(item.get('metadata', {}).get('S', '{}'))
                 seller_username = await get_username_from_email(item['seller_email']['S'], dynamodb)
                 
@@ -631,58 +675,48 @@ async def search_designs(
                     }]
                 }
 
-        filter_expr = 'verification_status = :status'
-        expr_values = {
-            ':status': {'S': 'Verified'}
-        }
-        
-        response = dynamodb.scan(
-            TableName=DESIGN_TABLE,
-            FilterExpression=filter_expr,
-            ExpressionAttributeValues=expr_values
+        # Ranked keyword lookup in the in-process index; only the top hits are read from DynamoDB
+        design_ids = await search_index.search(query, limit, dynamodb)
+        matched_items = [
+            item for item in DESIGN.decode_many(
+                item for item in await design_cache.load_designs(design_ids, loader) if item
+            )
+            if item['verification_status'] == 'Verified'
+        ]
+
+        usernames = await get_usernames_from_emails(
+            (item['seller_email'] for item in matched_items),
+            loader
         )
 
-        # Process designs and filter by search query
         designs = []
-        query_lower = query.lower()
-        
-        for item in response.get('Items', []):
-            # Check if title, category or tags contain search query (case-insensitive)
-            title = item['title']['S'].lower()
-            item_category = item['category']['S'].lower()
-            tags = item.get('tags', {}).get('S', '').lower()
-            
-            if not (query_lower in title or 
-                   query_lower in item_category or 
-                   query_lower in tags):
-                continue
-                
-            seller_username = await get_username_from_email(item['seller_email']['S'], dynamodb)
+        for item in matched_items:
+            seller_username = usernames[item['seller_email']]
 
             try:
-                metadata = json.loads(item.get('metadata', {}).get('S', '{}'))
+                metadata = item['metadata']
                 file_type = metadata.get('fileType', '').upper()
                 dimensions = metadata.get('dimensions', {})
                 resolution = f"{dimensions.get('width', '')}x{dimensions.get('height', '')}"
                 layers = metadata.get('layers',0)
-            except (json.JSONDecodeError, AttributeError):
+            except (AttributeError, TypeError):
                 file_type = ''
                 resolution = ''
                 layers = 0
             
             designs.append({
-                'id': item['design_id']['S'],
-                'title': item['title']['S'],
-                'thumbnail_url': item['thumbnail_url']['S'],
-                'price': float(item['price']['N']),
-                'category': item['category']['S'],
-                'tags': item.get('tags', {}).get('S', '').split(','),
+                'id': item['design_id'],
+                'title': item['title'],
+                'thumbnail_url': item['thumbnail_url'],
+                'price': item['price'],
+                'category': item['category'],
+                'tags': item['tags'].split(','),
                 'seller_username': seller_username,
                 'file_type': file_type,
                 'resolution': resolution,
                 'layers': layers,
-                'is_color_matching': item.get('is_color_matching', {}).get('BOOL', False),
-                'color_matching_design_id': item.get('color_matching_design_id', {}).get('S', '')
+                'is_color_matching': item['is_color_matching'],
+                'color_matching_design_id': item['color_matching_design_id']
             })
 
         final_results = designs
@@ -711,6 +745,21 @@ async def search_designs(
         logger.error(f"Search failed: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get("/suggest")
+async def suggest_designs(
+    q: str,
+    limit: int = 8,
+    dynamodb = Depends(dynamodb_service._get_dynamodb_client)
+):
+    """Typeahead completions from titles, tags and categories of verified designs, most popular first"""
+    check_limit(limit, 20)
+    try:
+        suggestions = await search_index.suggest(q, limit, dynamodb)
+    except Exception as e:
+        print(f"Error fetching suggestions: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+    return {"suggestions": suggestions}
+
 @router.post("/generate-upload-urls")
 async def generate_upload_urls(
     file_info: dict,
@@ -784,6 +833,7 @@ async def create_design(
             'thumbnail_url': {'S': thumbnail_url},
             'seller_email': {'S': current_user['email']},
             'verification_status': {'S': 'Pending'},
+            'pending_queue': {'S': PENDING_QUEUE},
             'created_at': {'S': str(datetime.now())},
             'metadata': {'S': request['metadata']},
             'total_sold': {'N': '0'},
@@ -792,12 +842,15 @@ async def create_design(
             'is_color_matching':{'BOOL':request.get('is_color_matching',False)},
             'bundle_discount': {'N': str(request.get('bundle_discount',0))}
         }
+        design_item['variant_family_id'] = {'S': variants.family_id(design_item)}
 
         # Save to DynamoDB
-        response = dynamodb.put_item(
+        response = await run_blocking(
+            dynamodb.put_item,
             TableName=DESIGN_TABLE,     
             Item=design_item
         )
+        design_cache.invalidate(design_id)
 
         return {
             "design_id": design_id,
@@ -811,48 +864,43 @@ async def create_design(
 @router.get("/seller/{username}")
 async def get_seller_designs(
     username: str,
-    page: int = 1,
     limit: int = 20,
+    cursor: Optional[str] = None,
     dynamodb = Depends(dynamodb_service._get_dynamodb_client)
 ):
     try:
-        # Get seller email by querying USER_TABLE with username
-        user_response = dynamodb.scan(
-            TableName=USER_TABLE,
-            FilterExpression='username = :username',
-            ExpressionAttributeValues={
-                ':username': {'S': username}
-            }
-        )
-        
-        user_items = user_response.get('Items', [])
-        if not user_items:
+        check_limit(limit)
+        context = {'list': 'seller', 'seller': username}
+        start_key = parse_cursor(cursor, context)
+
+        # Get seller email with a keyed lookup on UserUsernameGSI
+        seller_email = await get_email_from_username(username, dynamodb)
+        if not seller_email:
             raise HTTPException(status_code=404, detail="Seller not found")
-            
-        seller_email = user_items[0]['email']['S']
         
-        # Query designs using GSI with just the partition key
-        response = dynamodb.query(
-            TableName=DESIGN_TABLE,
-            IndexName='DesignSellerGSI',
-            KeyConditionExpression='seller_email = :email',
-            FilterExpression='verification_status = :status',
-            ExpressionAttributeValues={
+        # One page of the seller's verified designs from the GSI
+        seller_items, last_key = await async_dynamodb.query_page(
+            DESIGN_TABLE,
+            index_name='DesignSellerGSI',
+            key_condition_expression='seller_email = :email',
+            filter_expression='verification_status = :status',
+            expression_attribute_values={
                 ':email': {'S': seller_email},
                 ':status': {'S': 'Verified'}
-            }
+            },
+            limit=limit,
+            exclusive_start_key=start_key,
+            key_attributes=('design_id', 'seller_email'),
+            client=dynamodb
         )
 
         designs = []
-        for item in response.get('Items', []):
+        for item in seller_items:
             # Skip color matching designs if original is not verified
             if item.get('is_color_matching', {}).get('BOOL', False):
                 original_id = item.get('color_matching_design_id', {}).get('S')
                 if original_id:
-                    original_design = dynamodb.get_item(
-                        TableName=DESIGN_TABLE,
-                        Key={'design_id': {'S': original_id}}
-                    ).get('Item')
+                    original_design = await design_cache.get_design_async(original_id, dynamodb)
                     
                     if not original_design or original_design.get('verification_status', {}).get('S') != 'Verified':
                         continue
@@ -885,15 +933,11 @@ async def get_seller_designs(
 
         # Sort designs by most recent first
         designs.sort(key=lambda x: x.get('id', ''), reverse=True)
-        
-        # Calculate pagination
-        start_idx = (page - 1) * limit
-        end_idx = start_idx + limit
-        paginated_designs = designs[start_idx:end_idx]
 
         return {
-            "designs": paginated_designs,
-            "total": len(designs)
+            "designs": designs,
+            "next_cursor": encode_cursor(last_key, context),
+            "limit": limit
         }
 
     except HTTPException as he:
@@ -912,7 +956,8 @@ async def update_bundle_discount(
     """Update bundle discount for a design with color variants"""
     try:
         # Check if design exists and get current data
-        design_response = dynamodb.get_item(
+        design_response = await run_blocking(
+            dynamodb.get_item,
             TableName=DESIGN_TABLE,
             Key={'design_id': {'S': design_id}}
         )
@@ -932,18 +977,6 @@ async def update_bundle_discount(
                 detail="Not authorized to update this design"
             )
 
-        # Verify the design has color variants
-        # Check both as original and as variant
-        variants_response = dynamodb.scan(
-            TableName=DESIGN_TABLE,
-            FilterExpression='color_matching_design_id = :original_id OR design_id = :original_id',
-            ExpressionAttributeValues={
-                
-                ':original_id': design_item.get('color_matching_design_id', {'S': design_id}),
-            }
-        )
-        print("variants_response",variants_response)
-
         # Validate discount range
         if not 0 <= request.bundle_discount <= 100:
             raise HTTPException(
@@ -951,42 +984,12 @@ async def update_bundle_discount(
                 detail="Discount must be between 0 and 100"
             )
 
-        # Update the bundle discount
-        update_response = dynamodb.update_item(
-            TableName=DESIGN_TABLE,
-            Key={'design_id': {'S': design_id}},
-            UpdateExpression='SET bundle_discount = :discount',
-            ExpressionAttributeValues={
-                ':discount': {'N': str(request.bundle_discount)}
-            },
-            ReturnValues='ALL_NEW'
-        )
+        # One keyed query for the family (original and every variant), then chunked transactional writes
+        members = await variants.set_bundle_discount(variants.family_id(design_item), request.bundle_discount, dynamodb)
+        changed_ids = [member['design_id']['S'] for member in members]
+        changed_categories = {member.get('category', {}).get('S') for member in members}
 
-        # Also update the bundle discount for all variants
-        if design_item.get('is_color_matching', {}).get('BOOL', False):
-            # If this is a variant, update the original and other variants
-            original_id = design_item['color_matching_design_id']['S']
-            # Update original
-            dynamodb.update_item(
-                TableName=DESIGN_TABLE,
-                Key={'design_id': {'S': original_id}},
-                UpdateExpression='SET bundle_discount = :discount',
-                ExpressionAttributeValues={
-                    ':discount': {'N': str(request.bundle_discount)}
-                }
-            )
-            # Update other variants
-        if variants_response.get('Items'):
-            for variant in variants_response['Items']:
-                if variant['design_id']['S'] != design_id:
-                    dynamodb.update_item(
-                        TableName=DESIGN_TABLE,
-                        Key={'design_id': {'S': variant['design_id']['S']}},
-                        UpdateExpression='SET bundle_discount = :discount',
-                        ExpressionAttributeValues={
-                            ':discount': {'N': str(request.bundle_discount)}
-                        }
-                    )
+        await design_events.design_changed(changed_ids, changed_categories, dynamodb)
 
         return JSONResponse(
             content={
@@ -1013,22 +1016,17 @@ async def get_design_variants(
     dynamodb = Depends(dynamodb_service._get_dynamodb_client)
 ):
     try:
-        # Get all variants including the original design
-        variants_response = dynamodb.scan(
-            TableName=DESIGN_TABLE,
-            FilterExpression='color_matching_design_id = :design_id AND is_color_matching = :true AND verification_status = :status',
-            ExpressionAttributeValues={
-                ':design_id': {'S': design_id},
-                ':true': {'BOOL': True},
-                ':status': {'S': 'Verified'}
-            }
-        )
-       
-
-        variants = []
-        for item in variants_response.get('Items', []):
-            if item['design_id']['S'] != design_id:  # Don't include the current design
-                variants.append({
+        # The design and its variants form one family in VariantFamilyGSI
+        family = await variants.family_members(design_id, dynamodb)
+
+        family_variants = []
+        original_item = None
+        for item in family:
+            if item['design_id']['S'] == design_id:
+                original_item = item
+            elif (item.get('is_color_matching', {}).get('BOOL', False)
+                  and item.get('verification_status', {}).get('S') == 'Verified'):
+                family_variants.append({
                     'id': item['design_id']['S'],
                     'title': item['title']['S'],
                     'price': float(item['price']['N']),
@@ -1037,28 +1035,27 @@ async def get_design_variants(
                     'color_matching_design_id': item.get('color_matching_design_id', {}).get('S'),
                     'bundle_discount': float(item.get('bundle_discount', {}).get('N', '0'))
                 })
-        
 
-        # Add the original design to the variants
-        original_design_response = dynamodb.get_item(
-            TableName=DESIGN_TABLE,
-            Key={'design_id': {'S': design_id}}
-        )
+        # Add the original design to the variants (a variant's id is not a family of its own)
+        if original_item is None:
+            original_item = (await run_blocking(
+                dynamodb.get_item,
+                TableName=DESIGN_TABLE,
+                Key={'design_id': {'S': design_id}}
+            ))['Item']
         original_design = {
             'id': design_id,
-            'title': original_design_response['Item']['title']['S'],
-            'price': float(original_design_response['Item']['price']['N']),
-            'thumbnail_url': original_design_response['Item']['thumbnail_url']['S'],
-            'is_color_matching': original_design_response['Item'].get('is_color_matching', {}).get('BOOL', False),
-            'color_matching_design_id': original_design_response['Item'].get('color_matching_design_id', {}).get('S'),
-            'bundle_discount': float(original_design_response['Item'].get('bundle_discount', {}).get('N', '0'))
+            'title': original_item['title']['S'],
+            'price': float(original_item['price']['N']),
+            'thumbnail_url': original_item['thumbnail_url']['S'],
+            'is_color_matching': original_item.get('is_color_matching', {}).get('BOOL', False),
+            'color_matching_design_id': original_item.get('color_matching_design_id', {}).get('S'),
+            'bundle_discount': float(original_item.get('bundle_discount', {}).get('N', '0'))
         }
-        variants.append(original_design)
-
-        print(variants)
+        family_variants.append(original_design)
 
         return {
-            'variants': variants
+            'variants': family_variants
         }
 
     except Exception as e:
@@ -3,7 +3,8 @@ from app.services.auth import get_current_user
 from app.services.transaction import TransactionService
 from app.services.cart import CartService
 from datetime import datetime
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
+from app.utils.pagination import check_limit
 
 router = APIRouter()
 transaction_service = TransactionService()
@@ -96,8 +97,8 @@ async def get_transaction(
 
 @router.get("/history")
 async def get_transactions(
-    page: int = 1,
     limit: int = 10,
+    cursor: Optional[str] = None,
     current_user: dict = Depends(get_current_user)
 ):
     try:
@@ -105,13 +106,15 @@ async def get_transactions(
         
         result = await transaction_service.get_user_transactions(
             buyer_email=current_user['email'],
-            page=page,
-            limit=limit
+            limit=check_limit(limit),
+            cursor=cursor
         )
         
         print(f"Found {len(result['transactions'])} transactions")  # Debug log
         return result
         
+    except HTTPException as he:
+        raise he
     except Exception as e:
         print(f"Error in get_transactions: {str(e)}")
         raise HTTPException(
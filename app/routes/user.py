@@ -1,6 +1,11 @@
+import asyncio
 from fastapi import APIRouter, HTTPException, Header, Depends, Request, status
 from app.schemas.user import VerifySellerData, UpdateUserData, UpdateUserUpiId
 import app.services.dynamodb as dynamodb_service
+from app.utils.item_codec import PAYMENT_HISTORY
+from app.services.aio import run_blocking
+from app.services import async_dynamodb, entitlements
+from app.utils.pagination import encode_cursor, parse_cursor, check_limit
 from app.services import auth as auth_service
 from fastapi import HTTPException
 from typing import Optional, List, Union
@@ -156,46 +161,45 @@ async def check_user_status(request: Request, current_user: dict = Depends(get_c
         
 @router.get("/designs")
 async def get_user_designs(
-    page_posted: int = 1,
-    page_purchased: int = 1,
+    posted_cursor: Optional[str] = None,
+    purchased_cursor: Optional[str] = None,
     limit: int = 20,
     current_user: dict = Depends(get_current_user),
     dynamodb = Depends(dynamodb_service._get_dynamodb_client)
 ):
-    """Get both posted and purchased designs for a user"""
+    """Get both posted and purchased designs for a user, one cursor per list"""
+    check_limit(limit)
+    posted_context = {'list': 'posted_designs', 'owner': current_user['email']}
+    purchased_context = {'list': 'entitlements', 'owner': current_user['email']}
+    posted_start = parse_cursor(posted_cursor, posted_context)
+    purchased_start = parse_cursor(purchased_cursor, purchased_context)
     try:
-        # Get posted designs using DesignSellerGSI
-        posted_response = dynamodb.query(
-            TableName=DESIGN_TABLE, 
-            IndexName='DesignSellerGSI',
-            KeyConditionExpression='seller_email = :email',
-            ExpressionAttributeValues={
-                ':email': {'S': current_user['email']}
-            },
-            Limit=limit,
-            ScanIndexForward=False  # Latest first
-        )
-
-        # Get purchased designs using transaction table
-        purchased_response = dynamodb.query(
-            TableName=TRANSACTION_TABLE,
-            IndexName='buyer_email-created_at-index',
-            KeyConditionExpression='buyer_email = :email',
-            ExpressionAttributeValues={
-                ':email': {'S': current_user['email']},
-                ':status': {'S': 'COMPLETED'}
-            },
-            FilterExpression='#status = :status',
-            ExpressionAttributeNames={
-                '#status': 'status'
-            },
-            Limit=limit,
-            ScanIndexForward=False
+        # Posted designs (DesignSellerGSI) and purchases (entitlement table) are read concurrently
+        (posted_items, posted_last_key), (purchased_designs, purchased_last_key) = await asyncio.gather(
+            async_dynamodb.query_page(
+                DESIGN_TABLE,
+                index_name='DesignSellerGSI',
+                key_condition_expression='seller_email = :email',
+                expression_attribute_values={
+                    ':email': {'S': current_user['email']}
+                },
+                scan_index_forward=False,  # Latest first
+                limit=limit,
+                exclusive_start_key=posted_start,
+                client=dynamodb
+            ),
+            # One entitlement per purchased design, so there is nothing to filter or de-duplicate
+            entitlements.purchased_page(
+                current_user['email'],
+                limit=limit,
+                exclusive_start_key=purchased_start,
+                client=dynamodb
+            )
         )
 
         # Process posted designs
         posted_designs = []
-        for item in posted_response.get('Items', []):
+        for item in posted_items:
             try:
                 metadata = json.loads(item.get('metadata', {}).get('S', '{}'))
                 file_type = metadata.get('fileType', '').upper()
@@ -220,32 +224,16 @@ async def get_user_designs(
                 'bundle_discount': item.get('bundle_discount', {}).get('N', '0')
             })
 
-        # Process purchased designs (extract unique designs from transactions)
-        purchased_designs = []
-        seen_designs = set()
-        for transaction in purchased_response.get('Items', []):
-            for design in transaction['designs']['L']:
-                design_id = design['M']['design_id']['S']
-                if design_id not in seen_designs:
-                    seen_designs.add(design_id)
-                    purchased_designs.append({
-                        'id': design_id,
-                        'title': design['M']['title']['S'],
-                        'thumbnail_url': design['M']['thumbnail_url']['S'],
-                        'price': float(design['M']['price']['N']),
-                        'purchased_at': transaction['created_at']['S'],
-                        'is_color_matching': design['M']['is_color_matching']['BOOL']  ,
-                        'color_matching_design_id': design['M']['color_matching_design_id']['S']
-                    })
-
         return {
             "posted": {
                 "designs": posted_designs,
-                "has_more": 'LastEvaluatedKey' in posted_response
+                "next_cursor": encode_cursor(posted_last_key, posted_context),
+                "has_more": posted_last_key is not None
             },
             "purchased": {
                 "designs": purchased_designs,
-                "has_more": 'LastEvaluatedKey' in purchased_response
+                "next_cursor": encode_cursor(purchased_last_key, purchased_context),
+                "has_more": purchased_last_key is not None
             }
         }
 
@@ -298,22 +286,30 @@ async def get_user_designs(current_user: dict = Depends(get_current_user)):
     #     raise HTTPException(status_code=500, detail="Failed to fetch designs")
 
 @router.get("/payment-history")
-async def get_payment_history(current_user: dict = Depends(get_current_user), dynamodb = Depends(dynamodb_service._get_dynamodb_client)):
-    """Get payment history for a user"""
+async def get_payment_history(
+    limit: int = 20,
+    cursor: Optional[str] = None,
+    current_user: dict = Depends(get_current_user),
+    dynamodb = Depends(dynamodb_service._get_dynamodb_client)
+):
+    """Get one page of payment history for a user"""
     try:
         email = current_user.get('email')
         if not email:
             raise HTTPException(status_code=400, detail="Email not found in token")
+        check_limit(limit)
+        context = {'list': 'payment_history', 'owner': email}
+        start_key = parse_cursor(cursor, context)
 
         # Query PaymentHistory using both partition key and sort key
-        response = dynamodb.query(
-            TableName=PAYMENT_HISTORY_TABLE,
-            KeyConditionExpression='seller_email = :email',
-            ExpressionAttributeValues={
+        payment_items, last_key = await async_dynamodb.query_page(
+            PAYMENT_HISTORY_TABLE,
+            key_condition_expression='seller_email = :email',
+            expression_attribute_values={
                 ':email': {'S': email}
             },
-            ProjectionExpression="#pid, #pdate, #amount, #credits, #designs, #tid, #notes",
-            ExpressionAttributeNames={
+            projection_expression="#pid, #pdate, #amount, #credits, #designs, #tid, #notes",
+            expression_attribute_names={
                 "#pid": "payment_id",
                 "#pdate": "payment_date",
                 "#amount": "total_amount",
@@ -321,43 +317,51 @@ async def get_payment_history(current_user: dict = Depends(get_current_user), dy
                 "#designs": "paid_designs",
                 "#tid": "transaction_id",
                 "#notes": "notes"
-            }
+            },
+            limit=limit,
+            exclusive_start_key=start_key,
+            client=dynamodb
         )
+        next_cursor = encode_cursor(last_key, context)
 
-        if not response['Items']:
+        if not payment_items:
             return {
                 "payments": [],
-                "total_count": 0
+                "total_count": 0,
+                "next_cursor": next_cursor
             }
 
         # Transform DynamoDB items into a more usable format
         payments = []
-        for item in response['Items']:
+        for item in PAYMENT_HISTORY.decode_many(payment_items):
             payment = {
-                'payment_id': item.get('payment_id', {}).get('S'),
-                'payment_date': item.get('payment_date', {}).get('S'),
-                'total_amount': float(item.get('total_amount', {}).get('N', '0')),
-                'total_credits': int(item.get('total_credits', {}).get('N', '0')),
-                'transaction_id': item.get('transaction_id', {}).get('S', ''),
-                'notes': item.get('notes', {}).get('S', ''),
+                'payment_id': item['payment_id'],
+                'payment_date': item['payment_date'],
+                'total_amount': item['total_amount'],
+                'total_credits': item['total_credits'],
+                'transaction_id': item['transaction_id'],
+                'notes': item['notes'],
                 'paid_designs': [
                     {
-                        'title': design.get('M', {}).get('title', {}).get('S'),
-                        'sales_count': int(design.get('M', {}).get('sales_count', {}).get('N', '0')),
-                        'price': float(design.get('M', {}).get('price', {}).get('N', '0')),
-                        'image_url': design.get('M', {}).get('image_url', {}).get('S'),
-                        'payment_method': design.get('M', {}).get('payment_method', {}).get('S')
+                        'title': design['title'],
+                        'sales_count': design['sales_count'],
+                        'price': design['price'],
+                        'image_url': design['image_url'],
+                        'payment_method': design['payment_method']
                     }
-                    for design in item.get('paid_designs', {}).get('L', [])
+                    for design in item['paid_designs']
                 ]
             }
             payments.append(payment)
 
         return {
             "payments": payments,
-            "total_count": len(payments)
+            "total_count": len(payments),
+            "next_cursor": next_cursor
         }
 
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Error fetching payment history: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
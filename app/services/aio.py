@@ -0,0 +1,32 @@
+import asyncio
+import functools
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+# Blocking boto3 calls run here instead of on the event loop. The pool size is the cap on
+# concurrent AWS calls per process; keep it at or below AWS_MAX_POOL_CONNECTIONS so calls
+# never wait on an HTTP connection.
+_executor = None
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=int(os.getenv('AWS_ASYNC_MAX_CONCURRENCY', '16')),
+            thread_name_prefix='aws-io'
+        )
+    return _executor
+
+async def run_blocking(func, *args, **kwargs):
+    """Run a blocking call on the bounded AWS executor and await its result"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_get_executor(), functools.partial(func, *args, **kwargs))
+
+async def iterate_blocking(iterator):
+    """Drive a blocking iterator (e.g. iter_scan) from async code, one step per executor call"""
+    sentinel = object()
+    while True:
+        value = await run_blocking(next, iterator, sentinel)
+        if value is sentinel:
+            return
+        yield value
@@ -0,0 +1,63 @@
+# Awaitable mirror of app.services.dynamodb for async routes.
+# Each call runs the synchronous helper on the bounded executor in app.services.aio, so
+# independent reads can be awaited together with asyncio.gather without blocking the event loop.
+from typing import Optional
+from app.services import dynamodb as dynamodb_service
+from app.services.aio import run_blocking, iterate_blocking
+
+async def put_item(table_name: str, item: dict):
+    return await run_blocking(dynamodb_service.put_item, table_name, item)
+
+async def get_item(table_name: str, key: dict):
+    return await run_blocking(dynamodb_service.get_item, table_name, key)
+
+async def get_item_subset(table_name: str, key: dict, projection_expression: str, expression_attribute_names: dict):
+    return await run_blocking(dynamodb_service.get_item_subset, table_name, key, projection_expression, expression_attribute_names)
+
+async def batch_get_items(table_name: str, keys: list, **kwargs) -> list:
+    return await run_blocking(dynamodb_service.batch_get_items, table_name, keys, **kwargs)
+
+async def update_item(table_name: str, key: dict, update_expression: str, expression_attribute_names: dict, expression_attribute_values: dict):
+    return await run_blocking(dynamodb_service.update_item, table_name, key, update_expression, expression_attribute_names, expression_attribute_values)
+
+async def delete_item(table_name: str, key: dict, condition_expression: str = None):
+    return await run_blocking(dynamodb_service.delete_item, table_name, key, condition_expression)
+
+async def scan_table(table_name: str):
+    return await run_blocking(dynamodb_service.scan_table, table_name)
+
+async def scan(table_name: str, projection_expression: str, filter_expression: str = ""):
+    return await run_blocking(dynamodb_service.scan, table_name, projection_expression, filter_expression)
+
+async def query_table(table_name: str, index_name: str = None, key_condition_expression: str = None, expression_attribute_values: dict = None):
+    return await run_blocking(dynamodb_service.query_table, table_name, index_name, key_condition_expression, expression_attribute_values)
+
+async def query(table_name: str, key_condition_expression: str, expression_attribute_names: dict, expression_attribute_values: dict, scan_index_forward: bool = False, filter_expression: str = "", index_name: Optional[str] = None):
+    return await run_blocking(dynamodb_service.query, table_name, key_condition_expression, expression_attribute_names, expression_attribute_values, scan_index_forward, filter_expression, index_name)
+
+async def parallel_scan(table_name: str, **kwargs) -> list:
+    return await run_blocking(dynamodb_service.parallel_scan, table_name, **kwargs)
+
+async def scan_all(table_name: str, **kwargs) -> list:
+    """Every item of iter_scan(**kwargs), read off the event loop"""
+    return await run_blocking(lambda: list(dynamodb_service.iter_scan(table_name, **kwargs)))
+
+async def query_all(table_name: str, **kwargs) -> list:
+    """Every item of iter_query(**kwargs), read off the event loop"""
+    return await run_blocking(lambda: list(dynamodb_service.iter_query(table_name, **kwargs)))
+
+async def query_page(table_name: str, **kwargs):
+    """(items, last_evaluated_key) for one page of a query, read off the event loop"""
+    return await run_blocking(dynamodb_service.query_page, table_name, **kwargs)
+
+async def scan_page(table_name: str, **kwargs):
+    """(items, last_evaluated_key) for one page of a scan, read off the event loop"""
+    return await run_blocking(dynamodb_service.scan_page, table_name, **kwargs)
+
+def iter_scan(table_name: str, **kwargs):
+    """Async generator over iter_scan; use pages=True to keep executor hops per page"""
+    return iterate_blocking(dynamodb_service.iter_scan(table_name, **kwargs))
+
+def iter_query(table_name: str, **kwargs):
+    """Async generator over iter_query; use pages=True to keep executor hops per page"""
+    return iterate_blocking(dynamodb_service.iter_query(table_name, **kwargs))
@@ -1,4 +1,3 @@
-import boto3
 from botocore.exceptions import ClientError
 import os
 from dotenv import load_dotenv
@@ -11,6 +10,9 @@ import base64
 import json
 import asyncio
 from app.services import dynamodb as dynamodb_service
+from app.services.aws_clients import get_cognito_client
+from app.services.aio import run_blocking
+from app.utils.user import invalidate_username
 from app.utils.cognito_utils import (check_existing_user, get_cognito_username, format_phone_number, decode_token, 
 get_secret_hash, USER_POOL_ID, CLIENT_ID, CLIENT_SECRET, google_initiate_auth)
 from fastapi import HTTPException, Depends
@@ -19,11 +21,7 @@ import names
 from datetime import datetime
 load_dotenv()
 
-cognito = boto3.client('cognito-idp',
-    region_name=os.getenv('AWS_REGION')
-    # aws_access_key_id=os.getenv('AWS_ACCESS_KEY_ID'),
-    # aws_secret_access_key=os.getenv('AWS_SECRET_ACCESS_KEY')
-)
+cognito = get_cognito_client()
 
 USERS_TABLE = os.getenv('DYNAMODB_USER_TABLE')
 
@@ -628,6 +626,7 @@ async def complete_google_signup(email: str, phone_number: str, google_tokens: d
         }
         try:
             dynamodb_service.put_item(table_name=USERS_TABLE, item=user_item)
+            invalidate_username(email)
            
             # Update phone number
             cognito.admin_update_user_attributes(
@@ -738,7 +737,8 @@ async def verify_designer_status(
     dynamodb = Depends(dynamodb_service._get_dynamodb_client)
 ) -> bool:
     try:
-        response = dynamodb.get_item(
+        response = await run_blocking(
+            dynamodb.get_item,
             TableName=USERS_TABLE,
             Key={
                 'email': {'S': current_user['email']}
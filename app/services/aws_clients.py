@@ -0,0 +1,93 @@
+import os
+import threading
+import boto3
+from botocore.config import Config
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# One registry per process. In Lambda the module survives between warm
+# invocations, so every request after the cold start reuses the same clients
+# and the same urllib3 connection pools.
+_session = None
+_clients = {}
+_lock = threading.Lock()
+
+def _client_config() -> Config:
+    """Shared botocore config tuned for a small API container"""
+    return Config(
+        max_pool_connections=int(os.getenv('AWS_MAX_POOL_CONNECTIONS', '32')),
+        connect_timeout=float(os.getenv('AWS_CONNECT_TIMEOUT', '2')),
+        read_timeout=float(os.getenv('AWS_READ_TIMEOUT', '10')),
+        tcp_keepalive=True,
+        retries={
+            'mode': 'adaptive',
+            'max_attempts': int(os.getenv('AWS_MAX_ATTEMPTS', '5'))
+        }
+    )
+
+def _get_session():
+    global _session
+    if _session is None:
+        _session = boto3.session.Session()
+    return _session
+
+def get_client(service_name: str, region_name: str = None, endpoint_url: str = None,
+               aws_access_key_id: str = None, aws_secret_access_key: str = None, config: Config = None):
+    """Return a process-wide client, creating it on first use"""
+    cache_key = (service_name, region_name, endpoint_url, aws_access_key_id, aws_secret_access_key)
+    client = _clients.get(cache_key)
+    if client is not None:
+        return client
+
+    with _lock:
+        client = _clients.get(cache_key)
+        if client is None:
+            client_config = _client_config()
+            if config is not None:
+                client_config = client_config.merge(config)
+            client = _get_session().client(
+                service_name,
+                region_name=region_name,
+                endpoint_url=endpoint_url,
+                aws_access_key_id=aws_access_key_id,
+                aws_secret_access_key=aws_secret_access_key,
+                config=client_config
+            )
+            _clients[cache_key] = client
+        return client
+
+def get_dynamodb_client():
+    return get_client(
+        'dynamodb',
+        region_name=os.getenv('AWS_DYNAMO_REGION', 'ap-south-1'),
+        endpoint_url=os.getenv('AWS_DYNAMO_ENDPOINT_URL'),
+        aws_access_key_id=os.getenv('AWS_DYNAMO_ACCESS_KEY_ID'),
+        aws_secret_access_key=os.getenv('AWS_DYNAMO_SECRET_ACCESS_KEY')
+    )
+
+def get_s3_client():
+    # SigV4 everywhere: botocore still presigns SigV2 URLs in us-east-1 unless told otherwise
+    return get_client('s3', region_name=os.getenv('AWS_REGION'), config=Config(signature_version='s3v4'))
+
+def get_credentials():
+    """Credentials of the shared session; get_frozen_credentials() refreshes them before they expire"""
+    return _get_session().get_credentials()
+
+def get_lambda_client():
+    # Search invocations run embedding models, so they get a longer read timeout
+    return get_client(
+        'lambda',
+        region_name=os.getenv('AWS_REGION'),
+        config=Config(read_timeout=float(os.getenv('AWS_LAMBDA_READ_TIMEOUT', '60')))
+    )
+
+def get_cognito_client():
+    return get_client('cognito-idp', region_name=os.getenv('AWS_REGION'))
+
+def reset_clients():
+    """Drop every cached client (used by tests that swap credentials or endpoints)"""
+    global _session
+    with _lock:
+        _clients.clear()
+        _session = None
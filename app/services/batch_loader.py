@@ -0,0 +1,94 @@
+import asyncio
+import json
+from typing import Dict, List, Optional, Tuple
+from fastapi import Depends
+from app.services import dynamodb as dynamodb_service
+from app.services.aio import run_blocking
+
+
+def _key_id(key: dict) -> Tuple:
+    """Hashable identity for a DynamoDB key map"""
+    return tuple(sorted((name, json.dumps(value, sort_keys=True)) for name, value in key.items()))
+
+
+class BatchLoader:
+    """
+    Request-scoped DataLoader for DynamoDB items.
+    Every load() issued in the same event loop tick is queued per table, de-duplicated and
+    fetched with one BatchGetItem dispatch. Results are memoized for the rest of the request.
+    """
+
+    def __init__(self, client=None):
+        self.client = client
+        self._results: Dict[Tuple, asyncio.Future] = {}
+        self._queue: Dict[Tuple, Dict[Tuple, Tuple[dict, asyncio.Future]]] = {}
+        self._scheduled = False
+        # The event loop keeps only weak references to tasks; a collected fetch would strand its waiters
+        self._fetches = set()
+
+    def load(self, table_name: str, key: dict, attributes: Optional[Tuple[str, ...]] = None) -> asyncio.Future:
+        """Future resolving to the item (or None). `attributes` limits the fetched attributes."""
+        group = (table_name, tuple(attributes) if attributes else None)
+        cache_key = (group, _key_id(key))
+        future = self._results.get(cache_key)
+        if future is not None:
+            return future
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._results[cache_key] = future
+        self._queue.setdefault(group, {})[cache_key[1]] = (key, future)
+        if not self._scheduled:
+            self._scheduled = True
+            loop.call_soon(self._dispatch)
+        return future
+
+    async def load_many(self, table_name: str, keys: List[dict], attributes: Optional[Tuple[str, ...]] = None) -> List[Optional[dict]]:
+        """Items for `keys` in the same order, None where the item does not exist"""
+        return list(await asyncio.gather(*(self.load(table_name, key, attributes) for key in keys)))
+
+    def _dispatch(self):
+        queue, self._queue = self._queue, {}
+        self._scheduled = False
+        # Tables are fetched concurrently, off the event loop
+        for (table_name, attributes), requests in queue.items():
+            task = asyncio.ensure_future(self._fetch(table_name, attributes, requests))
+            self._fetches.add(task)
+            task.add_done_callback(self._fetches.discard)
+
+    async def _fetch(self, table_name: str, attributes: Optional[Tuple[str, ...]], requests: Dict[Tuple, Tuple[dict, asyncio.Future]]):
+        keys = [key for key, _ in requests.values()]
+        key_names = tuple(keys[0].keys())
+
+        projection_expression = None
+        expression_attribute_names = None
+        if attributes:
+            # Key attributes are always fetched so results can be matched back to their futures
+            names = list(dict.fromkeys(key_names + attributes))
+            expression_attribute_names = {f'#a{i}': name for i, name in enumerate(names)}
+            projection_expression = ', '.join(expression_attribute_names)
+
+        try:
+            items = await run_blocking(
+                dynamodb_service.batch_get_items,
+                table_name,
+                keys,
+                projection_expression=projection_expression,
+                expression_attribute_names=expression_attribute_names,
+                client=self.client
+            )
+        except Exception as e:
+            for _, future in requests.values():
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        found = {_key_id({name: item[name] for name in key_names}): item for item in items}
+        for key_id, (_, future) in requests.items():
+            if not future.done():
+                future.set_result(found.get(key_id))
+
+
+def get_batch_loader(dynamodb = Depends(dynamodb_service._get_dynamodb_client)) -> BatchLoader:
+    """FastAPI dependency: one loader per request"""
+    return BatchLoader(client=dynamodb)
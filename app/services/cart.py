@@ -1,10 +1,10 @@
-import boto3
 import os
+from app.services.aws_clients import get_dynamodb_client
 from typing import List, Dict, Any
 
 class CartService:
     def __init__(self):
-        self.dynamodb = boto3.client('dynamodb', os.getenv('AWS_REGION'))
+        self.dynamodb = get_dynamodb_client()
         self.table_name = os.getenv('DYNAMODB_USER_TABLE')
 
     async def get_cart(self, user_email: str) -> List[Dict[str, Any]]:
@@ -1,3 +1,4 @@
+from decimal import Decimal
 from enum import Enum
 
 class UserBadge(Enum):
@@ -11,13 +12,17 @@ class CommunityService:
     def __init__(self, dynamodb_client):
         self.dynamodb = dynamodb_client
 
-    def calculate_user_score(self, verified_designs: int, total_sold: int, total_credits: int) -> int:
+    def weighted_score(self, verified_designs, total_sold, total_credits) -> Decimal:
+        """Untruncated score; linear, so the leaderboard can maintain it with atomic ADDs of deltas"""
         # Equal weightage to all three factors
-        design_score = verified_designs * 0.1  # Base points for uploads
-        sales_score = total_sold * 0.15        # Base points for sales
-        credit_score = total_credits * 0.2     # Credits as is
+        design_score = Decimal(verified_designs) * Decimal('0.1')  # Base points for uploads
+        sales_score = Decimal(total_sold) * Decimal('0.15')        # Base points for sales
+        credit_score = Decimal(total_credits) * Decimal('0.2')     # Credits as is
         
-        return int(design_score + sales_score + credit_score)
+        return design_score + sales_score + credit_score
+
+    def calculate_user_score(self, verified_designs: int, total_sold: int, total_credits: int) -> int:
+        return int(self.weighted_score(verified_designs, total_sold, total_credits))
 
     def get_user_badge(self, verified_designs: int) -> dict:
         badge = None
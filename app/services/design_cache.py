@@ -0,0 +1,87 @@
+import os
+from typing import Dict, Iterable, List, Optional
+from app.services import dynamodb as dynamodb_service
+from app.services.aio import run_blocking
+from app.services.batch_loader import BatchLoader
+from app.utils.cache import TTLCache
+
+DESIGN_TABLE = os.getenv('DYNAMODB_DESIGN_TABLE')
+
+# Process-wide read-through cache of raw design items keyed by design_id.
+# Size it per Lambda memory tier with DESIGN_CACHE_MAX_ENTRIES / DESIGN_CACHE_MAX_BYTES;
+# DESIGN_CACHE_TTL_SECONDS bounds staleness for writes made by other processes.
+design_cache = TTLCache(
+    max_entries=int(os.getenv('DESIGN_CACHE_MAX_ENTRIES', '2048')),
+    max_bytes=int(os.getenv('DESIGN_CACHE_MAX_BYTES', str(16 * 1024 * 1024))),
+    ttl=float(os.getenv('DESIGN_CACHE_TTL_SECONDS', '60'))
+)
+
+
+def _fetch_design(design_id: str, client=None) -> Optional[dict]:
+    client = client or dynamodb_service._get_dynamodb_client()
+    item = client.get_item(
+        TableName=DESIGN_TABLE,
+        Key={'design_id': {'S': design_id}}
+    ).get('Item')
+    if item is not None:
+        design_cache.set(design_id, item)
+    return item
+
+
+def get_design(design_id: str, client=None) -> Optional[dict]:
+    """Design item by id, from the cache or DESIGN_TABLE. Returned items must not be mutated."""
+    item = design_cache.get(design_id)
+    if item is None:
+        item = _fetch_design(design_id, client)
+    return item
+
+
+async def load_design(design_id: str, loader: BatchLoader) -> Optional[dict]:
+    """Async get_design; misses are batched with other loads through the request's loader"""
+    item = design_cache.get(design_id)
+    if item is None:
+        item = await loader.load(DESIGN_TABLE, {'design_id': {'S': design_id}})
+        if item is not None:
+            design_cache.set(design_id, item)
+    return item
+
+
+async def load_designs(design_ids: Iterable[str], loader: BatchLoader) -> List[Optional[dict]]:
+    """Design items in the order of `design_ids` (None where missing); misses share one BatchGetItem"""
+    design_ids = list(design_ids)
+    found: Dict[str, dict] = {}
+    missing = []
+    for design_id in dict.fromkeys(design_ids):
+        item = design_cache.get(design_id)
+        if item is None:
+            missing.append(design_id)
+        else:
+            found[design_id] = item
+
+    if missing:
+        items = await loader.load_many(DESIGN_TABLE, [{'design_id': {'S': design_id}} for design_id in missing])
+        for design_id, item in zip(missing, items):
+            if item is not None:
+                design_cache.set(design_id, item)
+                found[design_id] = item
+
+    return [found.get(design_id) for design_id in design_ids]
+
+
+async def get_design_async(design_id: str, client=None) -> Optional[dict]:
+    """get_design off the event loop, for routes without a batch loader"""
+    item = design_cache.get(design_id)
+    if item is None:
+        item = await run_blocking(_fetch_design, design_id, client)
+    return item
+
+
+def invalidate(*design_ids: str):
+    """Drop designs from the cache after they are written"""
+    for design_id in design_ids:
+        if design_id:
+            design_cache.delete(design_id)
+
+
+def cache_stats() -> dict:
+    return design_cache.stats()
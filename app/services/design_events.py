@@ -0,0 +1,39 @@
+from typing import Iterable
+from app.services import design_cache
+from app.services import home_feed
+from app.services import sales_dashboard
+from app.services import search_index
+from app.services import seller_stats
+
+# Single place for what has to happen after a design write, so routes do not need to
+# know about every cache and read model that holds a copy of design data.
+
+
+async def design_changed(design_ids: Iterable[str], categories: Iterable[str], client=None):
+    """Designs were approved, rejected or edited: drop cached copies and refresh the feed and search index"""
+    design_ids = list(design_ids)
+    design_cache.invalidate(*design_ids)
+    try:
+        await search_index.refresh_designs(design_ids, client)
+    except Exception as e:
+        # The periodic rebuild picks the change up
+        print(f"Error updating search index: {str(e)}")
+    try:
+        await home_feed.refresh_categories(categories, client, design_ids)
+    except Exception as e:
+        # The write itself succeeded; the feed converges on the next change or rebuild
+        print(f"Error refreshing home feed: {str(e)}")
+
+
+
+async def verification_changed(design: dict, was_verified: bool, is_verified: bool, client=None):
+    """A design was approved or rejected; `design` is the item as read before the write"""
+    try:
+        await seller_stats.design_verification_changed(design, was_verified, is_verified, client)
+    except Exception as e:
+        # The write itself succeeded; leaderboard aggregates are corrected by the next rebuild
+        print(f"Error updating leaderboard: {str(e)}")
+    try:
+        await sales_dashboard.refresh_designs(design['seller_email']['S'], [design['design_id']['S']], client)
+    except Exception as e:
+        print(f"Error refreshing sales dashboard: {str(e)}")
@@ -1,19 +1,18 @@
 from typing import Optional
-import boto3
 from botocore.exceptions import ClientError
-import os
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
+import os
+import queue
+import threading
+import time
+from app.services.aws_clients import get_dynamodb_client
 
 load_dotenv()
 
 def _get_dynamodb_client():
-    return boto3.client(
-        'dynamodb',
-        endpoint_url=os.getenv('AWS_DYNAMO_ENDPOINT_URL'),
-        region_name=os.getenv('AWS_DYNAMO_REGION', 'ap-south-1'),
-        aws_access_key_id=os.getenv('AWS_DYNAMO_ACCESS_KEY_ID'),
-        aws_secret_access_key=os.getenv('AWS_DYNAMO_SECRET_ACCESS_KEY')
-    )
+    # Kept as a FastAPI dependency; returns the pooled process-wide client
+    return get_dynamodb_client()
 
 def put_item(table_name: str, item: dict):
     try:
@@ -54,6 +53,41 @@ def get_item_subset(table_name: str, key: dict, projection_expression:str, expre
         print(f"Error getting item from DynamoDB: {str(e)}")
         raise e
 
+def batch_get_items(table_name: str, keys: list, projection_expression: Optional[str] = None,
+                    expression_attribute_names: Optional[dict] = None, max_attempts: int = 5, client=None,
+                    consistent_read: bool = False) -> list:
+    """
+    Fetch many items with BatchGetItem, 100 keys per call.
+    UnprocessedKeys are retried with exponential backoff. Missing items are simply absent from the result.
+    """
+    client = client or _get_dynamodb_client()
+    request = {'Keys': []}
+    if projection_expression:
+        request['ProjectionExpression'] = projection_expression
+    if expression_attribute_names:
+        request['ExpressionAttributeNames'] = expression_attribute_names
+    if consistent_read:
+        request['ConsistentRead'] = True
+
+    items = []
+    try:
+        for start in range(0, len(keys), 100):
+            pending = {table_name: dict(request, Keys=keys[start:start + 100])}
+            attempt = 0
+            while pending:
+                response = client.batch_get_item(RequestItems=pending)
+                items.extend(response.get('Responses', {}).get(table_name, []))
+                pending = response.get('UnprocessedKeys') or {}
+                if pending:
+                    attempt += 1
+                    if attempt >= max_attempts:
+                        raise Exception(f"BatchGetItem left {len(pending[table_name]['Keys'])} keys unprocessed in {table_name}")
+                    time.sleep(min(0.05 * (2 ** attempt), 1))
+        return items
+    except ClientError as e:
+        print(f"Error batch getting items from DynamoDB: {str(e)}")
+        raise e
+
 def update_item(table_name: str, key: dict, update_expression: str, expression_attribute_names: dict, expression_attribute_values: dict):
     try:
         client = _get_dynamodb_client()
@@ -71,92 +105,299 @@ def update_item(table_name: str, key: dict, update_expression: str, expression_a
         print(f"Error updating item in DynamoDB: {str(e)}")
         raise e
 
-def scan_table(table_name: str):
+def _build_params(table_name: str, index_name: Optional[str] = None, key_condition_expression: Optional[str] = None,
+                  filter_expression: Optional[str] = None, projection_expression: Optional[str] = None,
+                  expression_attribute_names: Optional[dict] = None, expression_attribute_values: Optional[dict] = None,
+                  limit: Optional[int] = None, exclusive_start_key: Optional[dict] = None, **extra) -> dict:
+    """Build scan/query kwargs, leaving out anything DynamoDB would reject as empty"""
+    params = {'TableName': table_name}
+    if index_name:
+        params['IndexName'] = index_name
+    if key_condition_expression:
+        params['KeyConditionExpression'] = key_condition_expression
+    if filter_expression:
+        params['FilterExpression'] = filter_expression
+    if projection_expression:
+        params['ProjectionExpression'] = projection_expression
+    if expression_attribute_names:
+        params['ExpressionAttributeNames'] = expression_attribute_names
+    if expression_attribute_values:
+        params['ExpressionAttributeValues'] = expression_attribute_values
+    if limit:
+        params['Limit'] = limit
+    if exclusive_start_key:
+        params['ExclusiveStartKey'] = exclusive_start_key
+    params.update(extra)
+    return params
+
+def _paginate(operation, params: dict, max_items: Optional[int] = None, pages: bool = False):
+    """Follow LastEvaluatedKey lazily, yielding items (or whole pages)"""
+    remaining = max_items
+    while True:
+        response = operation(**params)
+        items = response.get('Items', [])
+        if remaining is not None:
+            items = items[:remaining]
+            remaining -= len(items)
+
+        if pages:
+            if items:
+                yield items
+        else:
+            yield from items
+
+        last_key = response.get('LastEvaluatedKey')
+        if not last_key or remaining == 0:
+            return
+        params['ExclusiveStartKey'] = last_key
+
+def iter_scan(table_name: str, filter_expression: Optional[str] = None, projection_expression: Optional[str] = None,
+              expression_attribute_names: Optional[dict] = None, expression_attribute_values: Optional[dict] = None,
+              index_name: Optional[str] = None, limit: Optional[int] = None, max_items: Optional[int] = None,
+              pages: bool = False, exclusive_start_key: Optional[dict] = None, client=None, **extra):
+    """
+    Scan a table page by page.
+    `limit` is the DynamoDB page size, `max_items` stops reading once that many items were yielded.
+    Breaking out of the loop stops reading too, so callers only pay for the pages they consume.
+    """
+    client = client or _get_dynamodb_client()
+    params = _build_params(
+        table_name,
+        index_name=index_name,
+        filter_expression=filter_expression,
+        projection_expression=projection_expression,
+        expression_attribute_names=expression_attribute_names,
+        expression_attribute_values=expression_attribute_values,
+        limit=limit,
+        exclusive_start_key=exclusive_start_key,
+        **extra
+    )
     try:
-        client = _get_dynamodb_client()
-        response = client.scan(TableName=table_name)
-        return response.get('Items', [])
+        yield from _paginate(client.scan, params, max_items=max_items, pages=pages)
     except ClientError as e:
         print(f"Error scanning table in DynamoDB: {str(e)}")
         raise e
 
-def query_table(table_name: str, index_name: str = None, key_condition_expression: str = None, expression_attribute_values: dict = None):
+def iter_query(table_name: str, key_condition_expression: str, expression_attribute_values: dict,
+               expression_attribute_names: Optional[dict] = None, filter_expression: Optional[str] = None,
+               projection_expression: Optional[str] = None, index_name: Optional[str] = None,
+               scan_index_forward: bool = True, limit: Optional[int] = None, max_items: Optional[int] = None,
+               pages: bool = False, exclusive_start_key: Optional[dict] = None, client=None, **extra):
+    """Query a partition page by page. Same paging arguments as iter_scan."""
+    client = client or _get_dynamodb_client()
+    params = _build_params(
+        table_name,
+        index_name=index_name,
+        key_condition_expression=key_condition_expression,
+        filter_expression=filter_expression,
+        projection_expression=projection_expression,
+        expression_attribute_names=expression_attribute_names,
+        expression_attribute_values=expression_attribute_values,
+        limit=limit,
+        exclusive_start_key=exclusive_start_key,
+        ScanIndexForward=scan_index_forward,
+        **extra
+    )
     try:
-        client = _get_dynamodb_client()
-        query_params = {
-            'TableName': table_name,
-            'KeyConditionExpression': key_condition_expression,
-            'ExpressionAttributeValues': expression_attribute_values
-        }
-        
-        if index_name:
-            query_params['IndexName'] = index_name
-            
-        response = client.query(**query_params)
-        return response.get('Items', [])
+        yield from _paginate(client.query, params, max_items=max_items, pages=pages)
     except ClientError as e:
-        print(f"Error querying table in DynamoDB: {str(e)}")
+        print(f"Error querying DynamoDB: {str(e)}")
         raise e
-    
-def query(table_name: str, key_condition_expression: str, expression_attribute_names: dict, expression_attribute_values: dict, scan_index_forward: bool = False, filter_expression: str = "", index_name: Optional[str] = None):
+
+def _read_page(operation, params: dict, limit: int, key_attributes: Optional[tuple], max_requests: int):
+    """
+    Collect up to `limit` items starting at params' ExclusiveStartKey.
+    With a FilterExpression a single request can return fewer than `limit` items, so further
+    requests are made (at most `max_requests`). When the page ends inside a response, the
+    resume key is built from the last returned item's `key_attributes`.
+    """
+    items = []
+    params = dict(params, Limit=limit)
+    for _ in range(max_requests):
+        response = operation(**params)
+        batch = response.get('Items', [])
+        last_key = response.get('LastEvaluatedKey')
+        needed = limit - len(items)
+        if len(batch) > needed:
+            if not key_attributes:
+                raise ValueError("key_attributes are required to resume inside a filtered page")
+            items.extend(batch[:needed])
+            return items, {name: items[-1][name] for name in key_attributes}
+        items.extend(batch)
+        if not last_key or len(items) == limit:
+            return items, last_key
+        params['ExclusiveStartKey'] = last_key
+    # Request budget spent: return a short page that still resumes where reading stopped
+    return items, last_key
+
+def query_page(table_name: str, key_condition_expression: str, expression_attribute_values: dict, limit: int,
+               exclusive_start_key: Optional[dict] = None, key_attributes: Optional[tuple] = None,
+               expression_attribute_names: Optional[dict] = None, filter_expression: Optional[str] = None,
+               projection_expression: Optional[str] = None, index_name: Optional[str] = None,
+               scan_index_forward: bool = True, max_requests: int = 5, client=None, **extra):
+    """
+    One page of a query: (items, last_evaluated_key). Costs at most `max_requests` bounded reads,
+    however deep the page. `key_attributes` are the table (and index) key names, needed with filters.
+    """
+    client = client or _get_dynamodb_client()
+    params = _build_params(
+        table_name,
+        index_name=index_name,
+        key_condition_expression=key_condition_expression,
+        filter_expression=filter_expression,
+        projection_expression=projection_expression,
+        expression_attribute_names=expression_attribute_names,
+        expression_attribute_values=expression_attribute_values,
+        exclusive_start_key=exclusive_start_key,
+        ScanIndexForward=scan_index_forward,
+        **extra
+    )
     try:
-        client = _get_dynamodb_client()
-        if index_name is not None:
-            if filter_expression == "":
-                response = client.query(
-                    TableName=table_name, 
-                    IndexName=index_name, 
-                    KeyConditionExpression=key_condition_expression, 
-                    ExpressionAttributeNames=expression_attribute_names, 
-                    ExpressionAttributeValues=expression_attribute_values,
-                    ScanIndexForward=scan_index_forward
-                )
-            else:
-                response = client.query(
-                    TableName=table_name, 
-                    IndexName=index_name, 
-                    KeyConditionExpression=key_condition_expression, 
-                    ExpressionAttributeNames=expression_attribute_names, 
-                    ExpressionAttributeValues=expression_attribute_values,
-                    FilterExpression=filter_expression,
-                    ScanIndexForward=scan_index_forward
-                )
-        else:
-            if filter_expression == "":
-                response = client.query(
-                    TableName=table_name, 
-                    KeyConditionExpression=key_condition_expression, 
-                    ExpressionAttributeNames=expression_attribute_names, 
-                    ExpressionAttributeValues=expression_attribute_values,
-                    ScanIndexForward=scan_index_forward
-                )
-            else:
-                response = client.query(
-                    TableName=table_name, 
-                    KeyConditionExpression=key_condition_expression, 
-                    ExpressionAttributeNames=expression_attribute_names, 
-                    ExpressionAttributeValues=expression_attribute_values,
-                    FilterExpression=filter_expression,
-                    ScanIndexForward=scan_index_forward
-                )
-        return response['Items']
+        return _read_page(client.query, params, limit, key_attributes, max_requests)
     except ClientError as e:
         print(f"Error querying DynamoDB: {str(e)}")
         raise e
 
-def scan(table_name: str, projection_expression: str, filter_expression: str = ""):
+def scan_page(table_name: str, limit: int, exclusive_start_key: Optional[dict] = None,
+              key_attributes: Optional[tuple] = None, filter_expression: Optional[str] = None,
+              projection_expression: Optional[str] = None, expression_attribute_names: Optional[dict] = None,
+              expression_attribute_values: Optional[dict] = None, index_name: Optional[str] = None,
+              max_requests: int = 5, client=None, **extra):
+    """One page of a scan: (items, last_evaluated_key). Same paging arguments as query_page."""
+    client = client or _get_dynamodb_client()
+    params = _build_params(
+        table_name,
+        index_name=index_name,
+        filter_expression=filter_expression,
+        projection_expression=projection_expression,
+        expression_attribute_names=expression_attribute_names,
+        expression_attribute_values=expression_attribute_values,
+        exclusive_start_key=exclusive_start_key,
+        **extra
+    )
     try:
-        client = _get_dynamodb_client()
-        response = client.scan(
-            TableName=table_name,
-            ProjectionExpression=projection_expression,
-            FilterExpression=filter_expression
-        )
-        return response.get('Items', [])
+        return _read_page(client.scan, params, limit, key_attributes, max_requests)
     except ClientError as e:
         print(f"Error scanning table in DynamoDB: {str(e)}")
         raise e
 
+def _scan_segment(client, params: dict, segment: int, total_segments: int, pages: queue.Queue,
+                  slots: threading.Semaphore, stop: threading.Event, stats: dict, stats_lock: threading.Lock):
+    """Worker for one parallel scan segment. Never holds more than `slots` unconsumed pages."""
+    params = dict(params, Segment=segment, TotalSegments=total_segments, ReturnConsumedCapacity='TOTAL')
+    try:
+        while not stop.is_set():
+            response = client.scan(**params)
+            with stats_lock:
+                stats['pages'] += 1
+                stats['scanned_count'] += response.get('ScannedCount', 0)
+                stats['count'] += response.get('Count', 0)
+                stats['consumed_capacity'] += response.get('ConsumedCapacity', {}).get('CapacityUnits', 0)
+
+            items = response.get('Items', [])
+            if items:
+                # Backpressure: wait for the consumer to drain this segment's earlier pages
+                while not slots.acquire(timeout=0.1):
+                    if stop.is_set():
+                        return
+                pages.put((segment, items, None))
+
+            last_key = response.get('LastEvaluatedKey')
+            if not last_key:
+                break
+            params['ExclusiveStartKey'] = last_key
+    except Exception as e:
+        pages.put((segment, None, e))
+    finally:
+        pages.put((segment, None, None))
+
+def iter_parallel_scan(table_name: str, filter_expression: Optional[str] = None, projection_expression: Optional[str] = None,
+                       expression_attribute_names: Optional[dict] = None, expression_attribute_values: Optional[dict] = None,
+                       index_name: Optional[str] = None, limit: Optional[int] = None, total_segments: Optional[int] = None,
+                       max_workers: Optional[int] = None, buffer_pages: int = 2, stats: Optional[dict] = None, client=None):
+    """
+    Scan a whole table with Segment/TotalSegments, streaming items as segments return pages.
+    Items arrive in no particular order. Each segment keeps at most `buffer_pages` pages
+    waiting for the consumer, and stopping iteration early cancels the remaining segments.
+    Pass a dict as `stats` to collect pages, counts, consumed capacity and elapsed time.
+    """
+    client = client or _get_dynamodb_client()
+    total_segments = total_segments or int(os.getenv('DYNAMODB_SCAN_SEGMENTS', '4'))
+    max_workers = max_workers or int(os.getenv('DYNAMODB_SCAN_WORKERS', str(total_segments)))
+    params = _build_params(
+        table_name,
+        index_name=index_name,
+        filter_expression=filter_expression,
+        projection_expression=projection_expression,
+        expression_attribute_names=expression_attribute_names,
+        expression_attribute_values=expression_attribute_values,
+        limit=limit
+    )
+
+    if stats is None:
+        stats = {}
+    stats.update({'segments': total_segments, 'pages': 0, 'scanned_count': 0, 'count': 0, 'consumed_capacity': 0.0})
+    stats_lock = threading.Lock()
+    started = time.monotonic()
+
+    pages = queue.Queue()
+    stop = threading.Event()
+    slots = [threading.Semaphore(buffer_pages) for _ in range(total_segments)]
+    executor = ThreadPoolExecutor(max_workers=min(max_workers, total_segments), thread_name_prefix='dynamodb-scan')
+    try:
+        for segment in range(total_segments):
+            executor.submit(_scan_segment, client, params, segment, total_segments,
+                            pages, slots[segment], stop, stats, stats_lock)
+
+        remaining = total_segments
+        while remaining:
+            segment, items, error = pages.get()
+            if error is not None:
+                print(f"Error scanning table in DynamoDB: {str(error)}")
+                raise error
+            if items is None:
+                remaining -= 1
+                continue
+            yield from items
+            slots[segment].release()
+    finally:
+        stop.set()
+        executor.shutdown(wait=False)
+        stats['elapsed'] = time.monotonic() - started
+
+def parallel_scan(table_name: str, **kwargs) -> list:
+    """Merged form of iter_parallel_scan for callers that need the full result"""
+    return list(iter_parallel_scan(table_name, **kwargs))
+
+def scan_table(table_name: str):
+    return list(iter_scan(table_name))
+
+def query_table(table_name: str, index_name: str = None, key_condition_expression: str = None, expression_attribute_values: dict = None):
+    return list(iter_query(
+        table_name,
+        key_condition_expression=key_condition_expression,
+        expression_attribute_values=expression_attribute_values,
+        index_name=index_name
+    ))
+
+def query(table_name: str, key_condition_expression: str, expression_attribute_names: dict, expression_attribute_values: dict, scan_index_forward: bool = False, filter_expression: str = "", index_name: Optional[str] = None):
+    return list(iter_query(
+        table_name,
+        key_condition_expression=key_condition_expression,
+        expression_attribute_names=expression_attribute_names,
+        expression_attribute_values=expression_attribute_values,
+        filter_expression=filter_expression,
+        index_name=index_name,
+        scan_index_forward=scan_index_forward
+    ))
+
+def scan(table_name: str, projection_expression: str, filter_expression: str = ""):
+    return list(iter_scan(
+        table_name,
+        projection_expression=projection_expression,
+        filter_expression=filter_expression
+    ))
+
 def delete_item(table_name: str, key: dict, condition_expression: str = None):
     try:
         client = _get_dynamodb_client()
@@ -0,0 +1,87 @@
+import os
+from typing import List, Optional, Tuple
+from app.services import dynamodb as dynamodb_service
+from app.services.aio import run_blocking
+
+ENTITLEMENT_TABLE = os.getenv('DYNAMODB_ENTITLEMENT_TABLE')
+
+# One item per (buyer_email, design_id) a buyer may download, written in the checkout
+# transaction. PurchasedAtLSI orders a buyer's entitlements by purchase time.
+PURCHASED_AT_INDEX = 'PurchasedAtLSI'
+
+
+def entitlement_action(buyer_email: str, design: dict, transaction_id: str, purchased_at: str) -> dict:
+    """
+    TransactWriteItems action granting `design` (a transaction designs-list map) to the buyer.
+    Buying a design again keeps the first purchase's time and transaction.
+    """
+    return {
+        'Update': {
+            'TableName': ENTITLEMENT_TABLE,
+            'Key': {
+                'buyer_email': {'S': buyer_email},
+                'design_id': design['design_id']
+            },
+            'UpdateExpression': (
+                'SET purchased_at = if_not_exists(purchased_at, :purchased_at), '
+                'transaction_id = if_not_exists(transaction_id, :transaction_id), '
+                'title = :title, thumbnail_url = :thumbnail_url, price = :price, '
+                'is_color_matching = :is_color_matching, color_matching_design_id = :color_matching_design_id'
+            ),
+            'ExpressionAttributeValues': {
+                ':purchased_at': {'S': purchased_at},
+                ':transaction_id': {'S': transaction_id},
+                ':title': design.get('title', {'S': ''}),
+                ':thumbnail_url': design.get('thumbnail_url', {'S': ''}),
+                ':price': design.get('price', {'N': '0'}),
+                ':is_color_matching': design.get('is_color_matching', {'BOOL': False}),
+                ':color_matching_design_id': design.get('color_matching_design_id', {'S': ''})
+            }
+        }
+    }
+
+
+def _has_entitlement(buyer_email: str, design_id: str, client=None) -> bool:
+    client = client or dynamodb_service._get_dynamodb_client()
+    response = client.get_item(
+        TableName=ENTITLEMENT_TABLE,
+        Key={
+            'buyer_email': {'S': buyer_email},
+            'design_id': {'S': design_id}
+        },
+        ProjectionExpression='design_id'
+    )
+    return 'Item' in response
+
+
+async def has_entitlement(buyer_email: str, design_id: str, client=None) -> bool:
+    """Whether the buyer has a completed purchase of the design (one keyed read)"""
+    return await run_blocking(_has_entitlement, buyer_email, design_id, client)
+
+
+async def purchased_page(buyer_email: str, limit: int, exclusive_start_key: Optional[dict] = None,
+                         client=None) -> Tuple[List[dict], Optional[dict]]:
+    """One page of the buyer's purchased designs, most recent purchase first"""
+    items, last_key = await run_blocking(
+        dynamodb_service.query_page,
+        ENTITLEMENT_TABLE,
+        index_name=PURCHASED_AT_INDEX,
+        key_condition_expression='buyer_email = :email',
+        expression_attribute_values={':email': {'S': buyer_email}},
+        scan_index_forward=False,
+        limit=limit,
+        exclusive_start_key=exclusive_start_key,
+        client=client
+    )
+    return [
+        {
+            'id': item['design_id']['S'],
+            'title': item['title']['S'],
+            'thumbnail_url': item['thumbnail_url']['S'],
+            'price': float(item['price']['N']),
+            'purchased_at': item['purchased_at']['S'],
+            'is_color_matching': item.get('is_color_matching', {}).get('BOOL', False),
+            'color_matching_design_id': item.get('color_matching_design_id', {}).get('S', '')
+        }
+        for item in items
+    ], last_key
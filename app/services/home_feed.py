@@ -0,0 +1,246 @@
+import hashlib
+import json
+import os
+import time
+import zlib
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+from botocore.exceptions import ClientError
+from app.services import async_dynamodb
+from app.services import dynamodb as dynamodb_service
+from app.services.aio import run_blocking
+from app.services.batch_loader import BatchLoader
+from app.utils.item_codec import DESIGN, Item
+from app.utils.user import get_usernames_from_emails
+
+DESIGN_TABLE = os.getenv('DYNAMODB_DESIGN_TABLE')
+AGGREGATE_TABLE = os.getenv('DYNAMODB_AGGREGATE_TABLE')
+
+# Materialized /design/home response, stored as one compressed item in the aggregate table.
+# Each category keeps its newest HOME_FEED_CATEGORY_LIMIT designs; warm containers serve an
+# in-process copy and re-read the item every HOME_FEED_REFRESH_SECONDS.
+HOME_FEED_KEY = {'pk': {'S': 'HOME_FEED'}, 'sk': {'S': 'SNAPSHOT'}}
+CATEGORY_LIMIT = int(os.getenv('HOME_FEED_CATEGORY_LIMIT', '24'))
+REFRESH_SECONDS = float(os.getenv('HOME_FEED_REFRESH_SECONDS', '30'))
+MAX_UPDATE_ATTEMPTS = 3
+
+
+class HomeFeedSnapshot:
+    """One immutable version of the feed: the serialized response body and its ETag"""
+
+    __slots__ = ('version', 'body', 'etag', 'loaded_at')
+
+    def __init__(self, version: int, body: bytes):
+        self.version = version
+        self.body = body
+        self.etag = '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+        self.loaded_at = time.monotonic()
+
+    @property
+    def categories(self) -> Dict[str, List[dict]]:
+        return json.loads(self.body)['designs']
+
+
+_current: Optional[HomeFeedSnapshot] = None
+
+
+def design_card(item: Item, seller_username: str) -> dict:
+    """Home feed entry for a decoded design item"""
+    try:
+        metadata = item['metadata']
+        file_type = metadata.get('fileType', '').upper() if 'fileType' in metadata else metadata.get('type', '').split('/')[-1].upper()
+        dimensions = metadata.get('dimensions', {})
+        resolution = f"{dimensions.get('width', '')}x{dimensions.get('height', '')}" if dimensions else ''
+        layers = metadata.get('layers', 0)
+    except (AttributeError, TypeError):
+        file_type = ''
+        resolution = ''
+        layers = 0
+
+    return {
+        'id': item['design_id'],
+        'title': item['title'],
+        'thumbnail_url': item['thumbnail_url'],
+        'price': item['price'],
+        'category': item['category'],
+        'created_at': item['created_at'],
+        'file_type': file_type,
+        'resolution': resolution,
+        'layers': layers,
+        'is_color_matching': item['is_color_matching'],
+        'color_matching_design_id': item['color_matching_design_id'],
+        'seller_username': seller_username,
+        'bundle_discount': item['bundle_discount']
+    }
+
+
+async def _cards(items: List[Item], client) -> List[dict]:
+    usernames = await get_usernames_from_emails(
+        (item['seller_email'] for item in items),
+        BatchLoader(client=client)
+    )
+    return [design_card(item, usernames[item['seller_email']]) for item in items]
+
+
+async def build_feed(client=None) -> Dict[str, List[dict]]:
+    """Full rebuild from the design table"""
+    items = DESIGN.decode_many(await async_dynamodb.parallel_scan(
+        DESIGN_TABLE,
+        filter_expression='verification_status = :status',
+        expression_attribute_values={':status': {'S': 'Verified'}},
+        client=client
+    ))
+
+    by_category: Dict[str, List[Item]] = {}
+    for item in items:
+        by_category.setdefault(item['category'], []).append(item)
+
+    newest: List[Item] = []
+    for category_items in by_category.values():
+        category_items.sort(key=lambda item: item['created_at'] or '', reverse=True)
+        newest.extend(category_items[:CATEGORY_LIMIT])
+
+    feed: Dict[str, List[dict]] = {category: [] for category in by_category}
+    for card in await _cards(newest, client):
+        feed[card['category']].append(card)
+    return feed
+
+
+async def _category_cards(category: str, written: Dict[str, Optional[Item]], client=None) -> List[dict]:
+    """
+    Newest verified designs of one category, read from the sparse GalleryCreatedGSI. The index
+    lags the base table, so designs just written are taken from `written` (consistent reads,
+    None when deleted) instead of from the index.
+    """
+    client = client or dynamodb_service._get_dynamodb_client()
+    response = await run_blocking(
+        client.query,
+        TableName=DESIGN_TABLE,
+        IndexName='GalleryCreatedGSI',
+        KeyConditionExpression='gallery_category = :category',
+        ExpressionAttributeValues={':category': {'S': category}},
+        ScanIndexForward=False,
+        Limit=CATEGORY_LIMIT + len(written)
+    )
+    items = [item for item in DESIGN.decode_many(response.get('Items', [])) if item['design_id'] not in written]
+    items.extend(
+        item for item in written.values()
+        if item is not None and item['category'] == category and item['verification_status'] == 'Verified'
+    )
+    items.sort(key=lambda item: item['created_at'] or '', reverse=True)
+    return await _cards(items[:CATEGORY_LIMIT], client)
+
+
+async def _read_written(design_ids: Iterable[str], client=None) -> Dict[str, Optional[Item]]:
+    design_ids = sorted({design_id for design_id in design_ids if design_id})
+    if not design_ids:
+        return {}
+    items = DESIGN.decode_many(await async_dynamodb.batch_get_items(
+        DESIGN_TABLE,
+        [{'design_id': {'S': design_id}} for design_id in design_ids],
+        consistent_read=True,
+        client=client
+    ))
+    found = {item['design_id']: item for item in items}
+    return {design_id: found.get(design_id) for design_id in design_ids}
+
+
+def _load(client=None) -> Optional[HomeFeedSnapshot]:
+    client = client or dynamodb_service._get_dynamodb_client()
+    item = client.get_item(TableName=AGGREGATE_TABLE, Key=HOME_FEED_KEY).get('Item')
+    if item is None:
+        return None
+    return HomeFeedSnapshot(int(item['version']['N']), zlib.decompress(item['feed']['B']))
+
+
+def _save(feed: Dict[str, List[dict]], version: int, client=None) -> HomeFeedSnapshot:
+    """Store `feed` as `version`; fails with ConditionalCheckFailedException if another writer got there first"""
+    client = client or dynamodb_service._get_dynamodb_client()
+    snapshot = HomeFeedSnapshot(version, json.dumps({'designs': feed}, separators=(',', ':')).encode())
+    client.put_item(
+        TableName=AGGREGATE_TABLE,
+        Item={
+            **HOME_FEED_KEY,
+            'feed': {'B': zlib.compress(snapshot.body)},
+            'etag': {'S': snapshot.etag},
+            'version': {'N': str(version)},
+            'updated_at': {'S': str(datetime.now())}
+        },
+        ConditionExpression='attribute_not_exists(pk) OR version = :previous',
+        ExpressionAttributeValues={':previous': {'N': str(version - 1)}}
+    )
+    return snapshot
+
+
+def _is_conflict(error: ClientError) -> bool:
+    return error.response['Error']['Code'] == 'ConditionalCheckFailedException'
+
+
+async def get_home_feed(client=None) -> HomeFeedSnapshot:
+    """Current snapshot, from the in-process copy when it is fresh enough"""
+    global _current
+    snapshot = _current
+    if snapshot is not None and time.monotonic() - snapshot.loaded_at < REFRESH_SECONDS:
+        return snapshot
+
+    snapshot = await run_blocking(_load, client)
+    if snapshot is None:
+        # First request after deploy: build and publish version 1
+        feed = await build_feed(client)
+        try:
+            snapshot = await run_blocking(_save, feed, 1, client)
+        except ClientError as e:
+            if not _is_conflict(e):
+                raise
+            snapshot = await run_blocking(_load, client)
+    _current = snapshot
+    return snapshot
+
+
+async def refresh_categories(categories: Iterable[str], client=None,
+                             design_ids: Iterable[str] = ()) -> Optional[HomeFeedSnapshot]:
+    """
+    Recompute only the given categories and publish a new version (optimistic concurrency).
+    `design_ids` are the designs whose write triggered the refresh.
+    """
+    global _current
+    categories = {category for category in categories if category}
+    if not categories:
+        return None
+    design_ids = list(design_ids)
+
+    for _ in range(MAX_UPDATE_ATTEMPTS):
+        stored = await run_blocking(_load, client)
+        if stored is None:
+            feed, version = await build_feed(client), 1
+        else:
+            feed, version = stored.categories, stored.version + 1
+            written = await _read_written(design_ids, client)
+            for category in categories:
+                cards = await _category_cards(category, written, client)
+                if cards:
+                    feed[category] = cards
+                else:
+                    feed.pop(category, None)
+        try:
+            _current = await run_blocking(_save, feed, version, client)
+            return _current
+        except ClientError as e:
+            if not _is_conflict(e):
+                raise
+    raise RuntimeError("Home feed update kept conflicting with concurrent writers")
+
+
+async def rebuild(client=None) -> HomeFeedSnapshot:
+    """Replace the snapshot with a full rebuild (e.g. after a backfill)"""
+    global _current
+    for _ in range(MAX_UPDATE_ATTEMPTS):
+        stored = await run_blocking(_load, client)
+        feed = await build_feed(client)
+        try:
+            _current = await run_blocking(_save, feed, stored.version + 1 if stored else 1, client)
+            return _current
+        except ClientError as e:
+            if not _is_conflict(e):
+                raise
+    raise RuntimeError("Home feed rebuild kept conflicting with concurrent writers")
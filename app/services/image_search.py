@@ -1,15 +1,18 @@
 from typing import List, Optional
-import boto3
 import os
 import json
 from fastapi import HTTPException
 import base64
 from .dynamodb import _get_dynamodb_client
+from .aws_clients import get_lambda_client
+from .aio import run_blocking
 from datetime import datetime
 import time
 from ..utils.s3_utils import S3Handler
 import logging
-from app.utils.user import get_username_from_email
+from app.utils.user import get_usernames_from_emails
+from app.services.batch_loader import BatchLoader
+from app.services import design_cache
 import dotenv
 
 # Load environment variables
@@ -28,7 +31,7 @@ class ImageSearchService:
             raise ValueError("AWS_REGION must be set in environment variables")
         
         # Initialize AWS clients with region
-        self.lambda_client = boto3.client('lambda', region_name=self.aws_region)
+        self.lambda_client = get_lambda_client()
         self.dynamodb = _get_dynamodb_client()
         self.s3_handler = S3Handler()
         logger.info(f"Service initialized with lambda endpoint: {self.lambda_endpoint} in region: {self.aws_region}")
@@ -193,22 +196,27 @@ class ImageSearchService:
 
     async def _call_lambda(self, payload: dict) -> dict:
         try:
-            response = self.lambda_client.invoke(
-                FunctionName=self.lambda_endpoint,
-                InvocationType='RequestResponse',
-                Payload=json.dumps(payload)
-            )
-            
+            def invoke():
+                response = self.lambda_client.invoke(
+                    FunctionName=self.lambda_endpoint,
+                    InvocationType='RequestResponse',
+                    Payload=json.dumps(payload)
+                )
+                return response, json.loads(response['Payload'].read())
+
+            # Search invocations can take seconds, so keep them off the event loop
+            response, payload_body = await run_blocking(invoke)
+
             # Check if the response contains an error
             if 'FunctionError' in response:
-                error_details = json.loads(response['Payload'].read())
+                error_details = payload_body
                 logger.error(f"Lambda function error: {error_details}")
                 raise HTTPException(
                     status_code=500,
                     detail=f"Lambda function error: {json.dumps(error_details)}"
                 )
             
-            return json.loads(response['Payload'].read())
+            return payload_body
         except Exception as e:
             logger.error(f"Lambda invocation failed: {str(e)}", exc_info=True)
             raise HTTPException(
@@ -218,44 +226,41 @@ class ImageSearchService:
 
     async def _get_design_details(self, similar_designs: List[dict]) -> List[dict]:
         try:
+            # One batched read for the designs, one for their sellers
+            loader = BatchLoader(client=self.dynamodb)
+            items = await design_cache.load_designs(
+                (design['hash'] for design in similar_designs),
+                loader
+            )
+            # Only verified designs are returned
+            items = [
+                item for item in items
+                if item and item.get('verification_status', {}).get('S') == 'Verified'
+            ]
+            usernames = await get_usernames_from_emails(
+                (item['seller_email']['S'] for item in items),
+                loader
+            )
+
             design_details = []
-            for design in similar_designs:
-                design_id = design['hash']
-                response = self.dynamodb.get_item(
-                    TableName=self.design_table,
-                    Key={'design_id': {'S': design_id}}
-                )
-                
-                if 'Item' in response:
-                    item = response['Item']
-                    # Check if design is verified
-                    if item.get('verification_status', {}).get('S') != 'Verified':
-                        continue
-                    
-                    metadata = json.loads(item.get('metadata', {}).get('S', '{}'))
-                    
-                    # Get seller username
-                    seller_username = await get_username_from_email(
-                        item['seller_email']['S'],
-                        self.dynamodb
-                    )
-                    
-                    design_details.append({
-                        'id': item['design_id']['S'],
-                        'title': item['title']['S'],
-                        'thumbnail_url': item['thumbnail_url']['S'],
-                        'price': float(item['price']['N']),
-                        'category': item['category']['S'],
-                        'tags': item.get('tags', {}).get('S', '').split(','),
-                        'seller_username': seller_username,
-                        'file_type': metadata.get('fileType', '').upper(),
-                        'resolution': f"{metadata.get('dimensions', {}).get('width', '')}x{metadata.get('dimensions', {}).get('height', '')}",
-                        'layers': metadata.get('layers', 0),
-                        'is_color_matching': item.get('is_color_matching', {}).get('BOOL', False),
-                        'color_matching_design_id': item.get('color_matching_design_id', {}).get('S', '')
-                    })
+            for item in items:
+                metadata = json.loads(item.get('metadata', {}).get('S', '{}'))
+
+                design_details.append({
+                    'id': item['design_id']['S'],
+                    'title': item['title']['S'],
+                    'thumbnail_url': item['thumbnail_url']['S'],
+                    'price': float(item['price']['N']),
+                    'category': item['category']['S'],
+                    'tags': item.get('tags', {}).get('S', '').split(','),
+                    'seller_username': usernames[item['seller_email']['S']],
+                    'file_type': metadata.get('fileType', '').upper(),
+                    'resolution': f"{metadata.get('dimensions', {}).get('width', '')}x{metadata.get('dimensions', {}).get('height', '')}",
+                    'layers': metadata.get('layers', 0),
+                    'is_color_matching': item.get('is_color_matching', {}).get('BOOL', False),
+                    'color_matching_design_id': item.get('color_matching_design_id', {}).get('S', '')
+                })
             logger.info(f"Fetched {len(design_details)} verified design details")
-            print("These are the design details", design_details)
             return design_details
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"Failed to fetch design details: {str(e)}") 
\ No newline at end of file
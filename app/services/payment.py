@@ -1,10 +1,105 @@
-from typing import Dict, Any, Tuple
+import asyncio
+import uuid
+from collections import defaultdict
+from decimal import Decimal
+from typing import Dict, Any, List, Optional, Tuple
 from datetime import datetime
 import pytz
 import os
+from botocore.exceptions import ClientError
+from app.services import async_dynamodb
+from app.services import design_cache
+from app.services import dynamodb as dynamodb_service
+from app.services.aio import run_blocking
 
 PAYMENT_HISTORY_TABLE = os.getenv('DYNAMODB_PAYMENT_HISTORY_TABLE')
 DESIGN_TABLE = os.getenv('DYNAMODB_DESIGN_TABLE')
+AGGREGATE_TABLE = os.getenv('DYNAMODB_AGGREGATE_TABLE')
+
+# Payout ledger: one aggregate item per seller with the running cash, credit value and sales
+# not yet paid out, credited by checkout (inside its TransactWriteItems) and zeroed when the
+# seller is paid. Sellers with a balance carry `payout_due`, which puts them in the sparse
+# PayoutDueGSI ordered by the time of their oldest unpaid sale.
+PAYOUT_INDEX = 'PayoutDueGSI'
+PAYOUT_DUE = 'DUE'
+MAX_SETTLE_ATTEMPTS = 3
+
+# Sales analytics rollups: one aggregate item per (seller, year) with 12 monthly revenue and
+# credit buckets and revenue per category, plus a per-seller item listing the years with
+# payouts. Both are written in the same transaction as the payment history record.
+ROLLUP_YEARS_SK = 'ANALYTICS_YEARS'
+MAX_ROLLUP_ATTEMPTS = 3
+
+# Payouts are written with TransactWriteItems in chunks of at most TRANSACT_WRITE_MAX_ITEMS;
+# chunks after the first, and sellers in a bulk settlement, run PAYOUT_CONCURRENCY at a time.
+TRANSACT_WRITE_MAX_ITEMS = int(os.getenv('TRANSACT_WRITE_MAX_ITEMS', '100'))
+PAYOUT_CONCURRENCY = int(os.getenv('PAYOUT_CONCURRENCY', '8'))
+
+# Designs left for later chunks are recorded on the ledger item (pending_payout_designs, design
+# id -> total_sold paid up to) by the first chunk, so a payout interrupted after its history was
+# written is finished by the next call instead of being paid, and recorded, a second time.
+
+
+def _payout_key(email: str) -> dict:
+    return {'pk': {'S': f'SELLER#{email}'}, 'sk': {'S': 'PAYOUT'}}
+
+
+def _rollup_key(email: str, year: int) -> dict:
+    return {'pk': {'S': f'SELLER#{email}'}, 'sk': {'S': f'ANALYTICS#{year}'}}
+
+
+def _years_key(email: str) -> dict:
+    return {'pk': {'S': f'SELLER#{email}'}, 'sk': {'S': ROLLUP_YEARS_SK}}
+
+
+def _empty_rollup() -> dict:
+    return {
+        'monthly_revenue': [Decimal(0)] * 12,
+        'monthly_credits': [Decimal(0)] * 12,
+        'category_revenue': {},
+        'version': 0
+    }
+
+
+def _cancellation_codes(error: ClientError) -> List[str]:
+    """Per-action reasons of a cancelled TransactWriteItems ('None' for actions that were fine)"""
+    if error.response['Error']['Code'] != 'TransactionCanceledException':
+        return []
+    return [reason.get('Code', 'None') for reason in error.response.get('CancellationReasons', [])]
+
+
+def _decode_rollup(item: Optional[dict]) -> dict:
+    if item is None:
+        return _empty_rollup()
+    return {
+        'monthly_revenue': [Decimal(value['N']) for value in item['monthly_revenue']['L']],
+        'monthly_credits': [Decimal(value['N']) for value in item['monthly_credits']['L']],
+        'category_revenue': {category: Decimal(value['N']) for category, value in item['category_revenue']['M'].items()},
+        'version': int(item['version']['N'])
+    }
+
+
+def _add_payment(rollup: dict, payment: dict):
+    """Add a payment history item (raw DynamoDB format) to its year's rollup"""
+    month_index = datetime.fromisoformat(payment['payment_date']['S']).month - 1
+    rollup['monthly_revenue'][month_index] += Decimal(payment.get('total_amount', {}).get('N', '0'))
+    rollup['monthly_credits'][month_index] += Decimal(payment.get('total_credits', {}).get('N', '0'))
+    for entry in payment.get('paid_designs', {}).get('L', []):
+        design = entry['M']
+        category = design.get('category', {}).get('S', 'Uncategorized')
+        revenue = Decimal(design.get('price', {}).get('N', '0')) * Decimal(design.get('sales_count', {}).get('N', '0'))
+        rollup['category_revenue'][category] = rollup['category_revenue'].get(category, Decimal(0)) + revenue
+
+
+def _encode_rollup(email: str, year: int, rollup: dict) -> dict:
+    return {
+        **_rollup_key(email, year),
+        'monthly_revenue': {'L': [{'N': str(value)} for value in rollup['monthly_revenue']]},
+        'monthly_credits': {'L': [{'N': str(value)} for value in rollup['monthly_credits']]},
+        'category_revenue': {'M': {category: {'N': str(value)} for category, value in rollup['category_revenue'].items()}},
+        'version': {'N': str(rollup['version'] + 1)},
+        'updated_at': {'S': str(datetime.now())}
+    }
 
 class PaymentService:
     def __init__(self, dynamodb_client):
@@ -25,55 +120,331 @@ class PaymentService:
             return price * 0.8, 0
         return 0, 0
 
-    async def mark_designs_as_paid(self, email: str) -> bool:
-        """Mark all sold designs for a user as paid by updating last_payout_sold"""
+    def calculate_credit_value(self, price: float, payment_method: str) -> float:
+        """Part of `price` paid out as credits, in INR; linear in price, unlike the whole credit count"""
+        if payment_method == 'credits_100':
+            return price
+        elif payment_method == 'hybrid_50_50':
+            return price * 0.5
+        return 0
+
+    async def mark_designs_as_paid(self, email: str, payment_details: Optional[Dict[str, Any]] = None) -> bool:
+        """
+        Mark all sold designs of a seller as paid and zero their payout ledger; with payment_details,
+        also record the payment history and analytics rollups in the same transaction.
+        The first TransactWriteItems call carries the ledger reset, the history and as many designs
+        as fit; the remaining designs follow in chunks, PAYOUT_CONCURRENCY at a time. A payout whose
+        later chunks failed is finished by the next call, without another history record.
+        """
         try:
-            # Get all designs for the user
-            designs = self.dynamodb.query(
-                TableName=DESIGN_TABLE,
-                IndexName='DesignSellerGSI',
-                KeyConditionExpression='seller_email = :email',
-                ExpressionAttributeValues={
-                    ':email': {'S': email}
-                }
-            )
+            finished = await self._finish_pending_payout(email)
+            for _ in range(MAX_SETTLE_ATTEMPTS):
+                paid_at = datetime.now(pytz.timezone('Asia/Kolkata'))
+                # Ledger first: a sale landing after this read fails the reset's condition
+                ledger = (await run_blocking(
+                    self.dynamodb.get_item,
+                    TableName=AGGREGATE_TABLE,
+                    Key=_payout_key(email),
+                    ConsistentRead=True
+                )).get('Item')
+                designs = await run_blocking(self._unpaid_designs, email)
+                design_actions = [
+                    self._paid_action(design['design_id']['S'], int(design['total_sold']['N']))
+                    for design in designs
+                ]
+                if finished and not designs:
+                    # Nothing was sold since the interrupted payout, which is now complete
+                    design_cache.invalidate(*finished)
+                    return True
 
-            # Update each design's last_payout_sold
-            for design in designs.get('Items', []):
-                design_id = design['design_id']['S']
-                total_sold = int(design.get('total_sold', {}).get('N', '0'))
-                
-                self.dynamodb.update_item(
-                    TableName=DESIGN_TABLE,
-                    Key={'design_id': {'S': design_id}},
-                    UpdateExpression='SET last_payout_sold = :sold',
-                    ExpressionAttributeValues={
-                        ':sold': {'N': str(total_sold)}
-                    }
-                )
+                head = []
+                if payment_details is not None:
+                    history = self._payment_history_item(email, self._with_defaults(payment_details, ledger, designs), paid_at)
+                    head.append({'Put': {'TableName': PAYMENT_HISTORY_TABLE, 'Item': history}})
+                    head.extend(await run_blocking(self._rollup_actions, email, history, paid_at))
+                split = max(TRANSACT_WRITE_MAX_ITEMS - len(head) - 1, 0)
+                payout_id = uuid.uuid4().hex
+                pending = {
+                    design['design_id']['S']: design['total_sold']
+                    for design in designs[split:]
+                }
+                head.append(self._settle_action(email, ledger, paid_at, payout_id, pending))
+                try:
+                    await run_blocking(self._transact, head + design_actions[:split])
+                    break
+                except ClientError as e:
+                    if 'ConditionalCheckFailed' not in _cancellation_codes(e)[:len(head)]:
+                        raise
+                    # A sale or another payout got in between the reads and the write: start over
+            else:
+                raise RuntimeError(f"Payout for {email} kept conflicting with concurrent sales")
 
+            if pending:
+                await self._write_chunks(design_actions[split:])
+                await run_blocking(self._clear_pending_payout, email, payout_id)
+            design_cache.invalidate(*finished, *(design['design_id']['S'] for design in designs))
             return True
         except Exception as e:
             print(f"Error marking designs as paid: {str(e)}")
             return False
 
+    async def _finish_pending_payout(self, email: str) -> List[str]:
+        """Write the design chunks of an interrupted payout; returns its design ids, if there was one"""
+        ledger = (await run_blocking(
+            self.dynamodb.get_item,
+            TableName=AGGREGATE_TABLE,
+            Key=_payout_key(email),
+            ConsistentRead=True,
+            ProjectionExpression='pending_payout_id, pending_payout_designs'
+        )).get('Item')
+        if not ledger or 'pending_payout_id' not in ledger:
+            return []
+        print(f"Finishing interrupted payout {ledger['pending_payout_id']['S']} for {email}")
+        pending = sorted(ledger['pending_payout_designs']['M'].items())
+        await self._write_chunks([self._paid_action(design_id, int(total_sold['N'])) for design_id, total_sold in pending])
+        await run_blocking(self._clear_pending_payout, email, ledger['pending_payout_id']['S'])
+        return [design_id for design_id, _ in pending]
+
+    async def _write_chunks(self, actions: List[dict]):
+        """Write _paid_action updates in chunks, PAYOUT_CONCURRENCY at a time; they can be retried"""
+        semaphore = asyncio.Semaphore(PAYOUT_CONCURRENCY)
+
+        async def write(chunk: List[dict]):
+            async with semaphore:
+                for attempt in range(MAX_SETTLE_ATTEMPTS):
+                    try:
+                        return await run_blocking(self._transact, chunk)
+                    except ClientError:
+                        if attempt == MAX_SETTLE_ATTEMPTS - 1:
+                            raise
+
+        await asyncio.gather(*(
+            write(actions[start:start + TRANSACT_WRITE_MAX_ITEMS])
+            for start in range(0, len(actions), TRANSACT_WRITE_MAX_ITEMS)
+        ))
+
+    def _clear_pending_payout(self, email: str, payout_id: str):
+        try:
+            self.dynamodb.update_item(
+                TableName=AGGREGATE_TABLE,
+                Key=_payout_key(email),
+                UpdateExpression='REMOVE pending_payout_id, pending_payout_designs',
+                ConditionExpression='pending_payout_id = :id',
+                ExpressionAttributeValues={':id': {'S': payout_id}}
+            )
+        except ClientError as e:
+            # Another call finished this payout first
+            if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+                raise
+
+    async def settle_all_due(self, admin_email: str) -> List[str]:
+        """Pay every seller with an unpaid balance at the ledger amounts; returns the sellers paid"""
+        semaphore = asyncio.Semaphore(PAYOUT_CONCURRENCY)
+
+        async def settle(email: str) -> Optional[str]:
+            async with semaphore:
+                paid = await self.mark_designs_as_paid(email, {'admin_email': admin_email, 'notes': 'Bulk settlement'})
+                return email if paid else None
+
+        settled = []
+        exclusive_start_key = None
+        while True:
+            payouts, exclusive_start_key = await self.payouts_due(100, exclusive_start_key)
+            results = await asyncio.gather(*(settle(payout['email']) for payout in payouts))
+            settled.extend(email for email in results if email)
+            if not exclusive_start_key:
+                return settled
+
+    def _unpaid_designs(self, email: str) -> List[dict]:
+        """Every design of the seller with sales not yet paid out, across all query pages"""
+        return [
+            design for design in dynamodb_service.iter_query(
+                DESIGN_TABLE,
+                index_name='DesignSellerGSI',
+                key_condition_expression='seller_email = :email',
+                expression_attribute_values={':email': {'S': email}},
+                projection_expression='design_id, title, category, price, thumbnail_url, payment_method, '
+                                      'verification_status, total_sold, last_payout_sold',
+                client=self.dynamodb
+            )
+            if self.get_unpaid_sales(design) > 0
+        ]
+
+    def _with_defaults(self, payment_details: Dict[str, Any], ledger: Optional[dict], designs: List[dict]) -> Dict[str, Any]:
+        """Fill amounts and paid designs the caller left out from the ledger and designs being paid"""
+        details = dict(payment_details)
+        if 'total_amount' not in details or 'total_credits' not in details:
+            due = self._decode_payout(ledger) if ledger else {'payment_due': 0, 'credits_due': 0}
+            details.setdefault('total_amount', due['payment_due'])
+            details.setdefault('total_credits', due['credits_due'])
+        details.setdefault('paid_designs', [
+            {
+                'category': design.get('category', {}).get('S', 'Uncategorized'),
+                'title': design.get('title', {}).get('S', ''),
+                'unpaid_sales': self.get_unpaid_sales(design),
+                'price': float(design.get('price', {}).get('N', '0')),
+                'image_url': design.get('thumbnail_url', {}).get('S', ''),
+                'payment_method': design.get('payment_method', {}).get('S', '')
+            }
+            for design in designs
+            if design.get('verification_status', {}).get('S') == 'Verified'
+        ])
+        return details
+
+    def _paid_action(self, design_id: str, total_sold: int) -> dict:
+        """Mark a design paid up to `total_sold`; re-applying it is harmless"""
+        return {
+            'Update': {
+                'TableName': DESIGN_TABLE,
+                'Key': {'design_id': {'S': design_id}},
+                'UpdateExpression': 'SET last_payout_sold = :sold',
+                'ConditionExpression': 'attribute_exists(design_id) AND (attribute_not_exists(last_payout_sold) OR last_payout_sold <= :sold)',
+                'ExpressionAttributeValues': {':sold': {'N': str(total_sold)}}
+            }
+        }
+
+    def _settle_action(self, email: str, observed: Optional[dict], paid_at: datetime,
+                       payout_id: str = '', pending: Optional[Dict[str, dict]] = None) -> dict:
+        """
+        Zero the ledger as read in `observed`; any sale credited since then, or an unfinished payout,
+        cancels the transaction. `pending` (design id -> total_sold) records the designs left for
+        later chunks under `payout_id`.
+        """
+        if observed is None and not pending:
+            return {
+                'ConditionCheck': {
+                    'TableName': AGGREGATE_TABLE,
+                    'Key': _payout_key(email),
+                    'ConditionExpression': 'attribute_not_exists(pk)'
+                }
+            }
+        update = 'SET unpaid_cash = :zero, unpaid_credit_value = :zero, unpaid_sales = :zero, settled_at = :now'
+        values = {':zero': {'N': '0'}, ':now': {'S': paid_at.isoformat()}}
+        if pending:
+            update += ', pending_payout_id = :payout_id, pending_payout_designs = :pending'
+            values[':payout_id'] = {'S': payout_id}
+            values[':pending'] = {'M': pending}
+        if observed is None:
+            condition = 'attribute_not_exists(pk)'
+        else:
+            condition = 'unpaid_sales = :observed AND attribute_not_exists(pending_payout_id)'
+            values[':observed'] = observed.get('unpaid_sales', {'N': '0'})
+        return {
+            'Update': {
+                'TableName': AGGREGATE_TABLE,
+                'Key': _payout_key(email),
+                'UpdateExpression': update + ' REMOVE payout_due, unpaid_since, unpaid_designs',
+                'ConditionExpression': condition,
+                'ExpressionAttributeValues': values
+            }
+        }
+
+    def _transact(self, actions: List[dict]):
+        if actions:
+            self.dynamodb.transact_write_items(TransactItems=actions)
+
     def get_unpaid_sales(self, design: Dict[str, Any]) -> int:
         """Calculate unpaid sales for a design"""
         total_sold = int(design.get('total_sold', {}).get('N', '0'))
         last_payout = int(design.get('last_payout_sold', {}).get('N', '0'))
         return total_sold - last_payout 
     
-    def update_payment_details(self, email: str, payment_details: Dict[str, Any]) -> bool:
-        """Update payment details for a user"""
-        try:
-            payment_id = f"PAY_{datetime.now(pytz.timezone('Asia/Kolkata')).strftime('%Y%m%d%H%M%S')}_{email.split('@')[0]}"
-            payment_history = {
+    def payout_action(self, seller_email: str, sales: List[Tuple[dict, int]], now: str) -> dict:
+        """TransactWriteItems action crediting a seller's ledger with (design item, copies) sales"""
+        cash = Decimal(0)
+        credit_value = Decimal(0)
+        copies_sold = 0
+        for design, copies in sales:
+            price = float(design.get('price', {}).get('N', '0')) * copies
+            payment_method = design.get('payment_method', {}).get('S', '')
+            cash += Decimal(str(self.calculate_payment_and_credits(price, payment_method)[0]))
+            credit_value += Decimal(str(self.calculate_credit_value(price, payment_method)))
+            copies_sold += copies
+        return {
+            'Update': {
+                'TableName': AGGREGATE_TABLE,
+                'Key': _payout_key(seller_email),
+                'UpdateExpression': (
+                    'ADD unpaid_cash :cash, unpaid_credit_value :credit_value, unpaid_sales :sales, unpaid_designs :designs '
+                    'SET payout_due = :due, unpaid_since = if_not_exists(unpaid_since, :now)'
+                ),
+                'ExpressionAttributeValues': {
+                    ':cash': {'N': str(cash)},
+                    ':credit_value': {'N': str(credit_value)},
+                    ':sales': {'N': str(copies_sold)},
+                    ':designs': {'SS': sorted({design['design_id']['S'] for design, _ in sales})},
+                    ':due': {'S': PAYOUT_DUE},
+                    ':now': {'S': now}
+                }
+            }
+        }
+
+    def _decode_payout(self, item: dict) -> dict:
+        return {
+            'email': item['pk']['S'].split('#', 1)[1],
+            'designs_sold': len(item.get('unpaid_designs', {}).get('SS', [])),
+            'unpaid_sales': int(item.get('unpaid_sales', {}).get('N', '0')),
+            'payment_due': float(item.get('unpaid_cash', {}).get('N', '0')),
+            'credits_due': int(Decimal(item.get('unpaid_credit_value', {}).get('N', '0')) / self.CREDIT_VALUE),
+            'unpaid_since': item.get('unpaid_since', {}).get('S')
+        }
+
+    async def payouts_due(self, limit: int, exclusive_start_key: Optional[dict] = None) -> Tuple[List[dict], Optional[dict]]:
+        """One page of sellers with an unpaid balance, longest waiting first"""
+        items, last_key = await async_dynamodb.query_page(
+            AGGREGATE_TABLE,
+            index_name=PAYOUT_INDEX,
+            key_condition_expression='payout_due = :due',
+            expression_attribute_values={':due': {'S': PAYOUT_DUE}},
+            limit=limit,
+            exclusive_start_key=exclusive_start_key,
+            client=self.dynamodb
+        )
+        return [self._decode_payout(item) for item in items], last_key
+
+    async def rebuild_payout_ledger(self) -> int:
+        """
+        Recompute every ledger from verified designs' total_sold - last_payout_sold at current
+        prices, for the initial fill or to correct drift. Run it when no checkout or payout is in flight.
+        """
+        by_seller: Dict[str, List[Tuple[dict, int]]] = defaultdict(list)
+        for design in await async_dynamodb.parallel_scan(
+            DESIGN_TABLE,
+            filter_expression='verification_status = :status',
+            projection_expression='design_id, seller_email, total_sold, last_payout_sold, price, payment_method',
+            expression_attribute_values={':status': {'S': 'Verified'}},
+            client=self.dynamodb
+        ):
+            unpaid = self.get_unpaid_sales(design)
+            if unpaid > 0:
+                by_seller[design['seller_email']['S']].append((design, unpaid))
+
+        def write():
+            now = str(datetime.now())
+            for page in self.dynamodb.get_paginator('query').paginate(
+                TableName=AGGREGATE_TABLE,
+                IndexName=PAYOUT_INDEX,
+                KeyConditionExpression='payout_due = :due',
+                ExpressionAttributeValues={':due': {'S': PAYOUT_DUE}},
+                ProjectionExpression='pk, sk'
+            ):
+                for item in page.get('Items', []):
+                    self.dynamodb.delete_item(TableName=AGGREGATE_TABLE, Key={'pk': item['pk'], 'sk': item['sk']})
+            for email, sales in by_seller.items():
+                self.dynamodb.update_item(**self.payout_action(email, sales, now)['Update'])
+
+        await run_blocking(write)
+        return len(by_seller)
+
+    def _payment_history_item(self, email: str, payment_details: Dict[str, Any], paid_at: datetime) -> dict:
+        payment_id = f"PAY_{paid_at.strftime('%Y%m%d%H%M%S')}_{email.split('@')[0]}"
+        return {
             'payment_id': {'S': payment_id},
             'seller_email': {'S': email},
             'total_amount': {'N': str(payment_details.get('total_amount', 0))},
             'total_credits': {'N': str(payment_details.get('total_credits', 0))},
             'transaction_id': {'S': payment_details.get('transaction_id', '')},
-            'payment_date': {'S': datetime.now(pytz.timezone('Asia/Kolkata')).isoformat()},
+            'payment_date': {'S': paid_at.isoformat()},
             'paid_designs': {'L': [{'M': {
                 'category': {'S': d['category']},
                 'title': {'S': d['title']},
@@ -84,15 +455,97 @@ class PaymentService:
             }} for d in payment_details.get('paid_designs', [])]},
             'admin_email': {'S': payment_details.get('admin_email', '')},
             'notes': {'S': payment_details.get('notes', '')}
+        }
+
+    def _rollup_actions(self, email: str, payment_history: dict, paid_at: datetime) -> List[dict]:
+        """Versioned put of the year's rollup with the payment added, and the years index update"""
+        stored = self.dynamodb.get_item(
+            TableName=AGGREGATE_TABLE,
+            Key=_rollup_key(email, paid_at.year),
+            ConsistentRead=True
+        ).get('Item')
+        rollup = _decode_rollup(stored)
+        _add_payment(rollup, payment_history)
+        return [
+            {
+                'Put': {
+                    'TableName': AGGREGATE_TABLE,
+                    'Item': _encode_rollup(email, paid_at.year, rollup),
+                    'ConditionExpression': 'attribute_not_exists(pk) OR version = :version',
+                    'ExpressionAttributeValues': {':version': {'N': str(rollup['version'])}}
+                }
+            },
+            {
+                'Update': {
+                    'TableName': AGGREGATE_TABLE,
+                    'Key': _years_key(email),
+                    'UpdateExpression': 'ADD years :year',
+                    'ExpressionAttributeValues': {':year': {'NS': [str(paid_at.year)]}}
+                }
             }
+        ]
 
-            # Save payment history
-            self.dynamodb.put_item(
-                TableName=PAYMENT_HISTORY_TABLE,
-                Item=payment_history
-            )
-            return True
+    def update_payment_details(self, email: str, payment_details: Dict[str, Any]) -> bool:
+        """Record a payment in the history and analytics rollups without marking designs paid"""
+        try:
+            paid_at = datetime.now(pytz.timezone('Asia/Kolkata'))
+            payment_history = self._payment_history_item(email, payment_details, paid_at)
+
+            # Save payment history together with the updated rollup (optimistic concurrency)
+            for _ in range(MAX_ROLLUP_ATTEMPTS):
+                try:
+                    self._transact(
+                        [{'Put': {'TableName': PAYMENT_HISTORY_TABLE, 'Item': payment_history}}]
+                        + self._rollup_actions(email, payment_history, paid_at)
+                    )
+                    return True
+                except ClientError as e:
+                    if _cancellation_codes(e)[1:2] != ['ConditionalCheckFailed']:
+                        raise
+            raise RuntimeError(f"Sales rollup for {email} kept conflicting with concurrent payouts")
         except Exception as e:
             print(f"Error updating payment details: {str(e)}")
             return False
 
+    async def get_sales_analytics(self, email: str, year: int) -> Dict[str, Any]:
+        """Monthly revenue and credits, revenue per category and years with payouts, from the rollups"""
+        rollup_item, years_item = await asyncio.gather(
+            run_blocking(self.dynamodb.get_item, TableName=AGGREGATE_TABLE, Key=_rollup_key(email, year)),
+            run_blocking(self.dynamodb.get_item, TableName=AGGREGATE_TABLE, Key=_years_key(email))
+        )
+        rollup = _decode_rollup(rollup_item.get('Item'))
+        years = years_item.get('Item', {}).get('years', {}).get('NS', [])
+        return {
+            'monthly_revenue': [float(value) for value in rollup['monthly_revenue']],
+            'monthly_credits': [int(value) for value in rollup['monthly_credits']],
+            'category_revenue': [
+                {'name': category, 'value': float(revenue)}
+                for category, revenue in rollup['category_revenue'].items()
+            ],
+            'available_years': sorted((int(year) for year in years), reverse=True)
+        }
+
+    async def rebuild_sales_rollups(self) -> int:
+        """Recompute every seller's analytics rollups from the payment history (backfill or drift repair)"""
+        rollups: Dict[Tuple[str, int], dict] = defaultdict(_empty_rollup)
+        for payment in await async_dynamodb.parallel_scan(PAYMENT_HISTORY_TABLE, client=self.dynamodb):
+            year = datetime.fromisoformat(payment['payment_date']['S']).year
+            _add_payment(rollups[(payment['seller_email']['S'], year)], payment)
+
+        years: Dict[str, List[str]] = defaultdict(list)
+        for email, year in rollups:
+            years[email].append(str(year))
+
+        def write():
+            for (email, year), rollup in rollups.items():
+                rollup['version'] = int(self.dynamodb.get_item(
+                    TableName=AGGREGATE_TABLE,
+                    Key=_rollup_key(email, year),
+                    ProjectionExpression='version'
+                ).get('Item', {}).get('version', {}).get('N', '0'))
+                self.dynamodb.put_item(TableName=AGGREGATE_TABLE, Item=_encode_rollup(email, year, rollup))
+            for email, seller_years in years.items():
+                self.dynamodb.put_item(TableName=AGGREGATE_TABLE, Item={**_years_key(email), 'years': {'NS': seller_years}})
+
+        await run_blocking(write)
+        return len(rollups)
@@ -0,0 +1,192 @@
+import asyncio
+import json
+import os
+import zlib
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+from botocore.exceptions import ClientError
+from app.services import async_dynamodb
+from app.services import dynamodb as dynamodb_service
+from app.services.aio import run_blocking
+from app.services.payment import PaymentService
+from app.utils.item_codec import DESIGN, Item
+
+DESIGN_TABLE = os.getenv('DYNAMODB_DESIGN_TABLE')
+AGGREGATE_TABLE = os.getenv('DYNAMODB_AGGREGATE_TABLE')
+
+# Materialized /sales/dashboard data: one compressed item per seller in the aggregate table
+# holding the unpaid totals and one entry per verified design, kept sorted by copies sold.
+# Sales, approvals, rejections and payouts refresh the affected entries from the design table,
+# so every update is idempotent and the dashboard itself is a single keyed read.
+MAX_UPDATE_ATTEMPTS = 3
+
+_payments = PaymentService(None)
+
+
+def _key(email: str) -> dict:
+    return {'pk': {'S': f'SELLER#{email}'}, 'sk': {'S': 'DASHBOARD'}}
+
+
+def design_entry(design: Item) -> dict:
+    """Dashboard entry for a decoded verified design, with its lifetime revenue"""
+    lifetime_cash, lifetime_credits = _payments.calculate_payment_and_credits(
+        design['price'] * design['total_sold'],
+        design['payment_method']
+    )
+    return {
+        'id': design['design_id'] or '',
+        'title': design['title'],
+        'thumbnail_url': design['thumbnail_url'],
+        'category': design['category'],
+        'payment_method': design['payment_method'],
+        'price': design['price'],
+        'sales': design['total_sold'],
+        'unpaid_sales': design['total_sold'] - design['last_payout_sold'],
+        'cash_revenue': lifetime_cash,
+        'credits_earned': lifetime_credits,
+        'lifetime_revenue': lifetime_cash + (lifetime_credits * _payments.CREDIT_VALUE)
+    }
+
+
+def summarize(entries: List[dict]) -> dict:
+    """Unpaid revenue, credits and orders over all entries"""
+    total_cash = 0
+    total_credits = 0
+    total_orders = 0
+    total_price = 0
+    for entry in entries:
+        cash, credits = _payments.calculate_payment_and_credits(
+            entry['price'] * entry['unpaid_sales'],
+            entry['payment_method']
+        )
+        total_cash += cash
+        total_credits += credits
+        total_orders += entry['unpaid_sales']
+        total_price += entry['price'] * entry['unpaid_sales']
+    return {
+        'revenue': total_cash,
+        'credits': total_credits,
+        'orders': total_orders,
+        'averageOrderValue': total_price / total_orders if total_orders > 0 else 0
+    }
+
+
+def _dashboard(entries: List[dict]) -> dict:
+    entries.sort(key=lambda entry: (-entry['sales'], entry['id']))
+    return {'currentPeriod': summarize(entries), 'designs': entries}
+
+
+async def build(email: str, client=None) -> dict:
+    """Full rebuild of one seller's dashboard from their designs"""
+    designs = DESIGN.decode_many(await async_dynamodb.query_all(
+        DESIGN_TABLE,
+        index_name='DesignSellerGSI',
+        key_condition_expression='seller_email = :email',
+        filter_expression='verification_status = :status',
+        expression_attribute_values={':email': {'S': email}, ':status': {'S': 'Verified'}},
+        client=client
+    ))
+    return _dashboard([design_entry(design) for design in designs])
+
+
+def _load(email: str, client=None) -> Optional[Tuple[int, dict]]:
+    client = client or dynamodb_service._get_dynamodb_client()
+    item = client.get_item(TableName=AGGREGATE_TABLE, Key=_key(email)).get('Item')
+    if item is None:
+        return None
+    return int(item['version']['N']), json.loads(zlib.decompress(item['dashboard']['B']))
+
+
+def _save(email: str, dashboard: dict, version: int, client=None):
+    """Store `dashboard` as `version`; fails with ConditionalCheckFailedException if another writer got there first"""
+    client = client or dynamodb_service._get_dynamodb_client()
+    client.put_item(
+        TableName=AGGREGATE_TABLE,
+        Item={
+            **_key(email),
+            'dashboard': {'B': zlib.compress(json.dumps(dashboard, separators=(',', ':')).encode())},
+            'version': {'N': str(version)},
+            'updated_at': {'S': str(datetime.now())}
+        },
+        ConditionExpression='attribute_not_exists(pk) OR version = :previous',
+        ExpressionAttributeValues={':previous': {'N': str(version - 1)}}
+    )
+
+
+def _is_conflict(error: ClientError) -> bool:
+    return error.response['Error']['Code'] == 'ConditionalCheckFailedException'
+
+
+async def get_dashboard(email: str, client=None) -> dict:
+    """The seller's dashboard: {'currentPeriod': unpaid totals, 'designs': entries by sales}"""
+    stored = await run_blocking(_load, email, client)
+    if stored is not None:
+        return stored[1]
+    # First visit since the document was introduced: build and publish version 1
+    dashboard = await build(email, client)
+    try:
+        await run_blocking(_save, email, dashboard, 1, client)
+    except ClientError as e:
+        if not _is_conflict(e):
+            raise
+    return dashboard
+
+
+async def refresh_designs(email: str, design_ids: Iterable[str], client=None):
+    """Re-read the given designs and replace their entries (optimistic concurrency)"""
+    design_ids = set(design_ids)
+    if not design_ids:
+        return
+    for _ in range(MAX_UPDATE_ATTEMPTS):
+        stored = await run_blocking(_load, email, client)
+        if stored is None:
+            # Not built yet; the first dashboard read builds it from the design table
+            return
+        version, dashboard = stored
+        designs = DESIGN.decode_many(await async_dynamodb.batch_get_items(
+            DESIGN_TABLE,
+            [{'design_id': {'S': design_id}} for design_id in sorted(design_ids)],
+            consistent_read=True,
+            client=client
+        ))
+        entries = [entry for entry in dashboard['designs'] if entry['id'] not in design_ids]
+        entries.extend(
+            design_entry(design) for design in designs
+            if design['seller_email'] == email and design['verification_status'] == 'Verified'
+        )
+        try:
+            await run_blocking(_save, email, _dashboard(entries), version + 1, client)
+            return
+        except ClientError as e:
+            if not _is_conflict(e):
+                raise
+    raise RuntimeError(f"Sales dashboard update for {email} kept conflicting with concurrent writers")
+
+
+async def record_sales(sold: Iterable[Tuple[dict, int]], client=None):
+    """Refresh the entries of designs ((design item, copies) pairs) that just sold"""
+    by_seller: Dict[str, set] = {}
+    for design, _ in sold:
+        by_seller.setdefault(design['seller_email']['S'], set()).add(design['design_id']['S'])
+    # One conditional write per seller, so sellers are refreshed concurrently
+    results = await asyncio.gather(
+        *(refresh_designs(email, design_ids, client) for email, design_ids in by_seller.items()),
+        return_exceptions=True
+    )
+    failed = [result for result in results if isinstance(result, BaseException)]
+    if failed:
+        raise failed[0]
+
+
+async def rebuild(email: str, client=None):
+    """Replace a seller's dashboard with a full rebuild, e.g. after they were paid"""
+    for _ in range(MAX_UPDATE_ATTEMPTS):
+        stored = await run_blocking(_load, email, client)
+        dashboard = await build(email, client)
+        try:
+            await run_blocking(_save, email, dashboard, stored[0] + 1 if stored else 1, client)
+            return
+        except ClientError as e:
+            if not _is_conflict(e):
+                raise
+    raise RuntimeError(f"Sales dashboard rebuild for {email} kept conflicting with concurrent writers")
@@ -0,0 +1,383 @@
+import asyncio
+import heapq
+import math
+import os
+import re
+import time
+from bisect import bisect_left, insort
+from operator import itemgetter
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from app.services import async_dynamodb
+from app.services.aio import run_blocking
+from app.utils.cache import TTLCache
+
+DESIGN_TABLE = os.getenv('DYNAMODB_DESIGN_TABLE')
+
+# In-process inverted index over verified designs for /design/search keyword matching and
+# /design/suggest typeahead.
+# Title, tag and category tokens map to postings of weighted term frequencies; queries match
+# every token as a word or word prefix and rank with BM25. The index is built from one scan
+# on first use, kept current by design_events on approve/reject/edit in this process, and
+# rebuilt every SEARCH_INDEX_REBUILD_SECONDS to pick up other containers' writes. Rebuilds are
+# awaited by the request that finds the index stale: under Mangum the event loop is frozen
+# between invocations, so a background task would never reliably finish.
+REBUILD_SECONDS = float(os.getenv('SEARCH_INDEX_REBUILD_SECONDS', '600'))
+FIELD_WEIGHTS = {'title': 2.0, 'tags': 1.0, 'category': 1.0}
+K1 = 1.2
+B = 0.75
+# Prefix matches count for less than whole words; very short prefixes stop expanding after MAX_EXPANSIONS terms
+PREFIX_WEIGHT = 0.5
+MAX_EXPANSIONS = 64
+# Broad terms (a category name, a two-letter prefix) touch thousands of postings, so ranked
+# results are memoized per index version; any add or remove starts a new version
+RESULT_CACHE_ENTRIES = int(os.getenv('SEARCH_RESULT_CACHE_ENTRIES', '512'))
+# Typeahead phrases: whole titles, tags and category names, reachable from the start of any
+# of their words and ranked by the sales of the designs that use them
+SUGGEST_PHRASE_WORDS = 8
+SUGGEST_KIND_ORDER = ('category', 'title', 'tags')
+
+_TOKEN = re.compile(r'[^\W_]+')
+
+
+def tokenize(text: str) -> List[str]:
+    return _TOKEN.findall(text.lower())
+
+
+class SuggestionIndex:
+    """Sorted (word suffix, phrase) array over normalized phrases, with popularity per phrase"""
+
+    def __init__(self):
+        self.keys: List[Tuple[str, str]] = []
+        self.labels: Dict[str, str] = {}
+        self.sources: Dict[str, Dict[Tuple[str, str], float]] = {}
+        self.scores: Dict[str, float] = {}
+        self.design_phrases: Dict[str, List[str]] = {}
+        self.deferred = False
+
+    @staticmethod
+    def _suffixes(phrase: str) -> List[str]:
+        words = phrase.split(' ')
+        return [' '.join(words[start:]) for start in range(len(words))]
+
+    def add(self, design_id: str, phrases: Iterable[Tuple[str, str]], weight: float):
+        """Record (kind, text) phrases of one design; call remove first when replacing"""
+        added = []
+        for kind, text in phrases:
+            phrase = ' '.join(tokenize(text)[:SUGGEST_PHRASE_WORDS])
+            if not phrase:
+                continue
+            sources = self.sources.get(phrase)
+            if sources is None:
+                sources = self.sources[phrase] = {}
+                self.labels[phrase] = text.strip()
+                self.scores[phrase] = 0.0
+                for suffix in self._suffixes(phrase):
+                    if self.deferred:
+                        self.keys.append((suffix, phrase))
+                    else:
+                        insort(self.keys, (suffix, phrase))
+            if (design_id, kind) not in sources:
+                sources[(design_id, kind)] = weight
+                self.scores[phrase] += weight
+                # Title "Floral" in category "floral" is one phrase with two sources
+                if phrase not in added:
+                    added.append(phrase)
+        if added:
+            self.design_phrases[design_id] = added
+
+    def remove(self, design_id: str) -> bool:
+        """Drop a design's phrases; False when it had none"""
+        phrases = self.design_phrases.pop(design_id, None)
+        if phrases is None:
+            return False
+        for phrase in phrases:
+            sources = self.sources[phrase]
+            for source in [source for source in sources if source[0] == design_id]:
+                self.scores[phrase] -= sources.pop(source)
+            if not sources:
+                del self.sources[phrase], self.labels[phrase], self.scores[phrase]
+                for suffix in self._suffixes(phrase):
+                    del self.keys[bisect_left(self.keys, (suffix, phrase))]
+        return True
+
+    def finish_load(self):
+        self.keys.sort()
+        self.deferred = False
+
+    def complete(self, prefix: str, limit: int) -> List[dict]:
+        """Most popular phrases with a word starting with `prefix` (matched as normalized words)"""
+        prefix = ' '.join(tokenize(prefix))
+        if not prefix:
+            return []
+        # Every key starting with the prefix sorts between (prefix,) and (prefix + U+10FFFF,)
+        matches = self.keys[bisect_left(self.keys, (prefix,)):bisect_left(self.keys, (prefix + '\U0010ffff',))]
+        scores = self.scores
+        best = heapq.nlargest(limit, dict.fromkeys(phrase for _, phrase in matches), key=scores.__getitem__)
+        return [
+            {
+                'text': self.labels[phrase],
+                'type': next(kind for kind in SUGGEST_KIND_ORDER if any(source[1] == kind for source in self.sources[phrase]))
+            }
+            for phrase in best
+        ]
+
+
+class SearchIndex:
+    """Postings, document lengths and a sorted vocabulary for prefix lookups"""
+
+    def __init__(self):
+        self.postings: Dict[str, Dict[str, float]] = {}
+        self.doc_terms: Dict[str, Dict[str, float]] = {}
+        self.doc_lengths: Dict[str, float] = {}
+        self.vocabulary: List[str] = []
+        self.total_length = 0.0
+        self.built_at = time.monotonic()
+        self.version = 0
+        self._results = TTLCache(max_entries=RESULT_CACHE_ENTRIES, ttl=REBUILD_SECONDS)
+        self.suggestions = SuggestionIndex()
+        self._deferred = False
+
+    def __len__(self) -> int:
+        return len(self.doc_terms)
+
+    def __contains__(self, design_id: str) -> bool:
+        return design_id in self.doc_terms
+
+    def load(self, designs: Iterable[dict]):
+        """Bulk add for a fresh index: the sorted arrays are sorted once at the end"""
+        self._deferred = self.suggestions.deferred = True
+        for design in designs:
+            self.add(design)
+        self.vocabulary.sort()
+        self.suggestions.finish_load()
+        self._deferred = False
+
+    def add(self, design: dict):
+        """Index a raw design item (design_id, title, tags, category, total_sold), replacing any earlier copy"""
+        design_id = design['design_id']['S']
+        self.remove(design_id)
+        self.suggestions.add(
+            design_id,
+            [('title', design.get('title', {}).get('S', '')), ('category', design.get('category', {}).get('S', ''))]
+            + [('tags', tag) for tag in design.get('tags', {}).get('S', '').split(',')],
+            1.0 + float(design.get('total_sold', {}).get('N', '0'))
+        )
+        # The suggestions changed even if the design has no searchable terms
+        self.version += 1
+        terms: Dict[str, float] = {}
+        for field, weight in FIELD_WEIGHTS.items():
+            for token in tokenize(design.get(field, {}).get('S', '')):
+                terms[token] = terms.get(token, 0.0) + weight
+        if not terms:
+            return
+        for term, frequency in terms.items():
+            postings = self.postings.get(term)
+            if postings is None:
+                postings = self.postings[term] = {}
+                if self._deferred:
+                    self.vocabulary.append(term)
+                else:
+                    insort(self.vocabulary, term)
+            postings[design_id] = frequency
+        self.doc_terms[design_id] = terms
+        self.doc_lengths[design_id] = sum(terms.values())
+        self.total_length += self.doc_lengths[design_id]
+
+    def remove(self, design_id: str):
+        if self.suggestions.remove(design_id):
+            self.version += 1
+        terms = self.doc_terms.pop(design_id, None)
+        if terms is None:
+            return
+        self.total_length -= self.doc_lengths.pop(design_id)
+        self.version += 1
+        for term in terms:
+            postings = self.postings[term]
+            del postings[design_id]
+            if not postings:
+                del self.postings[term]
+                del self.vocabulary[bisect_left(self.vocabulary, term)]
+
+    def _expand(self, token: str) -> List[str]:
+        start = bisect_left(self.vocabulary, token)
+        terms = []
+        for term in self.vocabulary[start:start + MAX_EXPANSIONS]:
+            if not term.startswith(token):
+                break
+            terms.append(term)
+        return terms
+
+    def search(self, query: str, limit: int) -> List[Tuple[str, float]]:
+        """Top `limit` (design_id, score) pairs matching every query token, best first"""
+        tokens = tuple(dict.fromkeys(tokenize(query)))
+        if not tokens or not self.doc_terms:
+            return []
+        cache_key = (self.version, tokens, limit)
+        hits = self._results.get(cache_key)
+        if hits is None:
+            hits = self._rank(tokens, limit)
+            self._results.set(cache_key, hits)
+        return hits
+
+    def suggest(self, prefix: str, limit: int) -> List[dict]:
+        """Typeahead completions for a partial query, most popular first"""
+        cache_key = (self.version, 'suggest', ' '.join(tokenize(prefix)), limit)
+        suggestions = self._results.get(cache_key)
+        if suggestions is None:
+            suggestions = self.suggestions.complete(prefix, limit)
+            self._results.set(cache_key, suggestions)
+        return suggestions
+
+    def _rank(self, tokens: Tuple[str, ...], limit: int) -> List[Tuple[str, float]]:
+        doc_count = len(self.doc_terms)
+        average_length = self.total_length / doc_count
+
+        # score = weight * tf * (K1 + 1) / (tf + K1 * (1 - B + B * length / average_length))
+        base = K1 * (1 - B)
+        slope = K1 * B / average_length
+        lengths = self.doc_lengths
+        per_token: List[Dict[str, float]] = []
+        for token in tokens:
+            scores: Dict[str, float] = {}
+            for term in self._expand(token):
+                postings = self.postings[term]
+                idf = math.log(1 + (doc_count - len(postings) + 0.5) / (len(postings) + 0.5))
+                weight = idf * (K1 + 1) * (1.0 if term == token else PREFIX_WEIGHT)
+                term_scores = {
+                    design_id: weight * frequency / (frequency + base + slope * lengths[design_id])
+                    for design_id, frequency in postings.items()
+                }
+                if not scores:
+                    scores = term_scores
+                    continue
+                for design_id, score in term_scores.items():
+                    if score > scores.get(design_id, 0.0):
+                        scores[design_id] = score
+            if not scores:
+                return []
+            per_token.append(scores)
+
+        if len(per_token) == 1:
+            totals = per_token[0]
+        else:
+            per_token.sort(key=len)
+            totals = {
+                design_id: sum(scores[design_id] for scores in per_token)
+                for design_id in per_token[0]
+                if all(design_id in scores for scores in per_token[1:])
+            }
+        return sorted(heapq.nlargest(limit, totals.items(), key=itemgetter(1)), key=lambda hit: (-hit[1], hit[0]))
+
+
+_index: Optional[SearchIndex] = None
+# At most one build in flight; concurrent cold-start requests all wait on it
+_build_task: Optional[asyncio.Task] = None
+# Designs changed while a build was scanning; replayed onto the new index before it goes live
+_changed_during_build: Optional[Set[str]] = None
+
+
+def _build_index(items: List[dict]) -> SearchIndex:
+    index = SearchIndex()
+    index.load(items)
+    return index
+
+
+async def _build(client=None) -> SearchIndex:
+    global _index, _changed_during_build
+    _changed_during_build = set()
+    try:
+        items = await async_dynamodb.parallel_scan(
+            DESIGN_TABLE,
+            filter_expression='verification_status = :status',
+            projection_expression='design_id, title, tags, category, total_sold',
+            expression_attribute_values={':status': {'S': 'Verified'}},
+            client=client
+        )
+        index = await run_blocking(_build_index, items)
+        # From here on writes refresh the new index directly
+        _index = index
+        changed = _changed_during_build
+    finally:
+        _changed_during_build = None
+    await _apply(index, changed, client)
+    return index
+
+
+def _report_failure(task: asyncio.Task):
+    if not task.cancelled() and task.exception() is not None:
+        print(f"Error building search index: {str(task.exception())}")
+
+
+def _start_build(client=None) -> asyncio.Task:
+    global _build_task
+    if _build_task is None or _build_task.done():
+        _build_task = asyncio.create_task(_build(client))
+        _build_task.add_done_callback(_report_failure)
+    return _build_task
+
+
+async def rebuild(client=None) -> SearchIndex:
+    """Build a fresh index from a scan of verified designs and make it live"""
+    return await _start_build(client)
+
+
+async def get_index(client=None) -> SearchIndex:
+    """The live index, built on first use and rebuilt once it is REBUILD_SECONDS old"""
+    index = _index
+    if index is None:
+        return await _start_build(client)
+    if time.monotonic() - index.built_at >= REBUILD_SECONDS:
+        try:
+            return await _start_build(client)
+        except Exception:
+            # Reported by _report_failure; the stale index is still better than no results
+            return index
+    return index
+
+
+async def search(query: str, limit: int, client=None) -> List[str]:
+    """Ids of the best `limit` verified designs for a keyword query"""
+    index = await get_index(client)
+    return [design_id for design_id, _ in index.search(query, limit)]
+
+
+async def suggest(prefix: str, limit: int, client=None) -> List[dict]:
+    """Popularity-ranked completions for a partial query"""
+    index = await get_index(client)
+    return index.suggest(prefix, limit)
+
+
+async def _apply(index: SearchIndex, design_ids: Iterable[str], client=None):
+    design_ids = sorted(set(design_ids))
+    if not design_ids:
+        return
+    items = await async_dynamodb.batch_get_items(
+        DESIGN_TABLE,
+        [{'design_id': {'S': design_id}} for design_id in design_ids],
+        consistent_read=True,
+        client=client
+    )
+    found = {item['design_id']['S']: item for item in items}
+    for design_id in design_ids:
+        item = found.get(design_id)
+        if item is not None and item.get('verification_status', {}).get('S') == 'Verified':
+            index.add(item)
+        else:
+            index.remove(design_id)
+
+
+async def refresh_designs(design_ids: Iterable[str], client=None):
+    """Re-read written designs into the index: verified ones are (re)indexed, the rest dropped"""
+    design_ids = [design_id for design_id in design_ids if design_id]
+    if _changed_during_build is not None:
+        _changed_during_build.update(design_ids)
+    if _index is not None:
+        await _apply(_index, design_ids, client)
+
+
+def reset():
+    """Forget the live index, e.g. between tests"""
+    global _index, _build_task, _changed_during_build
+    _index = None
+    _build_task = None
+    _changed_during_build = None
@@ -0,0 +1,320 @@
+import asyncio
+import os
+from collections import defaultdict
+from decimal import Decimal
+from typing import Dict, Iterable, List, Optional, Tuple
+from botocore.exceptions import ClientError
+from app.services import async_dynamodb
+from app.services import dynamodb as dynamodb_service
+from app.services.aio import run_blocking
+from app.services.batch_loader import BatchLoader
+from app.services.community import CommunityService
+from app.services.payment import PaymentService
+from app.utils.user import get_username_from_email, get_usernames_from_emails
+
+AGGREGATE_TABLE = os.getenv('DYNAMODB_AGGREGATE_TABLE')
+DESIGN_TABLE = os.getenv('DYNAMODB_DESIGN_TABLE')
+
+# Per-seller leaderboard aggregates in the aggregate table, kept current by approvals,
+# rejections and sales instead of being recomputed from every design on each page view.
+# Sellers with at least one verified design carry `board`, which puts them in the sparse
+# LeaderboardGSI sorted by weighted_score; a counter item holds the number of such sellers.
+LEADERBOARD_INDEX = 'LeaderboardGSI'
+BOARD = 'SELLERS'
+SELLER_COUNT_KEY = {'pk': {'S': 'LEADERBOARD'}, 'sk': {'S': 'SELLER_COUNT'}}
+
+# Ranks outside the top list come from score-bucket counters: one item per bucket holding the
+# number of board sellers in it. Scores are multiples of 0.05, so buckets are taken over the
+# score in units of 0.05: exact below 8 units, above that 4 buckets per doubling. A rank is the
+# sum of the (few dozen) higher buckets plus an index query within the seller's own bucket.
+SCORE_UNITS = 20
+BUCKET_PREFIX = 'SCORE_BUCKET#'
+
+_community = CommunityService(None)
+_payments = PaymentService(None)
+
+
+def _entry_key(email: str) -> dict:
+    return {'pk': {'S': f'SELLER#{email}'}, 'sk': {'S': 'LEADERBOARD'}}
+
+
+def design_credits(design: dict) -> int:
+    """Credits a verified design contributes to its seller's leaderboard total"""
+    _, credits = _payments.calculate_payment_and_credits(
+        float(design.get('price', {}).get('N', '0')),
+        design.get('payment_method', {}).get('S', '')
+    )
+    return credits
+
+
+def _bucket(weighted_score: Decimal) -> Tuple[int, int]:
+    """(lowest, highest + 1) score units of the bucket holding a score"""
+    units = max(int(Decimal(weighted_score) * SCORE_UNITS), 0)
+    shift = max(units.bit_length() - 3, 0)
+    lowest = units >> shift << shift
+    return lowest, lowest + (1 << shift)
+
+
+def _bucket_key(lowest: int) -> dict:
+    return {'pk': {'S': 'LEADERBOARD'}, 'sk': {'S': f'{BUCKET_PREFIX}{lowest:015d}'}}
+
+
+def _add_to_bucket(weighted_score: Decimal, delta: int, client):
+    client.update_item(
+        TableName=AGGREGATE_TABLE,
+        Key=_bucket_key(_bucket(weighted_score)[0]),
+        UpdateExpression='ADD sellers :delta',
+        ExpressionAttributeValues={':delta': {'N': str(delta)}}
+    )
+
+
+def _apply(email: str, verified_designs: int, total_sold: int, total_credits: int,
+           username: Optional[str] = None, client=None):
+    """Atomically add deltas to a seller's entry, keeping the board membership, seller count and score buckets in step"""
+    client = client or dynamodb_service._get_dynamodb_client()
+    score = _community.weighted_score(verified_designs, total_sold, total_credits)
+    update_expr = 'ADD verified_designs :designs, total_sold :sold, total_credits :credits, weighted_score :score'
+    values = {
+        ':designs': {'N': str(verified_designs)},
+        ':sold': {'N': str(total_sold)},
+        ':credits': {'N': str(total_credits)},
+        ':score': {'N': str(score)}
+    }
+    sets = []
+    if verified_designs > 0:
+        sets.append('board = :board')
+        values[':board'] = {'S': BOARD}
+    if username:
+        sets.append('username = :username')
+        values[':username'] = {'S': username}
+    if sets:
+        update_expr += ' SET ' + ', '.join(sets)
+
+    old = client.update_item(
+        TableName=AGGREGATE_TABLE,
+        Key=_entry_key(email),
+        UpdateExpression=update_expr,
+        ExpressionAttributeValues=values,
+        ReturnValues='ALL_OLD'
+    ).get('Attributes', {})
+
+    # ALL_OLD is the state right before this ADD, so concurrent updates move the seller between
+    # buckets one after another
+    old_score = Decimal(old.get('weighted_score', {}).get('N', '0'))
+    if 'board' in old and _bucket(old_score) != _bucket(old_score + score):
+        _add_to_bucket(old_score, -1, client)
+        _add_to_bucket(old_score + score, 1, client)
+
+    if verified_designs > 0 and 'board' not in old:
+        _add_seller_count(1, client)
+        _add_to_bucket(old_score + score, 1, client)
+    elif verified_designs < 0 and int(old.get('verified_designs', {}).get('N', '0')) + verified_designs <= 0:
+        # Last verified design gone: leave the board, unless an approval got in first
+        try:
+            left = client.update_item(
+                TableName=AGGREGATE_TABLE,
+                Key=_entry_key(email),
+                UpdateExpression='REMOVE board',
+                ConditionExpression='attribute_exists(board) AND verified_designs <= :zero',
+                ExpressionAttributeValues={':zero': {'N': '0'}},
+                ReturnValues='ALL_NEW'
+            )['Attributes']
+            _add_seller_count(-1, client)
+            _add_to_bucket(Decimal(left['weighted_score']['N']), -1, client)
+        except ClientError as e:
+            if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+                raise
+
+
+def _add_seller_count(delta: int, client):
+    client.update_item(
+        TableName=AGGREGATE_TABLE,
+        Key=SELLER_COUNT_KEY,
+        UpdateExpression='ADD sellers :delta',
+        ExpressionAttributeValues={':delta': {'N': str(delta)}}
+    )
+
+
+async def design_verification_changed(design: dict, was_verified: bool, is_verified: bool, client=None):
+    """A design entered or left Verified: move its designs, sales and credits in or out of the seller's entry"""
+    if was_verified == is_verified:
+        return
+    sign = 1 if is_verified else -1
+    email = design['seller_email']['S']
+    username = await get_username_from_email(email, client or dynamodb_service._get_dynamodb_client()) if is_verified else None
+    await run_blocking(
+        _apply,
+        email,
+        sign,
+        sign * int(design.get('total_sold', {}).get('N', '0')),
+        sign * design_credits(design),
+        username,
+        client
+    )
+
+
+async def record_sales(sold: Iterable[Tuple[dict, int]], client=None):
+    """Add committed sales ((design item, copies) pairs) to the sellers of verified designs"""
+    by_seller: Dict[str, int] = defaultdict(int)
+    for design, copies in sold:
+        if design.get('verification_status', {}).get('S') == 'Verified':
+            by_seller[design['seller_email']['S']] += copies
+    await asyncio.gather(*(
+        run_blocking(_apply, email, 0, copies, 0, None, client)
+        for email, copies in by_seller.items()
+    ))
+
+
+def _decode_entry(item: dict) -> dict:
+    return {
+        'email': item['pk']['S'].split('#', 1)[1],
+        'username': item.get('username', {}).get('S'),
+        'verified_designs': int(item['verified_designs']['N']),
+        'total_sold': int(item['total_sold']['N']),
+        'total_credits': int(item['total_credits']['N']),
+        'weighted_score': Decimal(item['weighted_score']['N'])
+    }
+
+
+def _top(limit: int, client) -> List[dict]:
+    response = client.query(
+        TableName=AGGREGATE_TABLE,
+        IndexName=LEADERBOARD_INDEX,
+        KeyConditionExpression='board = :board',
+        ExpressionAttributeValues={':board': {'S': BOARD}},
+        ScanIndexForward=False,
+        Limit=limit
+    )
+    return [_decode_entry(item) for item in response.get('Items', [])]
+
+
+def _seller_count(client) -> int:
+    item = client.get_item(TableName=AGGREGATE_TABLE, Key=SELLER_COUNT_KEY).get('Item', {})
+    return int(item.get('sellers', {}).get('N', '0'))
+
+
+def _entry(email: str, client) -> Optional[dict]:
+    item = client.get_item(TableName=AGGREGATE_TABLE, Key=_entry_key(email)).get('Item')
+    if item is None or 'board' not in item:
+        return None
+    return _decode_entry(item)
+
+
+def _count_above(weighted_score: Decimal, client) -> int:
+    """Sellers ranked strictly above a score: the higher buckets' counters plus the seller's own bucket"""
+    _, end = _bucket(weighted_score)
+    higher = 0
+    for page in client.get_paginator('query').paginate(
+        TableName=AGGREGATE_TABLE,
+        KeyConditionExpression='pk = :pk AND sk BETWEEN :above AND :last',
+        ExpressionAttributeValues={
+            ':pk': {'S': 'LEADERBOARD'},
+            ':above': _bucket_key(end)['sk'],
+            ':last': {'S': BUCKET_PREFIX + '~'}
+        },
+        ProjectionExpression='sellers'
+    ):
+        higher += sum(max(int(item['sellers']['N']), 0) for item in page.get('Items', []))
+    # Scores are multiples of 1 / SCORE_UNITS, so the next one up bounds the strictly higher scores
+    units = int(Decimal(weighted_score) * SCORE_UNITS)
+    if units + 1 >= end:
+        return higher
+    in_bucket = sum(
+        page['Count']
+        for page in client.get_paginator('query').paginate(
+            TableName=AGGREGATE_TABLE,
+            IndexName=LEADERBOARD_INDEX,
+            KeyConditionExpression='board = :board AND weighted_score BETWEEN :above AND :top',
+            ExpressionAttributeValues={
+                ':board': {'S': BOARD},
+                ':above': {'N': str(Decimal(units + 1) / SCORE_UNITS)},
+                ':top': {'N': str(Decimal(end - 1) / SCORE_UNITS)}
+            },
+            Select='COUNT'
+        )
+    )
+    return higher + in_bucket
+
+
+async def get_leaderboard(current_email: str, limit: int = 50, client=None) -> dict:
+    """Top `limit` sellers with ranks, the current user's entry and rank, and the number of ranked sellers"""
+    client = client or dynamodb_service._get_dynamodb_client()
+    top, total, current = await asyncio.gather(
+        run_blocking(_top, limit, client),
+        run_blocking(_seller_count, client),
+        run_blocking(_entry, current_email, client)
+    )
+    for rank, entry in enumerate(top, 1):
+        entry['rank'] = rank
+    if current is not None and all(entry['email'] != current_email for entry in top):
+        current['rank'] = await run_blocking(_count_above, current['weighted_score'], client) + 1
+    else:
+        current = None
+    return {'top': top, 'current': current, 'total': total}
+
+
+async def rebuild_leaderboard(client=None) -> int:
+    """
+    Recompute every entry from the design table, e.g. after a backfill or to correct drift.
+    Sales recorded while it runs may be overwritten; run it when the store is quiet.
+    """
+    client = client or dynamodb_service._get_dynamodb_client()
+    totals: Dict[str, List[int]] = defaultdict(lambda: [0, 0, 0])
+    for design in await async_dynamodb.parallel_scan(
+        DESIGN_TABLE,
+        filter_expression='verification_status = :status',
+        projection_expression='seller_email, total_sold, price, payment_method',
+        expression_attribute_values={':status': {'S': 'Verified'}},
+        client=client
+    ):
+        seller = totals[design['seller_email']['S']]
+        seller[0] += 1
+        seller[1] += int(design.get('total_sold', {}).get('N', '0'))
+        seller[2] += design_credits(design)
+
+    usernames = await get_usernames_from_emails(totals, BatchLoader(client=client))
+
+    def write():
+        for email, (verified_designs, total_sold, total_credits) in totals.items():
+            client.put_item(
+                TableName=AGGREGATE_TABLE,
+                Item={
+                    **_entry_key(email),
+                    'board': {'S': BOARD},
+                    'username': {'S': usernames[email] or ''},
+                    'verified_designs': {'N': str(verified_designs)},
+                    'total_sold': {'N': str(total_sold)},
+                    'total_credits': {'N': str(total_credits)},
+                    'weighted_score': {'N': str(_community.weighted_score(verified_designs, total_sold, total_credits))}
+                }
+            )
+        buckets: Dict[int, int] = defaultdict(int)
+        for verified_designs, total_sold, total_credits in totals.values():
+            buckets[_bucket(_community.weighted_score(verified_designs, total_sold, total_credits))[0]] += 1
+        for page in client.get_paginator('query').paginate(
+            TableName=AGGREGATE_TABLE,
+            KeyConditionExpression='pk = :pk AND begins_with(sk, :prefix)',
+            ExpressionAttributeValues={':pk': {'S': 'LEADERBOARD'}, ':prefix': {'S': BUCKET_PREFIX}},
+            ProjectionExpression='pk, sk'
+        ):
+            for item in page.get('Items', []):
+                if int(item['sk']['S'][len(BUCKET_PREFIX):]) not in buckets:
+                    client.delete_item(TableName=AGGREGATE_TABLE, Key={'pk': item['pk'], 'sk': item['sk']})
+        for lowest, sellers in buckets.items():
+            client.put_item(TableName=AGGREGATE_TABLE, Item={**_bucket_key(lowest), 'sellers': {'N': str(sellers)}})
+        # Sellers who no longer have verified designs leave the board
+        for page in client.get_paginator('query').paginate(
+            TableName=AGGREGATE_TABLE,
+            IndexName=LEADERBOARD_INDEX,
+            KeyConditionExpression='board = :board',
+            ExpressionAttributeValues={':board': {'S': BOARD}},
+            ProjectionExpression='pk, sk'
+        ):
+            for item in page.get('Items', []):
+                if item['pk']['S'].split('#', 1)[1] not in totals:
+                    client.delete_item(TableName=AGGREGATE_TABLE, Key={'pk': item['pk'], 'sk': item['sk']})
+        client.put_item(TableName=AGGREGATE_TABLE, Item={**SELLER_COUNT_KEY, 'sellers': {'N': str(len(totals))}})
+
+    await run_blocking(write)
+    return len(totals)
+
@@ -1,16 +1,9 @@
-import boto3
 from botocore.exceptions import ClientError
 from fastapi import UploadFile
 import json
 from datetime import datetime
 import os
-
-s3_client = boto3.client(
-    's3',
-    aws_access_key_id=os.getenv('AWS_ACCESS_KEY_ID'),
-    aws_secret_access_key=os.getenv('AWS_SECRET_ACCESS_KEY'),
-    region_name=os.getenv('AWS_REGION')
-)
+from app.services.aws_clients import get_s3_client
 
 DESIGN_BUCKET = os.getenv('S3_DESIGN_BUCKET_NAME')
 THUMBNAIL_BUCKET = os.getenv('S3_THUMBNAIL_BUCKET_NAME')
@@ -61,7 +54,7 @@ async def upload_to_s3(file: UploadFile, bucket: str, path: str, content_type: s
     try:
         file_content = await file.read()
         
-        s3_client.put_object(
+        get_s3_client().put_object(
             Bucket=bucket,
             Key=path,
             Body=file_content,
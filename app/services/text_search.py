@@ -1,11 +1,14 @@
 from typing import List, Optional
-import boto3
 import os
 import json
 from fastapi import HTTPException
 from .dynamodb import _get_dynamodb_client
+from .aws_clients import get_lambda_client
+from .aio import run_blocking
 import logging
-from app.utils.user import get_username_from_email
+from app.utils.user import get_usernames_from_emails
+from app.services.batch_loader import BatchLoader
+from app.services import design_cache
 
 logger = logging.getLogger(__name__)
 
@@ -136,56 +139,55 @@ class TextSearchService:
 
     async def _call_lambda(self, payload: dict) -> dict:
         try:
-            lambda_client = boto3.client('lambda',region_name=self.aws_region)
-            response = lambda_client.invoke(
-                FunctionName=self.lambda_endpoint,
-                InvocationType='RequestResponse',
-                Payload=json.dumps(payload)
-            )
-            
-            return json.loads(response['Payload'].read())
+            def invoke():
+                response = get_lambda_client().invoke(
+                    FunctionName=self.lambda_endpoint,
+                    InvocationType='RequestResponse',
+                    Payload=json.dumps(payload)
+                )
+                return json.loads(response['Payload'].read())
+
+            # Search invocations can take seconds, so keep them off the event loop
+            return await run_blocking(invoke)
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"Lambda invocation failed: {str(e)}")
 
     async def _get_design_details(self, similar_designs: List[dict]) -> List[dict]:
         try:
+            # One batched read for the designs, one for their sellers
+            loader = BatchLoader(client=self.dynamodb)
+            items = await design_cache.load_designs(
+                (design['hash'] for design in similar_designs),
+                loader
+            )
+            # Only verified designs are returned
+            items = [
+                item for item in items
+                if item and item.get('verification_status', {}).get('S') == 'Verified'
+            ]
+            usernames = await get_usernames_from_emails(
+                (item['seller_email']['S'] for item in items),
+                loader
+            )
+
             design_details = []
-            for design in similar_designs:
-                design_id = design['hash']
-                response = self.dynamodb.get_item(
-                    TableName=self.design_table,
-                    Key={'design_id': {'S': design_id}}
-                )
-                
-                if 'Item' in response:
-                    item = response['Item']
-                    # Check if design is verified
-                    if item.get('verification_status', {}).get('S') != 'Verified':
-                        continue
-                    
-                    metadata = json.loads(item.get('metadata', {}).get('S', '{}'))
-                    
-                    # Get seller username
-                    seller_username = await get_username_from_email(
-                        item['seller_email']['S'],
-                        self.dynamodb
-                    )
-                    
-                    design_details.append({
-                        'id': item['design_id']['S'],
-                        'title': item['title']['S'],
-                        'thumbnail_url': item['thumbnail_url']['S'],
-                        'price': float(item['price']['N']),
-                        'category': item['category']['S'],
-                        'tags': item.get('tags', {}).get('S', '').split(','),
-                        'seller_username': seller_username,
-                        'file_type': metadata.get('fileType', '').upper(),
-                        'resolution': f"{metadata.get('dimensions', {}).get('width', '')}x{metadata.get('dimensions', {}).get('height', '')}",
-                        'layers': metadata.get('layers', 0),
-                        'is_color_matching': item.get('is_color_matching', {}).get('BOOL', False),
-                        'color_matching_design_id': item.get('color_matching_design_id', {}).get('S', '')
-                    })
-                    print("These are the design details: ", design_details)
+            for item in items:
+                metadata = json.loads(item.get('metadata', {}).get('S', '{}'))
+
+                design_details.append({
+                    'id': item['design_id']['S'],
+                    'title': item['title']['S'],
+                    'thumbnail_url': item['thumbnail_url']['S'],
+                    'price': float(item['price']['N']),
+                    'category': item['category']['S'],
+                    'tags': item.get('tags', {}).get('S', '').split(','),
+                    'seller_username': usernames[item['seller_email']['S']],
+                    'file_type': metadata.get('fileType', '').upper(),
+                    'resolution': f"{metadata.get('dimensions', {}).get('width', '')}x{metadata.get('dimensions', {}).get('height', '')}",
+                    'layers': metadata.get('layers', 0),
+                    'is_color_matching': item.get('is_color_matching', {}).get('BOOL', False),
+                    'color_matching_design_id': item.get('color_matching_design_id', {}).get('S', '')
+                })
             return design_details
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"Failed to fetch design details: {str(e)}")
\ No newline at end of file
@@ -1,21 +1,96 @@
-import boto3
+import asyncio
 import os
+import time
 import uuid
+from collections import Counter
 from datetime import datetime
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Tuple
+from app.services.aws_clients import get_dynamodb_client
+from app.services import async_dynamodb
+from app.services import design_cache
+from app.services import entitlements
+from app.services import sales_dashboard
+from app.services import seller_stats
+from app.services.payment import PaymentService
+from app.services import dynamodb as dynamodb_service
+from app.services.aio import run_blocking
+from app.utils.pagination import encode_cursor, parse_cursor
+from botocore.exceptions import ClientError
+from fastapi import HTTPException
 
 TRANSACTION_TABLE = os.getenv('DYNAMODB_TRANSACTION_TABLE')
 DESIGN_TABLE = os.getenv('DYNAMODB_DESIGN_TABLE')
+USER_TABLE = os.getenv('DYNAMODB_USER_TABLE')
+
+# TransactWriteItems accepts at most 100 actions per call
+TRANSACT_WRITE_MAX_ITEMS = int(os.getenv('TRANSACT_WRITE_MAX_ITEMS', '100'))
+CHECKOUT_NAMESPACE = uuid.UUID('6f1b6c2e-3d0a-5b8e-9c41-2a7e5d9f0b13')
+# Paid checkouts that referenced designs which no longer exist; the rest of the cart is applied
+REVIEW_STATUS = 'NEEDS_REVIEW'
+SALE_STATUSES = ('COMPLETED', REVIEW_STATUS)
+MAX_CHECKOUT_ATTEMPTS = 3
+
+# Checkout latency by cart size, for the admin stats endpoint
+CART_SIZE_BUCKETS = (1, 5, 20, 100)
+_checkout_latency: Dict[str, Dict[str, float]] = {}
+
+
+def _cart_bucket(size: int) -> str:
+    lower = 1
+    for upper in CART_SIZE_BUCKETS:
+        if size <= upper:
+            return str(upper) if lower == upper else f"{lower}-{upper}"
+        lower = upper + 1
+    return f"{lower}+"
+
+
+def _record_checkout_latency(cart_size: int, seconds: float):
+    stats = _checkout_latency.setdefault(_cart_bucket(cart_size), {'count': 0, 'total_ms': 0.0, 'max_ms': 0.0})
+    ms = seconds * 1000
+    stats['count'] += 1
+    stats['total_ms'] += ms
+    stats['max_ms'] = max(stats['max_ms'], ms)
+
+
+def checkout_stats() -> Dict[str, Dict[str, float]]:
+    """Checkout count, mean and max latency (ms) per cart size bucket in this process"""
+    return {
+        bucket: {
+            'count': stats['count'],
+            'avg_ms': round(stats['total_ms'] / stats['count'], 2),
+            'max_ms': round(stats['max_ms'], 2)
+        }
+        for bucket, stats in _checkout_latency.items()
+    }
+
+class MissingDesigns(Exception):
+    """A TransactWriteItems call was cancelled only because these designs do not exist"""
+
+    def __init__(self, design_ids: List[str]):
+        super().__init__(f"Designs not found: {', '.join(design_ids)}")
+        self.design_ids = design_ids
+
 
 class TransactionService:
     def __init__(self):
-        self.dynamodb = boto3.client('dynamodb', region_name='ap-south-1')
+        self.dynamodb = get_dynamodb_client()
+        self.payments = PaymentService(self.dynamodb)
         
     async def create_transaction(self, cart_items: list, buyer_email: str, razorpay_payment_id: str, status: str = 'COMPLETED') -> Dict[str, Any]:
-        """Create a new transaction record and update design sold counts if status is COMPLETED"""
+        """
+        Record a checkout and, if it is COMPLETED, increment total_sold for its designs, grant
+        the buyer download entitlements and credit the sellers' payout ledgers. The record, the
+        buyer's transaction_count and the per-design writes are committed with TransactWriteItems. Retrying with the same
+        razorpay_payment_id returns the original transaction and only applies the writes that
+        have not been committed yet. Designs that no longer exist are skipped and listed in
+        missing_designs on a NEEDS_REVIEW record.
+        """
         try:
+            started = time.perf_counter()
+            status = (status or 'COMPLETED').upper()
             amount = sum(float(item.get('price', 0)) for item in cart_items)
-            transaction_id = str(uuid.uuid4())
+            # Deterministic id: a retried checkout for the same payment hits the same record
+            transaction_id = str(uuid.uuid5(CHECKOUT_NAMESPACE, razorpay_payment_id))
             
             # Prepare designs list
             designs = []
@@ -25,47 +100,137 @@ class TransactionService:
                         'design_id': {'S': item['id']},
                         'title': {'S': item.get('title', '')},
                         'price': {'N': str(item['price'])},
-                        'thumbnail_url': {'S': item.get('thumbnail_url', '')}
+                        'thumbnail_url': {'S': item.get('thumbnail_url', '')},
+                        'is_color_matching': {'BOOL': bool(item.get('is_color_matching', False))},
+                        'color_matching_design_id': {'S': item.get('color_matching_design_id') or ''}
                     }
                 }
                 designs.append(design_item)
             
+            sold = await self._sold_counts(designs) if status == 'COMPLETED' else []
+            # The payment is already captured, so designs that no longer exist are left out and
+            # flagged on the record for review instead of failing the checkout
+            missing = [design_id for design_id, _, _, stored in sold if stored is None]
+            sold = [line for line in sold if line[3] is not None]
+            chunks = self._chunk_increments(sold)
+
             # Create transaction record
+            now = str(datetime.now())
             transaction_item = {
                 'transaction_id': {'S': transaction_id},
                 'buyer_email': {'S': buyer_email},
                 'designs': {'L': designs},
                 'total_amount': {'N': str(amount)},
-                'status': {'S': status.upper()},
+                'status': {'S': status},
                 'razorpay_payment_id': {'S': razorpay_payment_id},
-                'created_at': {'S': str(datetime.now())},
-                'updated_at': {'S': str(datetime.now())}
+                'sold_chunk_count': {'N': str(len(chunks))},
+                'created_at': {'S': now},
+                'updated_at': {'S': now}
             }
+            if chunks:
+                transaction_item['sold_chunks'] = {'NS': ['0']}
 
-            self.dynamodb.put_item(
-                TableName=TRANSACTION_TABLE,
-                Item=transaction_item
-            )
-
-            # If status is COMPLETED, update the sold count for each design
-            if status.upper() == 'COMPLETED':
-                print("Updating sold counts for designs...")
-                for item in cart_items:
-                    try:
-                        # Increment the total_sold for each design
-                        self.dynamodb.update_item(
-                            TableName=DESIGN_TABLE,
-                            Key={'design_id': {'S': item['id']}},
-                            UpdateExpression='ADD total_sold :inc SET updated_at = :time',
-                            ExpressionAttributeValues={
-                                ':inc': {'N': '1'},
-                                ':time': {'S': str(datetime.now())}
-                            }
-                        )
-                        print(f"Updated sold count for design: {item['id']}")
-                    except Exception as design_error:
-                        print(f"Error updating sold count for design {item['id']}: {str(design_error)}")
+            # First chunk: the record itself, the buyer's counter and as many design writes as fit
+            count_buyer = True
+            recorded = False
+            for _ in range(MAX_CHECKOUT_ATTEMPTS):
+                if missing:
+                    status = REVIEW_STATUS
+                    transaction_item['status'] = {'S': status}
+                    transaction_item['missing_designs'] = {'SS': sorted(set(missing))}
+                # The chunk plan is stored so a retry replays exactly these chunks, even if designs
+                # were deleted or changed in the meantime
+                transaction_item['sold_chunk_designs'] = self._chunk_plan(chunks)
+                first = [
+                    {
+                        'Put': {
+                            'TableName': TRANSACTION_TABLE,
+                            'Item': transaction_item,
+                            'ConditionExpression': 'attribute_not_exists(transaction_id)'
+                        }
+                    }
+                ]
+                if count_buyer:
+                    first.append({
+                        'Update': {
+                            'TableName': USER_TABLE,
+                            'Key': {'email': {'S': buyer_email}},
+                            'UpdateExpression': 'ADD transaction_count :one',
+                            'ConditionExpression': 'attribute_exists(email)',
+                            'ExpressionAttributeValues': {':one': {'N': '1'}}
+                        }
+                    })
+                try:
+                    await run_blocking(
+                        self._transact_write,
+                        first + self._sale_actions(chunks[0] if chunks else [], buyer_email, transaction_id, now)
+                    )
+                    break
+                except MissingDesigns as e:
+                    # Deleted between the read and the write
+                    missing.extend(e.design_ids)
+                    chunks[0] = [line for line in chunks[0] if line[0] not in e.design_ids]
+                except ClientError as e:
+                    codes = self._cancellation_codes(e)
+                    if codes[:1] == ['ConditionalCheckFailed']:
+                        recorded = True
+                        break
+                    if count_buyer and codes[1:2] == ['ConditionalCheckFailed']:
+                        # No user item to count on; record the checkout without creating a stub user
+                        print(f"No user item for buyer {buyer_email}; transaction_count not updated")
+                        count_buyer = False
                         continue
+                    raise
+            else:
+                raise RuntimeError(f"Checkout {transaction_id} kept failing on designs removed mid-write")
+
+            if recorded:
+                # Retry of a payment that is already recorded: resume from the stored record
+                print(f"Transaction {transaction_id} already recorded for payment {razorpay_payment_id}")
+                stored = (await run_blocking(
+                    self.dynamodb.get_item,
+                    TableName=TRANSACTION_TABLE,
+                    Key={'transaction_id': {'S': transaction_id}},
+                    ConsistentRead=True
+                ))['Item']
+                status = stored['status']['S']
+                now = stored['created_at']['S']
+                amount = float(stored['total_amount']['N'])
+                sold = await self._sold_counts(stored['designs']['L']) if status in SALE_STATUSES else []
+                if 'sold_chunk_designs' in stored:
+                    chunks, gone = self._replay_chunks(stored['sold_chunk_designs'], sold)
+                else:
+                    # Recorded before chunk plans were stored
+                    chunks = self._chunk_increments([line for line in sold if line[3] is not None])
+                    gone = [[] for _ in chunks]
+                sold = [line for line in sold if line[3] is not None]
+                applied = {int(n) for n in stored.get('sold_chunks', {}).get('NS', [])}
+                pending = [index for index in range(len(chunks)) if index not in applied]
+                committed = []
+            else:
+                committed = list(chunks[0]) if chunks else []
+                pending = range(1, len(chunks))
+                gone = [[] for _ in chunks]
+
+            # Remaining chunks are independent of each other, so they are committed concurrently.
+            # Each one marks itself on the record, which makes it apply at most once.
+            results = await asyncio.gather(*(
+                self._commit_chunk(transaction_id, index, chunks[index], buyer_email, now, gone[index])
+                for index in pending
+            ), return_exceptions=True)
+            for result in results:
+                if not isinstance(result, BaseException):
+                    applied_lines, chunk_missing = result
+                    committed.extend(applied_lines)
+                    if chunk_missing:
+                        status = REVIEW_STATUS
+
+            design_cache.invalidate(*(design_id for design_id, _, _, _ in sold))
+            await self._record_sales(committed)
+            failed = [result for result in results if isinstance(result, BaseException)]
+            if failed:
+                raise failed[0]
+            _record_checkout_latency(len(designs), time.perf_counter() - started)
             
             return {
                 'transaction_id': transaction_id,
@@ -77,6 +242,195 @@ class TransactionService:
             print(f"Error creating transaction: {str(e)}")
             raise e
 
+    async def _record_sales(self, committed: List[tuple]):
+        """Feed committed sales to the seller leaderboard and dashboards (derived data: errors are logged, not raised)"""
+        sales = [(stored, count) for _, count, _, stored in committed if stored]
+        if not sales:
+            return
+        leaderboard, dashboards = await asyncio.gather(
+            seller_stats.record_sales(sales, self.dynamodb),
+            sales_dashboard.record_sales(sales, self.dynamodb),
+            return_exceptions=True
+        )
+        if isinstance(leaderboard, BaseException):
+            print(f"Error recording sales for leaderboard: {str(leaderboard)}")
+        if isinstance(dashboards, BaseException):
+            print(f"Error refreshing sales dashboards: {str(dashboards)}")
+
+    async def _sold_counts(self, designs: List[dict]) -> List[tuple]:
+        """
+        (design_id, copies, design map, stored design) per distinct design, grouped by seller.
+        A transaction may not touch the same item twice, so repeated cart lines are merged.
+        Designs are read consistently, not from the design cache: ledger credits depend on the
+        current verification status, price and payment method.
+        """
+        copies = Counter(d['M']['design_id']['S'] for d in designs)
+        first_seen = {}
+        for d in designs:
+            first_seen.setdefault(d['M']['design_id']['S'], d['M'])
+        design_ids = sorted(copies)
+        items = await async_dynamodb.batch_get_items(
+            DESIGN_TABLE,
+            [{'design_id': {'S': design_id}} for design_id in design_ids],
+            consistent_read=True,
+            client=self.dynamodb
+        ) if design_ids else []
+        stored = {item['design_id']['S']: item for item in items}
+        sold = [
+            (design_id, copies[design_id], first_seen[design_id], stored.get(design_id))
+            for design_id in design_ids
+        ]
+        return sorted(sold, key=lambda line: (self._seller(line), line[0]))
+
+    @staticmethod
+    def _seller(line: tuple) -> str:
+        return (line[3] or {}).get('seller_email', {}).get('S', '')
+
+    def _chunk_increments(self, sold: List[tuple]) -> List[List[tuple]]:
+        """Split sold designs so every TransactWriteItems call stays within its item limit"""
+        # Each design takes two actions (sold count and entitlement) and each seller in a chunk
+        # one more (payout ledger). The first call also carries the record and the buyer
+        # counter; later ones a chunk marker.
+        chunks, chunk, sellers = [], [], set()
+        capacity = TRANSACT_WRITE_MAX_ITEMS - 2
+        used = 0
+        for line in sold:
+            seller = self._seller(line)
+            cost = 2 + (1 if seller and seller not in sellers else 0)
+            if chunk and used + cost > capacity:
+                chunks.append(chunk)
+                chunk, sellers = [], set()
+                capacity = TRANSACT_WRITE_MAX_ITEMS - 1
+                used = 0
+                cost = 2 + (1 if seller else 0)
+            chunk.append(line)
+            if seller:
+                sellers.add(seller)
+            used += cost
+        if chunk:
+            chunks.append(chunk)
+        return chunks
+
+    @staticmethod
+    def _chunk_plan(chunks: List[List[tuple]]) -> dict:
+        """Design ids of every chunk, as stored on the transaction record"""
+        return {'L': [{'L': [{'S': line[0]} for line in chunk]} for chunk in chunks]}
+
+    @staticmethod
+    def _replay_chunks(plan: dict, sold: List[tuple]) -> Tuple[List[List[tuple]], List[List[str]]]:
+        """Chunks of a stored plan with current design state, and each chunk's designs that no longer exist"""
+        lines = {line[0]: line for line in sold if line[3] is not None}
+        chunks, gone = [], []
+        for entry in plan['L']:
+            design_ids = [design_id['S'] for design_id in entry['L']]
+            chunks.append([lines[design_id] for design_id in design_ids if design_id in lines])
+            gone.append([design_id for design_id in design_ids if design_id not in lines])
+        return chunks, gone
+
+    def _sale_actions(self, chunk: List[tuple], buyer_email: str, transaction_id: str, now: str) -> List[dict]:
+        actions = []
+        by_seller: Dict[str, List[tuple]] = {}
+        for design_id, count, design, stored in chunk:
+            actions.append(self._increment_action(design_id, count, now))
+            actions.append(entitlements.entitlement_action(buyer_email, design, transaction_id, now))
+            if stored and stored.get('verification_status', {}).get('S') == 'Verified':
+                by_seller.setdefault(stored['seller_email']['S'], []).append((stored, count))
+        for seller_email, sales in by_seller.items():
+            actions.append(self.payments.payout_action(seller_email, sales, now))
+        return actions
+
+    @staticmethod
+    def _increment_action(design_id: str, count: int, now: str) -> dict:
+        return {
+            'Update': {
+                'TableName': DESIGN_TABLE,
+                'Key': {'design_id': {'S': design_id}},
+                'UpdateExpression': 'ADD total_sold :inc SET updated_at = :time',
+                'ConditionExpression': 'attribute_exists(design_id)',
+                'ExpressionAttributeValues': {
+                    ':inc': {'N': str(count)},
+                    ':time': {'S': now}
+                }
+            }
+        }
+
+    @staticmethod
+    def _chunk_marker(transaction_id: str, index: int, missing: List[str]) -> dict:
+        marker = {
+            'Update': {
+                'TableName': TRANSACTION_TABLE,
+                'Key': {'transaction_id': {'S': transaction_id}},
+                'UpdateExpression': 'ADD sold_chunks :chunk',
+                'ConditionExpression': 'NOT contains(sold_chunks, :index)',
+                'ExpressionAttributeValues': {
+                    ':chunk': {'NS': [str(index)]},
+                    ':index': {'N': str(index)}
+                }
+            }
+        }
+        if missing:
+            update = marker['Update']
+            update['UpdateExpression'] += ', missing_designs :missing SET #status = :review'
+            update['ExpressionAttributeNames'] = {'#status': 'status'}
+            update['ExpressionAttributeValues'].update({
+                ':missing': {'SS': sorted(set(missing))},
+                ':review': {'S': REVIEW_STATUS}
+            })
+        return marker
+
+    async def _commit_chunk(self, transaction_id: str, index: int, chunk: List[tuple],
+                            buyer_email: str, now: str, missing: Optional[List[str]] = None) -> Tuple[List[tuple], List[str]]:
+        """
+        Apply one later chunk with its marker; returns the lines applied and the designs found missing.
+        A chunk another attempt marked first counts as already applied and returns no lines.
+        """
+        missing = list(missing or [])
+        for _ in range(MAX_CHECKOUT_ATTEMPTS):
+            try:
+                await run_blocking(
+                    self._transact_write,
+                    [self._chunk_marker(transaction_id, index, missing)] + self._sale_actions(chunk, buyer_email, transaction_id, now)
+                )
+                return chunk, missing
+            except MissingDesigns as e:
+                missing.extend(e.design_ids)
+                chunk = [line for line in chunk if line[0] not in e.design_ids]
+            except ClientError as e:
+                if self._cancellation_codes(e)[:1] != ['ConditionalCheckFailed']:
+                    raise
+                # A concurrent retry of the same payment committed this chunk
+                return [], []
+        raise RuntimeError(f"Chunk {index} of checkout {transaction_id} kept failing on designs removed mid-write")
+
+    def _transact_write(self, actions: List[dict]):
+        try:
+            self.dynamodb.transact_write_items(TransactItems=actions)
+        except ClientError as e:
+            failed = [action for action, code in zip(actions, self._cancellation_codes(e)) if code == 'ConditionalCheckFailed']
+            missing = [
+                action['Update']['Key']['design_id']['S']
+                for action in failed
+                if action.get('Update', {}).get('TableName') == DESIGN_TABLE
+            ]
+            if missing and len(missing) == len(failed):
+                raise MissingDesigns(missing)
+            raise
+
+    @staticmethod
+    def _cancellation_codes(error: ClientError) -> List[str]:
+        """Per-action reasons of a cancelled TransactWriteItems ('None' for actions that were fine)"""
+        if error.response['Error']['Code'] != 'TransactionCanceledException':
+            return []
+        return [reason.get('Code', 'None') for reason in error.response.get('CancellationReasons', [])]
+
+    def _get_transaction_count(self, buyer_email: str) -> int:
+        response = self.dynamodb.get_item(
+            TableName=USER_TABLE,
+            Key={'email': {'S': buyer_email}},
+            ProjectionExpression='transaction_count'
+        )
+        return int(response.get('Item', {}).get('transaction_count', {}).get('N', '0'))
+
     async def get_transaction(self, transaction_id: str, buyer_email: str) -> Dict[str, Any]:
         """Get transaction details"""
         try:
@@ -118,88 +472,96 @@ class TransactionService:
             print(f"Error fetching transaction: {str(e)}")
             raise e
 
-    async def get_user_transactions(self, buyer_email: str, page: int = 1, limit: int = 10) -> Dict[str, Any]:
-        """Get user transactions with pagination"""
+    async def get_user_transactions(self, buyer_email: str, limit: int = 10, cursor: Optional[str] = None) -> Dict[str, Any]:
+        """Get one page of a user's transactions, newest first. Pass next_cursor back to continue."""
         try:
-            # Prepare base query parameters
-            query_params = {
-                'TableName': TRANSACTION_TABLE,
-                'IndexName': 'buyer_email-created_at-index',
-                'KeyConditionExpression': 'buyer_email = :email',
-                'ExpressionAttributeValues': {
-                    ':email': {'S': buyer_email}
-                },
-                'ScanIndexForward': False,  # Sort in descending order (newest first)
-                'Limit': limit
-            }
-            
-            # Add ExclusiveStartKey only if page > 1 and we have a valid key
-            if page > 1:
-                last_key = await self._get_last_evaluated_key(buyer_email, page, limit)
-                if last_key:
-                    query_params['ExclusiveStartKey'] = last_key
-            
-            # Execute query
-            response = self.dynamodb.query(**query_params)
-            
-            # Format transactions
-            transactions = [self._format_transaction(item) for item in response.get('Items', [])]
-            
-            # Get total count
-            count_response = self.dynamodb.query(
-                TableName=TRANSACTION_TABLE,
-                IndexName='buyer_email-created_at-index',
-                KeyConditionExpression='buyer_email = :email',
-                ExpressionAttributeValues={
+            # Cursors are bound to the buyer, so one user's cursor cannot page through another's history
+            context = {'list': 'transactions', 'owner': buyer_email}
+            exclusive_start_key = parse_cursor(cursor, context)
+
+            # The page and the buyer's maintained counter are two small reads, issued together
+            (items, last_key), total = await asyncio.gather(run_blocking(
+                dynamodb_service.query_page,
+                TRANSACTION_TABLE,
+                index_name='buyer_email-created_at-index',
+                key_condition_expression='buyer_email = :email',
+                expression_attribute_values={
                     ':email': {'S': buyer_email}
                 },
-                Select='COUNT'
-            )
-            
+                scan_index_forward=False,  # Sort in descending order (newest first)
+                limit=limit,
+                exclusive_start_key=exclusive_start_key,
+                client=self.dynamodb
+            ), run_blocking(self._get_transaction_count, buyer_email))
+
             return {
-                "transactions": transactions,
-                "total": count_response.get('Count', 0),
-                "page": page,
+                "transactions": [self._format_transaction(item) for item in items],
+                "total": total,
                 "limit": limit,
-                "has_more": 'LastEvaluatedKey' in response
+                "next_cursor": encode_cursor(last_key, context),
+                "has_more": last_key is not None
             }
             
+        except HTTPException:
+            raise
         except Exception as e:
             print(f"Error fetching user transactions: {str(e)}")
             raise e
 
-    async def _get_last_evaluated_key(self, buyer_email: str, target_page: int, limit: int) -> Optional[Dict]:
-        """Helper to get the LastEvaluatedKey for pagination"""
+    def reconcile_transaction_counts(self) -> Dict[str, int]:
+        """
+        Recount every buyer's transactions and correct transaction_count where it drifted.
+        Users are read before transactions, and each fix is conditional on the value that was
+        read, so a purchase landing mid-run is never overwritten (the next run picks it up).
+        """
         try:
-            last_evaluated_key = None
-            current_page = 1
-
-            while current_page < target_page:
-                query_params = {
-                    'TableName': TRANSACTION_TABLE,
-                    'IndexName': 'buyer_email-created_at-index',
-                    'KeyConditionExpression': 'buyer_email = :email',
-                    'ExpressionAttributeValues': {
-                        ':email': {'S': buyer_email}
-                    },
-                    'Limit': limit
-                }
-                
-                if last_evaluated_key:
-                    query_params['ExclusiveStartKey'] = last_evaluated_key
-                
-                response = self.dynamodb.query(**query_params)
-                last_evaluated_key = response.get('LastEvaluatedKey')
-                
-                if not last_evaluated_key:
-                    break
-                    
-                current_page += 1
+            stored = {
+                item['email']['S']: item.get('transaction_count', {}).get('N')
+                for item in dynamodb_service.iter_parallel_scan(
+                    USER_TABLE,
+                    projection_expression='email, transaction_count',
+                    client=self.dynamodb
+                )
+            }
+            actual = Counter(
+                item['buyer_email']['S']
+                for item in dynamodb_service.iter_parallel_scan(
+                    TRANSACTION_TABLE,
+                    projection_expression='buyer_email',
+                    client=self.dynamodb
+                )
+            )
+
+            corrected = skipped = 0
+            for email, observed in stored.items():
+                count = actual.get(email, 0)
+                if observed is not None and int(observed) == count:
+                    continue
+                if observed is None:
+                    condition = 'attribute_not_exists(transaction_count)'
+                    values = {':count': {'N': str(count)}}
+                else:
+                    condition = 'transaction_count = :observed'
+                    values = {':count': {'N': str(count)}, ':observed': {'N': observed}}
+                try:
+                    self.dynamodb.update_item(
+                        TableName=USER_TABLE,
+                        Key={'email': {'S': email}},
+                        UpdateExpression='SET transaction_count = :count',
+                        ConditionExpression=condition,
+                        ExpressionAttributeValues=values
+                    )
+                    corrected += 1
+                except ClientError as e:
+                    if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+                        raise
+                    skipped += 1
+
+            return {'users': len(stored), 'corrected': corrected, 'skipped': skipped}
 
-            return last_evaluated_key
         except Exception as e:
-            print(f"Error getting last evaluated key: {str(e)}")
-            return None
+            print(f"Error reconciling transaction counts: {str(e)}")
+            raise e
 
     def _format_transaction(self, item: Dict) -> Dict:
         """Format a DynamoDB transaction item into a regular dictionary"""
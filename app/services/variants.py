@@ -0,0 +1,56 @@
+import os
+from typing import List, Optional
+from app.services import dynamodb as dynamodb_service
+from app.services.aio import run_blocking
+
+DESIGN_TABLE = os.getenv('DYNAMODB_DESIGN_TABLE')
+TRANSACT_WRITE_MAX_ITEMS = int(os.getenv('TRANSACT_WRITE_MAX_ITEMS', '100'))
+
+# Color variants share a variant_family_id: the id of the original design they match, which is
+# also the original's own family. VariantFamilyGSI turns "the whole family" into one keyed query.
+VARIANT_FAMILY_INDEX = 'VariantFamilyGSI'
+
+
+def family_id(design: dict) -> str:
+    """Family of a raw design item: its original's id for a color variant, else its own id"""
+    original_id = design.get('color_matching_design_id', {}).get('S', '')
+    if design.get('is_color_matching', {}).get('BOOL', False) and original_id:
+        return original_id
+    return design['design_id']['S']
+
+
+async def family_members(variant_family_id: str, client=None,
+                         projection_expression: Optional[str] = None) -> List[dict]:
+    """Every design in a family, the original included"""
+    return await run_blocking(lambda: list(dynamodb_service.iter_query(
+        DESIGN_TABLE,
+        index_name=VARIANT_FAMILY_INDEX,
+        key_condition_expression='variant_family_id = :family',
+        expression_attribute_values={':family': {'S': variant_family_id}},
+        projection_expression=projection_expression,
+        client=client
+    )))
+
+
+def _write_discount(design_ids: List[str], bundle_discount: float, client):
+    client = client or dynamodb_service._get_dynamodb_client()
+    for start in range(0, len(design_ids), TRANSACT_WRITE_MAX_ITEMS):
+        client.transact_write_items(TransactItems=[
+            {
+                'Update': {
+                    'TableName': DESIGN_TABLE,
+                    'Key': {'design_id': {'S': design_id}},
+                    'UpdateExpression': 'SET bundle_discount = :discount',
+                    'ConditionExpression': 'attribute_exists(design_id)',
+                    'ExpressionAttributeValues': {':discount': {'N': str(bundle_discount)}}
+                }
+            }
+            for design_id in design_ids[start:start + TRANSACT_WRITE_MAX_ITEMS]
+        ])
+
+
+async def set_bundle_discount(variant_family_id: str, bundle_discount: float, client=None) -> List[dict]:
+    """Set the bundle discount on a whole family; returns the members (design_id, category) updated"""
+    members = await family_members(variant_family_id, client, projection_expression='design_id, category')
+    await run_blocking(_write_discount, [member['design_id']['S'] for member in members], bundle_discount, client)
+    return members
@@ -1,5 +1,4 @@
 from typing import Dict, Any, Optional
-import boto3
 from botocore.exceptions import ClientError
 import os
 from dotenv import load_dotenv
@@ -9,14 +8,11 @@ import hmac
 import hashlib
 import base64
 import json
+from app.services.aws_clients import get_cognito_client
 
 load_dotenv()
 
-cognito = boto3.client('cognito-idp',
-    region_name=os.getenv('AWS_REGION'),
-    aws_access_key_id=os.getenv('AWS_ACCESS_KEY_ID'),
-    aws_secret_access_key=os.getenv('AWS_SECRET_ACCESS_KEY')
-)
+cognito = get_cognito_client()
 
 USER_POOL_ID = os.getenv('COGNITO_USER_POOL_ID')
 CLIENT_ID = os.getenv('COGNITO_CLIENT_ID')
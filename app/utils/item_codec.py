@@ -0,0 +1,328 @@
+import copy
+import json
+from decimal import Decimal
+from typing import Any, Dict, Iterable, List, Optional
+
+# Schema-driven codec for DynamoDB attribute-value maps.
+# Each ItemSchema compiles one decode and one encode function for its fields, so listing
+# endpoints convert an item in a single call instead of chaining .get('S') per attribute.
+#
+# Field kinds:
+#   S      string                    N      number kept as its string form
+#   float  number as float           int    number as int (non-integral values truncated)
+#   BOOL   boolean                   SS     string set as a list
+#   json   string holding JSON, parsed lazily on first access
+#   L / M  list / map; nested items use `schema` when given, plain Python values otherwise
+#   raw    attribute value passed through untouched
+
+_KINDS = ('S', 'N', 'float', 'int', 'BOOL', 'SS', 'json', 'L', 'M', 'raw')
+
+
+class Field:
+    """One attribute of an item shape"""
+
+    __slots__ = ('name', 'kind', 'default', 'schema')
+
+    def __init__(self, name: str, kind: str = 'S', default: Any = None, schema: Optional['ItemSchema'] = None):
+        if kind not in _KINDS:
+            raise ValueError(f"Unknown field kind '{kind}' for '{name}'")
+        self.name = name
+        self.kind = kind
+        self.default = default
+        self.schema = schema
+
+
+class Item(dict):
+    """
+    Decoded item. JSON fields stay as their raw string until first read,
+    so listings that never touch `metadata` never pay for parsing it.
+    """
+
+    __slots__ = ('_lazy',)
+
+    def __init__(self):
+        super().__init__()
+        self._lazy = None
+
+    def __missing__(self, key):
+        lazy = self._lazy
+        if not lazy or key not in lazy:
+            raise KeyError(key)
+        raw, default = lazy.pop(key)
+        try:
+            value = json.loads(raw) if raw is not None else copy.copy(default)
+        except (TypeError, ValueError):
+            value = copy.copy(default)
+        self[key] = value
+        return value
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __contains__(self, key):
+        return dict.__contains__(self, key) or bool(self._lazy and key in self._lazy)
+
+    def to_dict(self) -> dict:
+        """Plain dict with every lazy field resolved"""
+        if self._lazy:
+            for key in list(self._lazy):
+                self[key]
+        return dict(self)
+
+
+def to_python(value: dict) -> Any:
+    """Convert a single attribute value to a plain Python value"""
+    if 'S' in value:
+        return value['S']
+    if 'N' in value:
+        number = value['N']
+        return float(number) if ('.' in number or 'e' in number or 'E' in number) else int(number)
+    if 'BOOL' in value:
+        return value['BOOL']
+    if 'NULL' in value:
+        return None
+    if 'L' in value:
+        return [to_python(v) for v in value['L']]
+    if 'M' in value:
+        return {k: to_python(v) for k, v in value['M'].items()}
+    if 'SS' in value:
+        return list(value['SS'])
+    if 'NS' in value:
+        return [to_python({'N': n}) for n in value['NS']]
+    return value
+
+
+def to_attribute(value: Any) -> dict:
+    """Convert a plain Python value to an attribute value"""
+    if value is None:
+        return {'NULL': True}
+    if isinstance(value, bool):
+        return {'BOOL': value}
+    if isinstance(value, (int, float)):
+        return {'N': str(value)}
+    if isinstance(value, str):
+        return {'S': value}
+    if isinstance(value, dict):
+        return {'M': {k: to_attribute(v) for k, v in value.items()}}
+    if isinstance(value, (list, tuple)):
+        return {'L': [to_attribute(v) for v in value]}
+    raise TypeError(f"Cannot encode {type(value).__name__} as a DynamoDB attribute")
+
+
+def _to_int(number: str) -> int:
+    """int of a DynamoDB number, also for stored forms like '300.0' or '3E+2'"""
+    try:
+        return int(number)
+    except ValueError:
+        return int(Decimal(number))
+
+
+def _decode_expr(field: Field, ref: str) -> str:
+    """Source expression converting attribute value `v` for `field`"""
+    kind = field.kind
+    if kind == 'S':
+        return "v['S']"
+    if kind == 'N':
+        return "v['N']"
+    if kind == 'float':
+        return "_float(v['N'])"
+    if kind == 'int':
+        return "_to_int(v['N'])"
+    if kind == 'BOOL':
+        return "v['BOOL']"
+    if kind == 'SS':
+        return "list(v['SS'])"
+    if kind == 'L':
+        if field.schema is not None:
+            return f"[{ref}_decode(e['M']) for e in v['L']]"
+        return "[_to_python(e) for e in v['L']]"
+    if kind == 'M':
+        if field.schema is not None:
+            return f"{ref}_decode(v['M'])"
+        return "{k: _to_python(e) for k, e in v['M'].items()}"
+    return "v"
+
+
+def _encode_expr(field: Field, ref: str) -> str:
+    """Source expression converting Python value `v` to an attribute value for `field`"""
+    kind = field.kind
+    if kind == 'S':
+        return "{'S': v}"
+    if kind in ('N', 'float'):
+        return "{'N': _str(v)}"
+    if kind == 'int':
+        return "{'N': _str(_int(v))}"
+    if kind == 'BOOL':
+        return "{'BOOL': _bool(v)}"
+    if kind == 'SS':
+        return "{'SS': list(v)}"
+    if kind == 'json':
+        return "{'S': v if _isinstance(v, _str) else _dumps(v)}"
+    if kind == 'L':
+        if field.schema is not None:
+            return f"{{'L': [{{'M': {ref}_encode(e)}} for e in v]}}"
+        return "{'L': [_to_attribute(e) for e in v]}"
+    if kind == 'M':
+        if field.schema is not None:
+            return f"{{'M': {ref}_encode(v)}}"
+        return "{'M': {k: _to_attribute(e) for k, e in v.items()}}"
+    return "v"
+
+
+class ItemSchema:
+    """
+    Declared item shape with compiled decode/encode functions.
+    decode() always returns every declared field, using the field default when the
+    attribute is missing. encode() skips fields whose value is None or absent.
+    """
+
+    def __init__(self, name: str, fields: Iterable[Field]):
+        self.name = name
+        self.fields: List[Field] = list(fields)
+        self.field_names = tuple(field.name for field in self.fields)
+        self.decode = self._compile_decode()
+        self.encode = self._compile_encode()
+
+    def _namespace(self) -> Dict[str, Any]:
+        namespace = {
+            '_Item': Item, '_float': float, '_int': int, '_str': str, '_bool': bool,
+            '_to_int': _to_int, '_isinstance': isinstance, '_dumps': json.dumps, '_copy': copy.copy,
+            '_to_python': to_python, '_to_attribute': to_attribute
+        }
+        for i, field in enumerate(self.fields):
+            namespace[f'_d{i}'] = field.default
+            if field.schema is not None:
+                namespace[f'_f{i}_decode'] = field.schema.decode
+                namespace[f'_f{i}_encode'] = field.schema.encode
+        return namespace
+
+    def _compile_decode(self):
+        lines = ["def decode(raw):", "    out = _Item()", "    get = raw.get"]
+        lazy = []
+        for i, field in enumerate(self.fields):
+            name = repr(field.name)
+            lines.append(f"    v = get({name})")
+            if field.kind == 'json':
+                # Parsed by Item.__missing__ on first access
+                lines.append(f"    l{i} = v['S'] if v is not None else None")
+                lazy.append(f"{name}: (l{i}, _d{i})")
+                continue
+            default = f"_copy(_d{i})" if isinstance(field.default, (list, dict)) else f"_d{i}"
+            lines.append(f"    out[{name}] = {_decode_expr(field, f'_f{i}')} if v is not None else {default}")
+        if lazy:
+            lines.append(f"    out._lazy = {{{', '.join(lazy)}}}")
+        lines.append("    return out")
+        return self._build('decode', lines)
+
+    def _compile_encode(self):
+        lines = ["def encode(values):", "    out = {}", "    get = values.get"]
+        for i, field in enumerate(self.fields):
+            name = repr(field.name)
+            lines.append(f"    v = get({name})")
+            lines.append(f"    if v is not None:")
+            lines.append(f"        out[{name}] = {_encode_expr(field, f'_f{i}')}")
+        lines.append("    return out")
+        return self._build('encode', lines)
+
+    def _build(self, function_name: str, lines: List[str]):
+        namespace = self._namespace()
+        source = '\n'.join(lines)
+        exec(compile(source, f'<{self.name} {function_name}>', 'exec'), namespace)
+        return namespace[function_name]
+
+    def decode_many(self, items: Iterable[dict]) -> List[Item]:
+        decode = self.decode
+        return [decode(item) for item in items]
+
+
+PAID_DESIGN = ItemSchema('PaidDesign', [
+    Field('title', 'S'),
+    Field('category', 'S', 'Uncategorized'),
+    Field('sales_count', 'int', 0),
+    Field('price', 'float', 0.0),
+    Field('image_url', 'S'),
+    Field('payment_method', 'S')
+])
+
+TRANSACTION_DESIGN = ItemSchema('TransactionDesign', [
+    Field('design_id', 'S'),
+    Field('title', 'S', ''),
+    Field('price', 'float', 0.0),
+    Field('thumbnail_url', 'S', '')
+])
+
+DESIGN = ItemSchema('Design', [
+    Field('design_id', 'S'),
+    Field('title', 'S', ''),
+    Field('price', 'float', 0.0),
+    Field('category', 'S', ''),
+    Field('tags', 'S', ''),
+    Field('dpi', 'int', 0),
+    Field('design_url', 'S', ''),
+    Field('thumbnail_url', 'S', ''),
+    Field('seller_email', 'S', ''),
+    Field('verification_status', 'S', 'Pending'),
+    Field('verified_by', 'S'),
+    Field('verified_at', 'S'),
+    Field('verification_comments', 'S'),
+    Field('created_at', 'S'),
+    Field('updated_at', 'S'),
+    Field('metadata', 'json', {}),
+    Field('total_sold', 'int', 0),
+    Field('last_payout_sold', 'int', 0),
+    Field('payment_method', 'S', ''),
+    Field('rating', 'float', 0.0),
+    Field('is_color_matching', 'BOOL', False),
+    Field('color_matching_design_id', 'S', ''),
+    Field('bundle_discount', 'N', '0')
+])
+
+USER = ItemSchema('User', [
+    Field('email', 'S', ''),
+    Field('username', 'S'),
+    Field('fullname', 'S', ''),
+    Field('mobile', 'S', ''),
+    Field('gender', 'S'),
+    Field('created_at', 'S', ''),
+    Field('updated_at', 'S'),
+    Field('isVerified', 'S', 'UNVERIFIED'),
+    Field('isDesigner', 'BOOL', False),
+    Field('isRegistered', 'BOOL', False),
+    Field('sign_in_method', 'S'),
+    Field('SellerProfile', 'M', {})
+])
+
+TRANSACTION = ItemSchema('Transaction', [
+    Field('transaction_id', 'S'),
+    Field('buyer_email', 'S'),
+    Field('designs', 'L', [], schema=TRANSACTION_DESIGN),
+    Field('total_amount', 'float', 0.0),
+    Field('status', 'S'),
+    Field('razorpay_payment_id', 'S'),
+    Field('created_at', 'S'),
+    Field('updated_at', 'S')
+])
+
+COLLECTION = ItemSchema('Collection', [
+    Field('user_email', 'S'),
+    Field('collection_name', 'S'),
+    Field('design_count', 'int', 0),
+    Field('created_at', 'S'),
+    Field('updated_at', 'S'),
+    Field('designs', 'L', [])
+])
+
+PAYMENT_HISTORY = ItemSchema('PaymentHistory', [
+    Field('payment_id', 'S'),
+    Field('seller_email', 'S'),
+    Field('total_amount', 'float', 0.0),
+    Field('total_credits', 'int', 0),
+    Field('transaction_id', 'S', ''),
+    Field('payment_date', 'S'),
+    Field('paid_designs', 'L', [], schema=PAID_DESIGN),
+    Field('admin_email', 'S', ''),
+    Field('notes', 'S', '')
+])
@@ -0,0 +1,81 @@
+import base64
+import hashlib
+import hmac
+import json
+import logging
+import os
+import secrets
+from typing import Optional
+from fastapi import HTTPException
+
+logger = logging.getLogger(__name__)
+
+# Opaque list cursors: a DynamoDB LastEvaluatedKey plus the context it was issued for
+# (endpoint, sort order, owner, ...), signed so clients can neither forge keys into other
+# users' partitions nor replay a cursor against a different query.
+# Every container must share PAGINATION_CURSOR_SECRET for cursors to survive across them;
+# the key is used for nothing else, so without it each process signs with a random one.
+_secret = os.getenv('PAGINATION_CURSOR_SECRET', '').encode()
+if not _secret:
+    logger.warning("PAGINATION_CURSOR_SECRET is not set; cursors are only valid within this process")
+    _secret = secrets.token_bytes(32)
+
+
+def _b64encode(raw: bytes) -> str:
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def _b64decode(text: str) -> bytes:
+    return base64.urlsafe_b64decode(text + '=' * (-len(text) % 4))
+
+
+def _sign(payload: str) -> str:
+    return _b64encode(hmac.new(_secret, payload.encode(), hashlib.sha256).digest()[:16])
+
+
+def encode_cursor(last_evaluated_key: Optional[dict], context: Optional[dict] = None) -> Optional[str]:
+    """Signed cursor for a LastEvaluatedKey (None when there are no more pages)"""
+    if not last_evaluated_key:
+        return None
+    payload = _b64encode(json.dumps(
+        {'k': last_evaluated_key, 'c': context or {}},
+        separators=(',', ':'),
+        sort_keys=True
+    ).encode())
+    return f"{payload}.{_sign(payload)}"
+
+
+def decode_cursor(cursor: Optional[str], context: Optional[dict] = None) -> Optional[dict]:
+    """
+    ExclusiveStartKey for a cursor from encode_cursor. Raises ValueError if the cursor is
+    malformed, tampered with, or was issued for a different context.
+    """
+    if not cursor:
+        return None
+    payload, _, signature = cursor.partition('.')
+    if not signature or not hmac.compare_digest(signature, _sign(payload)):
+        raise ValueError("Invalid cursor")
+    try:
+        data = json.loads(_b64decode(payload))
+    except (ValueError, TypeError):
+        raise ValueError("Invalid cursor")
+    if data.get('c') != json.loads(json.dumps(context or {})):
+        raise ValueError("Cursor does not belong to this query")
+    key = data.get('k')
+    if not isinstance(key, dict) or not all(isinstance(v, dict) for v in key.values()):
+        raise ValueError("Invalid cursor")
+    return key
+
+
+def parse_cursor(cursor: Optional[str], context: Optional[dict] = None) -> Optional[dict]:
+    """decode_cursor for routes: invalid cursors are a 400"""
+    try:
+        return decode_cursor(cursor, context)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+def check_limit(limit: int, maximum: int = 100) -> int:
+    if not 1 <= limit <= maximum:
+        raise HTTPException(status_code=400, detail=f"Limit must be between 1 and {maximum}")
+    return limit
@@ -0,0 +1,103 @@
+import hashlib
+import hmac
+import re
+import threading
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import quote, urlsplit
+from botocore.utils import check_dns_name
+
+# SigV4 query-string presigning for S3 GETs. botocore rebuilds a request, runs the event
+# hooks and re-derives the signing key (four HMACs) for every URL; here one pass signs a
+# whole batch against a signing key derived once per (secret, day, region).
+ALGORITHM = 'AWS4-HMAC-SHA256'
+UNSIGNED_PAYLOAD = 'UNSIGNED-PAYLOAD'
+MAX_EXPIRATION = 7 * 24 * 3600
+_AWS_S3_HOST = re.compile(r'^s3([.-][a-z0-9-]+)?\.amazonaws\.com$')
+
+
+def _quote(value: str, safe: str = '-_.~') -> str:
+    return quote(value, safe=safe)
+
+
+class SigV4Presigner:
+    """Signs presigned S3 GET URLs for the region of a boto3 S3 client with botocore credentials"""
+
+    def __init__(self, s3_client, credentials):
+        self.s3_client = s3_client
+        self._credentials = credentials
+        self.region = s3_client.meta.region_name
+        endpoint = urlsplit(s3_client.meta.endpoint_url)
+        self.scheme = endpoint.scheme
+        self.endpoint_host = endpoint.netloc
+        s3_config = s3_client.meta.config.s3 or {}
+        # Custom endpoints and addressing styles keep going through botocore
+        self.supported = bool(_AWS_S3_HOST.match(self.endpoint_host)) and not s3_config.get('addressing_style')
+        self._signing_keys: Dict[Tuple[str, str], bytes] = {}
+        self._lock = threading.Lock()
+
+    def credentials(self):
+        """Frozen credentials for one batch (refreshed first if they are about to expire), or None"""
+        return self._credentials.get_frozen_credentials() if self._credentials is not None else None
+
+    def _signing_key(self, secret_key: str, datestamp: str) -> bytes:
+        cache_key = (secret_key, datestamp)
+        signing_key = self._signing_keys.get(cache_key)
+        if signing_key is None:
+            signing_key = ('AWS4' + secret_key).encode()
+            for part in (datestamp, self.region, 's3', 'aws4_request'):
+                signing_key = hmac.new(signing_key, part.encode(), hashlib.sha256).digest()
+            with self._lock:
+                # Keys from earlier days are dead weight
+                self._signing_keys = {cache_key: signing_key}
+        return signing_key
+
+    def _host_and_path(self, bucket_name: str, object_name: str) -> Tuple[str, str]:
+        key_path = _quote(object_name, safe='/~')
+        if check_dns_name(bucket_name) and '.' not in bucket_name:
+            # Virtual-hosted style on the global endpoint, as botocore does
+            return f'{bucket_name}.s3.amazonaws.com', f'/{key_path}'
+        return self.endpoint_host, f'/{bucket_name}/{key_path}'
+
+    def presign_many(self, requests: List[Tuple[str, str, Dict[str, str]]], expiration: int,
+                     now: Optional[datetime] = None, credentials=None) -> List[str]:
+        """Presigned GET URLs for (bucket, key, extra query params) triples, signed in one pass"""
+        credentials = credentials or self.credentials()
+        now = (now or datetime.now(timezone.utc)).replace(tzinfo=None)
+        amz_date = now.strftime('%Y%m%dT%H%M%SZ')
+        datestamp = now.strftime('%Y%m%d')
+        scope = f'{datestamp}/{self.region}/s3/aws4_request'
+        signing_key = self._signing_key(credentials.secret_key, datestamp)
+        auth_params = [
+            ('X-Amz-Algorithm', ALGORITHM),
+            ('X-Amz-Credential', f'{credentials.access_key}/{scope}'),
+            ('X-Amz-Date', amz_date),
+            ('X-Amz-Expires', str(min(int(expiration), MAX_EXPIRATION))),
+            ('X-Amz-SignedHeaders', 'host')
+        ]
+        if credentials.token:
+            auth_params.append(('X-Amz-Security-Token', credentials.token))
+        auth_query = [(_quote(name), _quote(value)) for name, value in auth_params]
+
+        urls = []
+        for bucket_name, object_name, params in requests:
+            host, path = self._host_and_path(bucket_name, object_name)
+            query = [(_quote(name), _quote(value)) for name, value in params.items()] + auth_query
+            canonical_request = '\n'.join([
+                'GET',
+                path,
+                '&'.join(f'{name}={value}' for name, value in sorted(query)),
+                f'host:{host}\n',
+                'host',
+                UNSIGNED_PAYLOAD
+            ])
+            string_to_sign = '\n'.join([
+                ALGORITHM,
+                amz_date,
+                scope,
+                hashlib.sha256(canonical_request.encode()).hexdigest()
+            ])
+            signature = hmac.new(signing_key, string_to_sign.encode(), hashlib.sha256).hexdigest()
+            query_string = '&'.join(f'{name}={value}' for name, value in query)
+            urls.append(f'{self.scheme}://{host}{path}?{query_string}&X-Amz-Signature={signature}')
+        return urls
@@ -1,50 +1,122 @@
-import boto3
 from botocore.exceptions import ClientError
+from datetime import datetime, timezone
+from typing import List, Optional, Tuple
 import os
 import dotenv
 import logging
+from app.services.aws_clients import get_credentials, get_s3_client
+from app.services.aio import run_blocking
+from app.utils.cache import TTLCache
+from app.utils.presign import SigV4Presigner
 
 dotenv.load_dotenv()
 
 logger = logging.getLogger(__name__)
 
+# Presigned GET URLs are reused until PRESIGN_CACHE_MARGIN seconds before they expire, so a
+# client always gets at least that long to follow one. Keyed by signing identity, object and
+# requested lifetime. A URL dies with the session that signed it, and botocore hands out
+# temporary credentials until TEMPORARY_CREDENTIALS_LIFETIME seconds before they expire, so
+# URLs signed with them are cached for at most that long minus the margin.
+PRESIGN_CACHE_MARGIN = int(os.getenv('PRESIGN_CACHE_MARGIN', '300'))
+TEMPORARY_CREDENTIALS_LIFETIME = 900
+presigned_url_cache = TTLCache(max_entries=int(os.getenv('PRESIGN_CACHE_MAX_ENTRIES', '10000')))
+_presigners = {}
+
+
+def _presigner(s3_client, credentials) -> SigV4Presigner:
+    presigner = _presigners.get((s3_client, credentials))
+    if presigner is None:
+        presigner = _presigners[(s3_client, credentials)] = SigV4Presigner(s3_client, credentials)
+    return presigner
+
+
 class S3Handler:
     def __init__(self):
-        self.s3_client = boto3.client(
-            's3',
-            # aws_access_key_id=os.getenv('AWS_ACCESS_KEY_ID'),
-            # aws_secret_access_key=os.getenv('AWS_SECRET_ACCESS_KEY'),
-            region_name=os.getenv('AWS_REGION')
-        )
+        # Shared client, so building a handler per request is cheap
+        self.s3_client = get_s3_client()
+        self.credentials = get_credentials()
         self.designs_bucket = os.getenv('S3_DESIGN_BUCKET_NAME')
         self.thumbnails_bucket = os.getenv('S3_THUMBNAIL_BUCKET_NAME')
 
     async def generate_presigned_url(self, bucket_name: str, object_name: str, expiration=3600):
         """Generate a presigned URL to share an S3 object"""
+        return (await self.generate_presigned_urls([(bucket_name, object_name)], expiration))[0]
+
+    def _presign_get(self, bucket_name: str, object_name: str, expiration: int) -> str:
+        filename = object_name.split('/')[-1]
+        return self.s3_client.generate_presigned_url(
+            'get_object',
+            Params={
+                'Bucket': bucket_name,
+                'Key': object_name,
+                'ResponseContentDisposition': f'attachment; filename="{filename}"',
+                'ResponseContentType': 'application/octet-stream'
+            },
+            ExpiresIn=expiration
+        )
+
+    def presign_batch(self, objects: List[Tuple[str, str]], expiration: int = 3600) -> List[Optional[str]]:
+        """
+        Presigned GET URLs for many (bucket, key) pairs, in order. Cached URLs are reused; the
+        rest are signed together with one credential snapshot and one derived signing key.
+        """
+        presigner = _presigner(self.s3_client, self.credentials)
+        credentials = presigner.credentials() if presigner.supported else None
+        if credentials is None:
+            return [self._presign_or_none(bucket_name, object_name, expiration) for bucket_name, object_name in objects]
+
+        now = datetime.now(timezone.utc)
+        ttl = expiration - PRESIGN_CACHE_MARGIN
+        if credentials.token:
+            ttl = min(ttl, TEMPORARY_CREDENTIALS_LIFETIME - PRESIGN_CACHE_MARGIN)
+
+        urls: List[Optional[str]] = []
+        missing = {}
+        for bucket_name, object_name in objects:
+            cache_key = (credentials.access_key, bucket_name, object_name, expiration)
+            url = presigned_url_cache.get(cache_key) if ttl > 0 else None
+            if url is None:
+                missing.setdefault(cache_key, []).append(len(urls))
+            urls.append(url)
+        if not missing:
+            return urls
+
+        signed = presigner.presign_many(
+            [
+                (bucket_name, object_name, {
+                    'response-content-disposition': f'attachment; filename="{object_name.split("/")[-1]}"',
+                    'response-content-type': 'application/octet-stream'
+                })
+                for _, bucket_name, object_name, _ in missing
+            ],
+            expiration,
+            now=now,
+            credentials=credentials
+        )
+        for (cache_key, positions), url in zip(missing.items(), signed):
+            if ttl > 0:
+                presigned_url_cache.set(cache_key, url, ttl=ttl)
+            for position in positions:
+                urls[position] = url
+        return urls
+
+    def _presign_or_none(self, bucket_name: str, object_name: str, expiration: int) -> Optional[str]:
         try:
-            # Extract filename from object_name
-            filename = object_name.split('/')[-1]
-            
-            url = self.s3_client.generate_presigned_url(
-                'get_object',
-                Params={
-                    'Bucket': bucket_name,
-                    'Key': object_name,
-                    'ResponseContentDisposition': f'attachment; filename="{filename}"',
-                    'ResponseContentType': 'application/octet-stream'
-                },
-                ExpiresIn=expiration
-            )
-            return url
+            return self._presign_get(bucket_name, object_name, expiration)
         except ClientError as e:
             logger.error(f"Error generating presigned URL: {e}")
             return None
 
+    async def generate_presigned_urls(self, objects: List[Tuple[str, str]], expiration=3600) -> List[Optional[str]]:
+        """Presigned GET URLs for many (bucket, key) pairs, in order, in one executor hop"""
+        return await run_blocking(self.presign_batch, objects, expiration) if objects else []
 
     async def upload_file(self, file_data: bytes, bucket: str, object_name: str):
         """Upload a file to S3"""
         try:
-            self.s3_client.put_object(
+            await run_blocking(
+                self.s3_client.put_object,
                 Bucket=bucket,
                 Key=object_name,
                 Body=file_data
@@ -57,7 +129,8 @@ class S3Handler:
     async def delete_file(self, bucket: str, key: str) -> bool:
         """Delete a file from S3 bucket"""
         try:
-            self.s3_client.delete_object(
+            await run_blocking(
+                self.s3_client.delete_object,
                 Bucket=bucket,
                 Key=key
             )
@@ -72,7 +145,8 @@ class S3Handler:
                 {"Content-Type": content_type}
             ]
             
-            response = self.s3_client.generate_presigned_post(
+            response = await run_blocking(
+                self.s3_client.generate_presigned_post,
                 Bucket=bucket_name,
                 Key=object_name,
                 Conditions=conditions,
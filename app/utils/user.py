@@ -1,18 +1,79 @@
 import os
-import boto3
+from typing import Dict, Iterable, Optional
+from app.services.aio import run_blocking
+from app.utils.cache import TTLCache
 
 USER_TABLE = os.getenv('DYNAMODB_USER_TABLE')
 
+# email -> username, shared by every request in a warm container. Usernames are set once at
+# signup, so a long TTL is safe; unknown emails are cached as 'Anonymous' too.
+username_cache = TTLCache(
+    max_entries=int(os.getenv('USERNAME_CACHE_MAX_ENTRIES', '4096')),
+    ttl=float(os.getenv('USERNAME_CACHE_TTL_SECONDS', '600'))
+)
+
 async def get_username_from_email(email: str, dynamodb) -> str:
+    username = username_cache.get(email)
+    if username is not None:
+        return username
     try:
-        response = dynamodb.get_item(
+        response = await run_blocking(
+            dynamodb.get_item,
             TableName=USER_TABLE,
-            Key={'email': {'S': email}}
+            Key={'email': {'S': email}},
+            ProjectionExpression='username'
         )
-        print(response)
         user = response.get('Item')
-        if user:
-            return user.get('username', {}).get('S', 'Anonymous')
-        return 'Anonymous'
-    except:
+        username = user.get('username', {}).get('S', 'Anonymous') if user else 'Anonymous'
+        username_cache.set(email, username)
+        return username
+    except Exception as e:
+        print(f"Error resolving username: {str(e)}")
         return 'Anonymous'
+
+async def get_usernames_from_emails(emails: Iterable[str], loader) -> Dict[str, str]:
+    """Resolve many seller usernames: cached ones directly, the rest with one batched read through the request's BatchLoader"""
+    usernames = {}
+    missing = []
+    for email in dict.fromkeys(emails):
+        username = username_cache.get(email)
+        if username is None:
+            missing.append(email)
+        else:
+            usernames[email] = username
+    if not missing:
+        return usernames
+
+    try:
+        users = await loader.load_many(
+            USER_TABLE,
+            [{'email': {'S': email}} for email in missing],
+            attributes=('username',)
+        )
+    except Exception as e:
+        print(f"Error resolving usernames: {str(e)}")
+        usernames.update((email, 'Anonymous') for email in missing)
+        return usernames
+
+    for email, user in zip(missing, users):
+        username = (user or {}).get('username', {}).get('S', 'Anonymous')
+        username_cache.set(email, username)
+        usernames[email] = username
+    return usernames
+
+async def get_email_from_username(username: str, dynamodb) -> Optional[str]:
+    """Email of the user with this username via UserUsernameGSI, or None"""
+    response = await run_blocking(
+        dynamodb.query,
+        TableName=USER_TABLE,
+        IndexName='UserUsernameGSI',
+        KeyConditionExpression='username = :username',
+        ExpressionAttributeValues={':username': {'S': username}},
+        Limit=1
+    )
+    items = response.get('Items', [])
+    return items[0]['email']['S'] if items else None
+
+def invalidate_username(email: str):
+    """Forget a cached username, e.g. when the user record is (re)created"""
+    username_cache.delete(email)
@@ -1,6 +1,9 @@
+import asyncio
 import boto3
+import names
 from dotenv import load_dotenv
 import os
+import time
 
 load_dotenv()
 
@@ -8,6 +11,97 @@ DYNAMODB_USER_TABLE = os.getenv('DYNAMODB_USER_TABLE')
 DYNAMODB_DESIGN_TABLE = os.getenv('DYNAMODB_DESIGN_TABLE')
 DYNAMODB_TRANSACTION_TABLE = os.getenv('DYNAMODB_TRANSACTION_TABLE')
 DYNAMODB_COLLECTION_TABLE = os.getenv('DYNAMODB_COLLECTION_TABLE')
+DYNAMODB_AGGREGATE_TABLE = os.getenv('DYNAMODB_AGGREGATE_TABLE')
+DYNAMODB_ENTITLEMENT_TABLE = os.getenv('DYNAMODB_ENTITLEMENT_TABLE')
+
+# Sparse gallery indexes: only verified designs carry gallery_category (set on approval)
+GALLERY_SORT_INDEXES = [
+    {
+        'IndexName': index_name,
+        'KeySchema': [
+            {
+                'AttributeName': 'gallery_category',
+                'KeyType': 'HASH'
+            },
+            {
+                'AttributeName': sort_key,
+                'KeyType': 'RANGE'
+            }
+        ],
+        'Projection': {
+            'ProjectionType': 'ALL'
+        }
+    }
+    for index_name, sort_key in (('GalleryCreatedGSI', 'created_at'), ('GalleryPriceGSI', 'price'))
+]
+
+# Color variant families: every design carries variant_family_id (its original's id, or its own)
+VARIANT_FAMILY_INDEX = {
+    'IndexName': 'VariantFamilyGSI',
+    'KeySchema': [
+        {
+            'AttributeName': 'variant_family_id',
+            'KeyType': 'HASH'
+        }
+    ],
+    'Projection': {
+        'ProjectionType': 'ALL'
+    }
+}
+
+# Sparse moderation queue: only pending designs carry pending_queue
+PENDING_QUEUE_INDEX = {
+    'IndexName': 'PendingQueueGSI',
+    'KeySchema': [
+        {
+            'AttributeName': 'pending_queue',
+            'KeyType': 'HASH'
+        },
+        {
+            'AttributeName': 'created_at',
+            'KeyType': 'RANGE'
+        }
+    ],
+    'Projection': {
+        'ProjectionType': 'ALL'
+    }
+}
+
+# Sparse leaderboard index: only sellers with a verified design carry board
+LEADERBOARD_INDEX = {
+    'IndexName': 'LeaderboardGSI',
+    'KeySchema': [
+        {
+            'AttributeName': 'board',
+            'KeyType': 'HASH'
+        },
+        {
+            'AttributeName': 'weighted_score',
+            'KeyType': 'RANGE'
+        }
+    ],
+    'Projection': {
+        'ProjectionType': 'ALL'
+    }
+}
+
+# Sparse payout index: only sellers with an unpaid balance carry payout_due
+PAYOUT_INDEX = {
+    'IndexName': 'PayoutDueGSI',
+    'KeySchema': [
+        {
+            'AttributeName': 'payout_due',
+            'KeyType': 'HASH'
+        },
+        {
+            'AttributeName': 'unpaid_since',
+            'KeyType': 'RANGE'
+        }
+    ],
+    'Projection': {
+        'ProjectionType': 'ALL'
+    }
+}
 
 class DynamoDBSetup():
     def __init__(self):
@@ -36,6 +130,10 @@ class DynamoDBSetup():
                         {
                             'AttributeName': 'referral_code',
                             'AttributeType': 'S'
+                        },
+                        {
+                            'AttributeName': 'username',
+                            'AttributeType': 'S'
                         }
                     ],
                     KeySchema=[
@@ -70,6 +168,23 @@ class DynamoDBSetup():
                             'Projection': {
                                 'ProjectionType': 'KEYS_ONLY'
                             }
+                        },
+                        {
+                            # Storefront lookup: username -> email (the table key is always projected)
+                            'IndexName': 'UserUsernameGSI',
+                            'KeySchema': [
+                                {
+                                    'AttributeName': 'username',
+                                    'KeyType': 'HASH'
+                                }
+                            ],
+                            'Projection': {
+                                'ProjectionType': 'KEYS_ONLY'
+                            },
+                            'ProvisionedThroughput': {
+                                'ReadCapacityUnits': 10,
+                                'WriteCapacityUnits': 10
+                            }
                         }
                     ],
                     BillingMode='PROVISIONED',
@@ -102,6 +217,26 @@ class DynamoDBSetup():
                 {
                     'AttributeName': 'verification_status',
                     'AttributeType': 'S'
+                },
+                {
+                    'AttributeName': 'gallery_category',
+                    'AttributeType': 'S'
+                },
+                {
+                    'AttributeName': 'created_at',
+                    'AttributeType': 'S'
+                },
+                {
+                    'AttributeName': 'price',
+                    'AttributeType': 'N'
+                },
+                {
+                    'AttributeName': 'variant_family_id',
+                    'AttributeType': 'S'
+                },
+                {
+                    'AttributeName': 'pending_queue',
+                    'AttributeType': 'S'
                 }
             ],
             KeySchema=[
@@ -146,7 +281,10 @@ class DynamoDBSetup():
                         'ReadCapacityUnits': 10,
                         'WriteCapacityUnits': 10
                     }
-                }
+                },
+                *GALLERY_SORT_INDEXES,
+                VARIANT_FAMILY_INDEX,
+                PENDING_QUEUE_INDEX
             ],
             BillingMode='PAY_PER_REQUEST',
             TableClass='STANDARD',
@@ -235,6 +373,375 @@ class DynamoDBSetup():
                 )
         # table.wait_until_exists()
 
+    def CreateAggregateTable(self):
+        # Precomputed read models (home feed snapshot, leaderboard, rollups); pk names the aggregate, sk the slice
+        table = self.client.create_table(
+                    TableName=DYNAMODB_AGGREGATE_TABLE,
+                    AttributeDefinitions=[
+                        {
+                            'AttributeName': 'pk',
+                            'AttributeType': 'S'
+                        },
+                        {
+                            'AttributeName': 'sk',
+                            'AttributeType': 'S'
+                        },
+                        {
+                            'AttributeName': 'board',
+                            'AttributeType': 'S'
+                        },
+                        {
+                            'AttributeName': 'weighted_score',
+                            'AttributeType': 'N'
+                        },
+                        {
+                            'AttributeName': 'payout_due',
+                            'AttributeType': 'S'
+                        },
+                        {
+                            'AttributeName': 'unpaid_since',
+                            'AttributeType': 'S'
+                        }
+                    ],
+                    GlobalSecondaryIndexes=[LEADERBOARD_INDEX, PAYOUT_INDEX],
+                    KeySchema=[
+                        {
+                            'AttributeName': 'pk',
+                            'KeyType': 'HASH'
+                        },
+                        {
+                            'AttributeName': 'sk',
+                            'KeyType': 'RANGE'
+                        }
+                    ],
+                    BillingMode='PAY_PER_REQUEST',
+                    TableClass='STANDARD',
+                    DeletionProtectionEnabled=True
+                )
+        # table.wait_until_exists()
+
+    def CreateEntitlementTable(self):
+        # One item per design a buyer may download; PurchasedAtLSI lists them newest purchase first
+        table = self.client.create_table(
+                    TableName=DYNAMODB_ENTITLEMENT_TABLE,
+                    AttributeDefinitions=[
+                        {
+                            'AttributeName': 'buyer_email',
+                            'AttributeType': 'S'
+                        },
+                        {
+                            'AttributeName': 'design_id',
+                            'AttributeType': 'S'
+                        },
+                        {
+                            'AttributeName': 'purchased_at',
+                            'AttributeType': 'S'
+                        }
+                    ],
+                    KeySchema=[
+                        {
+                            'AttributeName': 'buyer_email',
+                            'KeyType': 'HASH'
+                        },
+                        {
+                            'AttributeName': 'design_id',
+                            'KeyType': 'RANGE'
+                        }
+                    ],
+                    LocalSecondaryIndexes=[
+                        {
+                            'IndexName': 'PurchasedAtLSI',
+                            'KeySchema': [
+                                {
+                                    'AttributeName': 'buyer_email',
+                                    'KeyType': 'HASH'
+                                },
+                                {
+                                    'AttributeName': 'purchased_at',
+                                    'KeyType': 'RANGE'
+                                }
+                            ],
+                            'Projection': {
+                                'ProjectionType': 'ALL'
+                            }
+                        }
+                    ],
+                    BillingMode='PAY_PER_REQUEST',
+                    TableClass='STANDARD',
+                    DeletionProtectionEnabled=True
+                )
+        # table.wait_until_exists()
+
+    def AddLeaderboardIndex(self):
+        """Create LeaderboardGSI on an existing aggregate table; fill it with RebuildLeaderboard"""
+        self.client.update_table(
+            TableName=DYNAMODB_AGGREGATE_TABLE,
+            AttributeDefinitions=[
+                {'AttributeName': 'board', 'AttributeType': 'S'},
+                {'AttributeName': 'weighted_score', 'AttributeType': 'N'}
+            ],
+            GlobalSecondaryIndexUpdates=[{'Create': LEADERBOARD_INDEX}]
+        )
+
+    def AddPayoutIndex(self):
+        """Create PayoutDueGSI on an existing aggregate table; fill it with RebuildPayoutLedger"""
+        self.client.update_table(
+            TableName=DYNAMODB_AGGREGATE_TABLE,
+            AttributeDefinitions=[
+                {'AttributeName': 'payout_due', 'AttributeType': 'S'},
+                {'AttributeName': 'unpaid_since', 'AttributeType': 'S'}
+            ],
+            GlobalSecondaryIndexUpdates=[{'Create': PAYOUT_INDEX}]
+        )
+
+    def AddUserUsernameIndex(self):
+        """Create UserUsernameGSI on an existing user table; DynamoDB backfills it from current items"""
+        self.client.update_table(
+            TableName=DYNAMODB_USER_TABLE,
+            AttributeDefinitions=[
+                {
+                    'AttributeName': 'username',
+                    'AttributeType': 'S'
+                }
+            ],
+            GlobalSecondaryIndexUpdates=[
+                {
+                    'Create': {
+                        'IndexName': 'UserUsernameGSI',
+                        'KeySchema': [
+                            {
+                                'AttributeName': 'username',
+                                'KeyType': 'HASH'
+                            }
+                        ],
+                        'Projection': {
+                            'ProjectionType': 'KEYS_ONLY'
+                        },
+                        'ProvisionedThroughput': {
+                            'ReadCapacityUnits': 10,
+                            'WriteCapacityUnits': 10
+                        }
+                    }
+                }
+            ]
+        )
+
+    def BackfillUsernames(self):
+        """
+        Give every user without a username one, so all users are reachable through UserUsernameGSI.
+        Safe to re-run: the write is conditional on the username still being absent.
+        """
+        updated = 0
+        paginator = self.client.get_paginator('scan')
+        for page in paginator.paginate(
+            TableName=DYNAMODB_USER_TABLE,
+            FilterExpression='attribute_not_exists(username)',
+            ProjectionExpression='email, gender'
+        ):
+            for user in page.get('Items', []):
+                gender = user.get('gender', {}).get('S', '').lower()
+                try:
+                    self.client.update_item(
+                        TableName=DYNAMODB_USER_TABLE,
+                        Key={'email': user['email']},
+                        UpdateExpression='SET username = :username',
+                        ConditionExpression='attribute_not_exists(username)',
+                        ExpressionAttributeValues={
+                            ':username': {'S': names.get_full_name(gender=gender if gender in ('male', 'female') else None)}
+                        }
+                    )
+                    updated += 1
+                except self.client.exceptions.ConditionalCheckFailedException:
+                    continue
+        print(f"Backfilled usernames for {updated} users")
+        return updated
+
+    def AddGalleryIndexes(self):
+        """Create the gallery sort indexes on an existing design table (one GSI per update_table call)"""
+        for index in GALLERY_SORT_INDEXES:
+            self.client.update_table(
+                TableName=DYNAMODB_DESIGN_TABLE,
+                AttributeDefinitions=[
+                    {'AttributeName': 'gallery_category', 'AttributeType': 'S'},
+                    {'AttributeName': 'created_at', 'AttributeType': 'S'},
+                    {'AttributeName': 'price', 'AttributeType': 'N'}
+                ],
+                GlobalSecondaryIndexUpdates=[{'Create': index}]
+            )
+            self.client.get_waiter('table_exists').wait(TableName=DYNAMODB_DESIGN_TABLE)
+            while any(
+                gsi.get('IndexStatus') != 'ACTIVE'
+                for gsi in self.client.describe_table(TableName=DYNAMODB_DESIGN_TABLE)['Table'].get('GlobalSecondaryIndexes', [])
+            ):
+                time.sleep(10)
+
+    def BackfillGalleryCategory(self):
+        """Copy category to gallery_category on every verified design so it appears in the gallery indexes"""
+        updated = 0
+        paginator = self.client.get_paginator('scan')
+        for page in paginator.paginate(
+            TableName=DYNAMODB_DESIGN_TABLE,
+            FilterExpression='verification_status = :status AND attribute_exists(category) AND attribute_not_exists(gallery_category)',
+            ExpressionAttributeValues={':status': {'S': 'Verified'}},
+            ProjectionExpression='design_id, category'
+        ):
+            for design in page.get('Items', []):
+                self.client.update_item(
+                    TableName=DYNAMODB_DESIGN_TABLE,
+                    Key={'design_id': design['design_id']},
+                    UpdateExpression='SET gallery_category = :category',
+                    ExpressionAttributeValues={':category': design['category']}
+                )
+                updated += 1
+        print(f"Backfilled gallery_category for {updated} designs")
+        return updated
+
+    def AddVariantFamilyIndex(self):
+        """Create VariantFamilyGSI on an existing design table; run BackfillVariantFamilies to fill it"""
+        self.client.update_table(
+            TableName=DYNAMODB_DESIGN_TABLE,
+            AttributeDefinitions=[{'AttributeName': 'variant_family_id', 'AttributeType': 'S'}],
+            GlobalSecondaryIndexUpdates=[{'Create': VARIANT_FAMILY_INDEX}]
+        )
+
+    def BackfillVariantFamilies(self):
+        """Set variant_family_id on every design created before it was maintained"""
+        updated = 0
+        paginator = self.client.get_paginator('scan')
+        for page in paginator.paginate(
+            TableName=DYNAMODB_DESIGN_TABLE,
+            FilterExpression='attribute_not_exists(variant_family_id)',
+            ProjectionExpression='design_id, is_color_matching, color_matching_design_id'
+        ):
+            for design in page.get('Items', []):
+                original_id = design.get('color_matching_design_id', {}).get('S', '')
+                is_variant = design.get('is_color_matching', {}).get('BOOL', False) and original_id
+                self.client.update_item(
+                    TableName=DYNAMODB_DESIGN_TABLE,
+                    Key={'design_id': design['design_id']},
+                    UpdateExpression='SET variant_family_id = :family',
+                    ExpressionAttributeValues={':family': {'S': original_id if is_variant else design['design_id']['S']}}
+                )
+                updated += 1
+        print(f"Backfilled variant_family_id for {updated} designs")
+        return updated
+
+    def AddPendingQueueIndex(self):
+        """Create PendingQueueGSI on an existing design table; run BackfillPendingQueue to fill it"""
+        self.client.update_table(
+            TableName=DYNAMODB_DESIGN_TABLE,
+            AttributeDefinitions=[
+                {'AttributeName': 'pending_queue', 'AttributeType': 'S'},
+                {'AttributeName': 'created_at', 'AttributeType': 'S'}
+            ],
+            GlobalSecondaryIndexUpdates=[{'Create': PENDING_QUEUE_INDEX}]
+        )
+
+    def BackfillPendingQueue(self):
+        """Put every pending design into the moderation queue index"""
+        updated = 0
+        paginator = self.client.get_paginator('scan')
+        for page in paginator.paginate(
+            TableName=DYNAMODB_DESIGN_TABLE,
+            FilterExpression='verification_status = :status AND attribute_not_exists(pending_queue)',
+            ExpressionAttributeValues={':status': {'S': 'Pending'}},
+            ProjectionExpression='design_id'
+        ):
+            for design in page.get('Items', []):
+                self.client.update_item(
+                    TableName=DYNAMODB_DESIGN_TABLE,
+                    Key={'design_id': design['design_id']},
+                    UpdateExpression='SET pending_queue = :queue',
+                    ExpressionAttributeValues={':queue': {'S': 'PENDING'}}
+                )
+                updated += 1
+        print(f"Backfilled pending_queue for {updated} designs")
+        return updated
+
+    def BackfillEntitlements(self):
+        """
+        Grant entitlements for every completed transaction written before checkout maintained them.
+        Safe to re-run: the earliest purchase of a design keeps its time and transaction.
+        """
+        written = 0
+        designs = {}
+        paginator = self.client.get_paginator('scan')
+        for page in paginator.paginate(
+            TableName=DYNAMODB_TRANSACTION_TABLE,
+            FilterExpression='#status = :status',
+            ExpressionAttributeNames={'#status': 'status'},
+            ExpressionAttributeValues={':status': {'S': 'COMPLETED'}},
+            ProjectionExpression='transaction_id, buyer_email, created_at, designs'
+        ):
+            for transaction in page.get('Items', []):
+                for entry in transaction.get('designs', {}).get('L', []):
+                    design = entry['M']
+                    design_id = design['design_id']['S']
+                    # Older transactions did not record the color matching fields
+                    if design_id not in designs:
+                        designs[design_id] = self.client.get_item(
+                            TableName=DYNAMODB_DESIGN_TABLE,
+                            Key={'design_id': {'S': design_id}},
+                            ProjectionExpression='is_color_matching, color_matching_design_id'
+                        ).get('Item', {})
+                    try:
+                        self.client.update_item(
+                            TableName=DYNAMODB_ENTITLEMENT_TABLE,
+                            Key={'buyer_email': transaction['buyer_email'], 'design_id': design['design_id']},
+                            UpdateExpression=(
+                                'SET purchased_at = :purchased_at, transaction_id = :transaction_id, '
+                                'title = :title, thumbnail_url = :thumbnail_url, price = :price, '
+                                'is_color_matching = :is_color_matching, color_matching_design_id = :color_matching_design_id'
+                            ),
+                            ConditionExpression='attribute_not_exists(purchased_at) OR purchased_at > :purchased_at',
+                            ExpressionAttributeValues={
+                                ':purchased_at': transaction['created_at'],
+                                ':transaction_id': transaction['transaction_id'],
+                                ':title': design.get('title', {'S': ''}),
+                                ':thumbnail_url': design.get('thumbnail_url', {'S': ''}),
+                                ':price': design.get('price', {'N': '0'}),
+                                ':is_color_matching': designs[design_id].get('is_color_matching', {'BOOL': False}),
+                                ':color_matching_design_id': designs[design_id].get('color_matching_design_id', {'S': ''})
+                            }
+                        )
+                        written += 1
+                    except self.client.exceptions.ConditionalCheckFailedException:
+                        continue
+        print(f"Backfilled {written} entitlements")
+        return written
+
+    # Full-table rebuilds of derived data. They scan whole tables, so they run from here rather than
+    # inside an HTTP request; the app modules are imported late so the schema commands above do not
+    # need the app's dependencies.
+
+    def ReconcileTransactionCounts(self):
+        """Recount buyers' transactions and fix any drifted transaction_count counters"""
+        from app.services.transaction import TransactionService
+        result = TransactionService().reconcile_transaction_counts()
+        print(f"Reconciled transaction counts: {result}")
+        return result
+
+    def RebuildLeaderboard(self):
+        """Recompute the seller leaderboard aggregates from the design table"""
+        from app.services import seller_stats
+        sellers = asyncio.run(seller_stats.rebuild_leaderboard(self.client))
+        print(f"Rebuilt the leaderboard for {sellers} sellers")
+        return sellers
+
+    def RebuildPayoutLedger(self):
+        """Recompute the sellers' payout ledgers from the design table; run it with no checkout or payout in flight"""
+        from app.services.payment import PaymentService
+        sellers = asyncio.run(PaymentService(self.client).rebuild_payout_ledger())
+        print(f"Rebuilt the payout ledger for {sellers} sellers")
+        return sellers
+
+    def RebuildSalesRollups(self):
+        """Backfill the sellers' sales analytics rollups from the payment history"""
+        from app.services.payment import PaymentService
+        rollups = asyncio.run(PaymentService(self.client).rebuild_sales_rollups())
+        print(f"Rebuilt {rollups} sales rollups")
+        return rollups
+
     def disable_deletion_protection(self, table_name: str):
         self.client.update_table(
             TableName=table_name,
@@ -245,9 +752,26 @@ def main():
     try:
         dynamodb_setup = DynamoDBSetup()
         # dynamodb_setup.CreateUserTable()
+        # dynamodb_setup.AddUserUsernameIndex()
+        # dynamodb_setup.BackfillUsernames()
         # dynamodb_setup.CreateDesignTable()
+        # dynamodb_setup.AddGalleryIndexes()
+        # dynamodb_setup.BackfillGalleryCategory()
+        # dynamodb_setup.AddVariantFamilyIndex()
+        # dynamodb_setup.BackfillVariantFamilies()
+        # dynamodb_setup.AddPendingQueueIndex()
+        # dynamodb_setup.BackfillPendingQueue()
         # dynamodb_setup.CreateTransactionTable()
         dynamodb_setup.CreateCollectionTable()
+        # dynamodb_setup.CreateAggregateTable()
+        # dynamodb_setup.AddLeaderboardIndex()
+        # dynamodb_setup.RebuildLeaderboard()
+        # dynamodb_setup.AddPayoutIndex()
+        # dynamodb_setup.RebuildPayoutLedger()
+        # dynamodb_setup.RebuildSalesRollups()
+        # dynamodb_setup.ReconcileTransactionCounts()
+        # dynamodb_setup.CreateEntitlementTable()
+        # dynamodb_setup.BackfillEntitlements()
         # dynamodb_setup.disable_deletion_protection('User')
         # dynamodb_setup.disable_deletion_protection('Design')
         # dynamodb_setup.disable_deletion_protection('Transaction')
@@ -0,0 +1,53 @@
+import argparse
+import time
+import boto3
+from botocore.config import Config
+from app.utils import s3_utils
+from app.utils.s3_utils import S3Handler
+
+# Presigned GET URLs per second: botocore one at a time, batched SigV4 signing, and batches
+# served from the URL cache. Signing is local, so no AWS account or network is needed.
+
+
+def _handler(region: str) -> S3Handler:
+    session = boto3.session.Session(
+        aws_access_key_id='AKIDEXAMPLE',
+        aws_secret_access_key='wJalrXUtnFEMI/K7MDENG+bPxRfiCYEXAMPLEKEY',
+        aws_session_token='session-token'
+    )
+    handler = S3Handler.__new__(S3Handler)
+    handler.s3_client = session.client('s3', region_name=region, config=Config(signature_version='s3v4'))
+    handler.credentials = session.get_credentials()
+    return handler
+
+
+def _rate(label: str, count: int, run):
+    start = time.perf_counter()
+    run()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<28} {count / elapsed:>12,.0f} URLs/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Presigned GET URLs per second')
+    parser.add_argument('--urls', type=int, default=20000)
+    parser.add_argument('--batch', type=int, default=50, help='URLs per batch, e.g. one page of designs')
+    parser.add_argument('--region', default='ap-south-1')
+    args = parser.parse_args()
+
+    handler = _handler(args.region)
+    objects = [('textile-marketplace-designs', f'designs/seller@example.com/{i}/design.png') for i in range(args.urls)]
+    batches = [objects[start:start + args.batch] for start in range(0, len(objects), args.batch)]
+
+    _rate('botocore, one per URL', len(objects),
+          lambda: [handler._presign_get(bucket, key, 3600) for bucket, key in objects])
+    s3_utils.presigned_url_cache.clear()
+    s3_utils.presigned_url_cache.max_entries = max(s3_utils.presigned_url_cache.max_entries, len(objects))
+    _rate('batched, cold cache', len(objects),
+          lambda: [handler.presign_batch(batch) for batch in batches])
+    _rate('batched, warm cache', len(objects),
+          lambda: [handler.presign_batch(batch) for batch in batches])
+
+
+if __name__ == '__main__':
+    main()
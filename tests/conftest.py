@@ -0,0 +1,107 @@
+import pytest
+import os
+from boto3.dynamodb.types import TypeSerializer
+from moto import mock_aws
+
+os.environ.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
+
+from app.services.aws_clients import reset_clients
+from app.services.dynamodb import _get_dynamodb_client
+
+# Key attributes stored as numbers; every other key attribute is a string
+NUMERIC_KEYS = {'price', 'weighted_score'}
+
+_serializer = TypeSerializer()
+
+
+@pytest.fixture(scope='function')
+def aws_credentials():
+    """Mocked AWS Credentials for moto."""
+    os.environ['AWS_ACCESS_KEY_ID'] = 'testing'
+    os.environ['AWS_SECRET_ACCESS_KEY'] = 'testing'
+    os.environ['AWS_SECURITY_TOKEN'] = 'testing'
+    os.environ['AWS_SESSION_TOKEN'] = 'testing'
+    os.environ['AWS_DEFAULT_REGION'] = 'us-east-1'
+
+
+@pytest.fixture(scope='function')
+def dynamodb_client(aws_credentials):
+    """The app's shared DynamoDB client, talking to moto."""
+    with mock_aws():
+        reset_clients()
+        yield _get_dynamodb_client()
+        reset_clients()
+
+
+def _key_schema(hash_key, range_key=None):
+    schema = [{'AttributeName': hash_key, 'KeyType': 'HASH'}]
+    if range_key:
+        schema.append({'AttributeName': range_key, 'KeyType': 'RANGE'})
+    return schema
+
+
+def create_table(client, table_name, hash_key, range_key=None, indexes=None, local_indexes=None):
+    """Create an on-demand table; indexes and local_indexes map an index name to its (hash, range) keys"""
+    indexes = indexes or {}
+    local_indexes = local_indexes or {}
+    attributes = [hash_key, range_key]
+    for keys in (*indexes.values(), *local_indexes.values()):
+        attributes.extend(keys)
+    params = {
+        'TableName': table_name,
+        'KeySchema': _key_schema(hash_key, range_key),
+        'AttributeDefinitions': [
+            {'AttributeName': name, 'AttributeType': 'N' if name in NUMERIC_KEYS else 'S'}
+            for name in dict.fromkeys(attributes) if name
+        ],
+        'BillingMode': 'PAY_PER_REQUEST'
+    }
+    if indexes:
+        params['GlobalSecondaryIndexes'] = [
+            {'IndexName': name, 'KeySchema': _key_schema(*keys), 'Projection': {'ProjectionType': 'ALL'}}
+            for name, keys in indexes.items()
+        ]
+    if local_indexes:
+        params['LocalSecondaryIndexes'] = [
+            {'IndexName': name, 'KeySchema': _key_schema(*keys), 'Projection': {'ProjectionType': 'ALL'}}
+            for name, keys in local_indexes.items()
+        ]
+    client.create_table(**params)
+
+
+def create_design_table(client, table_name='Design', indexes=None):
+    create_table(client, table_name, 'design_id', indexes=indexes)
+
+
+def create_user_table(client, table_name='User', users=()):
+    """Create the User table holding the given items, written as plain values"""
+    create_table(client, table_name, 'email')
+    for user in users:
+        client.put_item(TableName=table_name, Item=to_item(user))
+
+
+def create_aggregate_table(client, table_name='Aggregate', indexes=None):
+    create_table(client, table_name, 'pk', 'sk', indexes=indexes)
+
+
+def create_payment_history_table(client, table_name='PaymentHistory'):
+    create_table(client, table_name, 'seller_email', 'payment_date')
+
+
+def to_item(values):
+    """Encode plain Python values as a DynamoDB item"""
+    return {name: _serializer.serialize(value) for name, value in values.items()}
+
+
+def design_item(design_id, **attributes):
+    """A Design table item; attributes are plain values and may be None to leave one out"""
+    values = {
+        'design_id': design_id,
+        'title': design_id,
+        'seller_email': 'seller@test.com',
+        'category': 'Floral',
+        'price': 100,
+        'verification_status': 'Verified',
+        **attributes
+    }
+    return to_item({name: value for name, value in values.items() if value is not None})
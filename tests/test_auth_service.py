@@ -24,13 +24,8 @@ TEST_VERIFICATION_CODE = "123456"
 TEST_GOOGLE_CODE = "google_auth_code"
 
 @pytest.fixture(scope='function')
-def aws_credentials():
-    """Mocked AWS Credentials for moto."""
-    os.environ['AWS_ACCESS_KEY_ID'] = 'testing'
-    os.environ['AWS_SECRET_ACCESS_KEY'] = 'testing'
-    os.environ['AWS_SECURITY_TOKEN'] = 'testing'
-    os.environ['AWS_SESSION_TOKEN'] = 'testing'
-    os.environ['AWS_DEFAULT_REGION'] = 'us-east-1'
+def aws_credentials(aws_credentials):
+    """Mocked AWS Credentials for moto, plus the Cognito settings."""
     os.environ['COGNITO_USER_POOL_ID'] = 'us-east-1_testing'
     os.environ['COGNITO_CLIENT_ID'] = 'test_client_id'
     os.environ['COGNITO_CLIENT_SECRET'] = 'test_client_secret'
@@ -0,0 +1,95 @@
+import pytest
+import asyncio
+from app.services import design_cache
+from app.services import dynamodb as dynamodb_service
+from app.utils import cache as cache_module
+from app.utils.cache import TTLCache
+from tests.conftest import create_design_table, create_user_table
+
+TEST_TABLE = 'Design'
+
+
+@pytest.fixture(scope='function')
+def design_table(dynamodb_client, monkeypatch):
+    monkeypatch.setattr(design_cache, 'DESIGN_TABLE', TEST_TABLE)
+    design_cache.design_cache.clear()
+    create_design_table(dynamodb_client, TEST_TABLE)
+    dynamodb_client.put_item(TableName=TEST_TABLE, Item={'design_id': {'S': 'd1'}, 'price': {'N': '10'}})
+    yield dynamodb_client
+    design_cache.design_cache.clear()
+
+
+def test_lru_eviction_by_entries():
+    cache = TTLCache(max_entries=2, ttl=60)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    cache.get('a')
+    cache.set('c', 3)
+    assert cache.get('b') is None
+    assert cache.get('a') == 1
+    assert cache.stats()['evictions'] == 1
+
+
+def test_byte_bound_and_oversized_values():
+    cache = TTLCache(max_entries=100, max_bytes=300, ttl=60, sizeof=len)
+    cache.set('a', 'x' * 200)
+    cache.set('b', 'y' * 200)
+    assert cache.get('a') is None
+    assert cache.stats()['bytes'] == 200
+    cache.set('c', 'z' * 400)
+    assert cache.get('c') is None
+    assert cache.get('b') == 'y' * 200
+
+
+def test_ttl_expiry(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache_module.time, 'monotonic', lambda: now[0])
+    cache = TTLCache(ttl=5)
+    cache.set('a', 1)
+    now[0] += 4
+    assert cache.get('a') == 1
+    now[0] += 2
+    assert cache.get('a') is None
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses'], stats['expirations']) == (1, 1, 1)
+
+
+def test_design_cache_read_through_and_invalidation(design_table):
+    assert design_cache.get_design('d1')['price']['N'] == '10'
+    design_table.put_item(TableName=TEST_TABLE, Item={'design_id': {'S': 'd1'}, 'price': {'N': '20'}})
+    # Served from the cache until the write path invalidates it
+    assert design_cache.get_design('d1')['price']['N'] == '10'
+    design_cache.invalidate('d1')
+    assert design_cache.get_design('d1')['price']['N'] == '20'
+    assert design_cache.get_design('missing') is None
+
+    stats = design_cache.cache_stats()
+    assert stats['hits'] == 1
+    assert stats['misses'] == 3
+
+
+def test_username_resolver_batches_and_caches(design_table, monkeypatch):
+    from app.services.batch_loader import BatchLoader
+    from app.utils import user as user_utils
+
+    create_user_table(design_table, users=[{'email': f'u{i}@test.com', 'username': f'user{i}'} for i in range(3)])
+    monkeypatch.setattr(user_utils, 'USER_TABLE', 'User')
+    user_utils.username_cache.clear()
+
+    calls = []
+    batch_get_items = dynamodb_service.batch_get_items
+
+    def counting_batch_get_items(table_name, keys, **kwargs):
+        calls.append(len(keys))
+        return batch_get_items(table_name, keys, **kwargs)
+
+    monkeypatch.setattr(dynamodb_service, 'batch_get_items', counting_batch_get_items)
+    emails = ['u0@test.com', 'u1@test.com', 'u0@test.com', 'nobody@test.com']
+
+    first = asyncio.run(user_utils.get_usernames_from_emails(emails, BatchLoader()))
+    assert first == {'u0@test.com': 'user0', 'u1@test.com': 'user1', 'nobody@test.com': 'Anonymous'}
+    # A later request only reads the emails it has not seen
+    second = asyncio.run(user_utils.get_usernames_from_emails(emails + ['u2@test.com'], BatchLoader()))
+    assert second['u2@test.com'] == 'user2'
+    assert calls == [3, 1]
+    user_utils.username_cache.clear()
@@ -19,16 +19,6 @@ TEST_DESIGN_PATH = "designs/test1.png"
 TEST_THUMBNAIL_PATH = "thumbnails/test1.png"
 
 
-@pytest.fixture(scope='function')
-def aws_credentials():
-    """Mocked AWS Credentials for moto."""
-    os.environ['AWS_ACCESS_KEY_ID'] = 'testing'
-    os.environ['AWS_SECRET_ACCESS_KEY'] = 'testing'
-    os.environ['AWS_SECURITY_TOKEN'] = 'testing'
-    os.environ['AWS_SESSION_TOKEN'] = 'testing'
-    os.environ['AWS_DEFAULT_REGION'] = 'us-east-1'
-
-
 @pytest.fixture(scope='function')
 def mock_s3(aws_credentials):
     """Create mocked S3 client and buckets."""
@@ -70,6 +60,11 @@ def mock_s3(aws_credentials):
             return url
         
         s3_mock.generate_presigned_url = mock_generate_url
+
+        async def mock_generate_urls(objects, expiration=3600):
+            return [await mock_generate_url(bucket, key, expiration) for bucket, key in objects]
+
+        s3_mock.generate_presigned_urls = mock_generate_urls
         
         # Override the S3Handler in the app
         app.dependency_overrides[S3Handler] = lambda: s3_mock
@@ -90,7 +85,23 @@ def mock_db(aws_credentials):
                 {'AttributeName': 'design_id', 'KeyType': 'HASH'}
             ],
             AttributeDefinitions=[
-                {'AttributeName': 'design_id', 'AttributeType': 'S'}
+                {'AttributeName': 'design_id', 'AttributeType': 'S'},
+                {'AttributeName': 'pending_queue', 'AttributeType': 'S'},
+                {'AttributeName': 'created_at', 'AttributeType': 'S'}
+            ],
+            GlobalSecondaryIndexes=[
+                {
+                    'IndexName': 'PendingQueueGSI',
+                    'KeySchema': [
+                        {'AttributeName': 'pending_queue', 'KeyType': 'HASH'},
+                        {'AttributeName': 'created_at', 'KeyType': 'RANGE'}
+                    ],
+                    'Projection': {'ProjectionType': 'ALL'},
+                    'ProvisionedThroughput': {
+                        'ReadCapacityUnits': 5,
+                        'WriteCapacityUnits': 5
+                    }
+                }
             ],
             ProvisionedThroughput={
                 'ReadCapacityUnits': 5,
@@ -120,6 +131,7 @@ def mock_db(aws_credentials):
                 'design_id': {'S': TEST_DESIGN_ID},
                 'title': {'S': 'Test Design 1'},
                 'verification_status': {'S': 'Pending'},
+                'pending_queue': {'S': 'PENDING'},
                 'design_url': {'S': TEST_DESIGN_PATH},
                 'thumbnail_url': {'S': TEST_THUMBNAIL_PATH},
                 'seller_email': {'S': TEST_USER_EMAIL},
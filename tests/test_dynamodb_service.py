@@ -0,0 +1,181 @@
+import pytest
+import asyncio
+from app.services import dynamodb as dynamodb_service
+from app.services.batch_loader import BatchLoader
+from tests.conftest import create_design_table, to_item
+
+TEST_TABLE = 'Design'
+TEST_SELLER = 'seller@test.com'
+
+
+@pytest.fixture(scope='function')
+def design_table(dynamodb_client):
+    """Design table with 25 items split across two sellers."""
+    create_design_table(dynamodb_client, TEST_TABLE, indexes={'DesignSellerGSI': ('seller_email',)})
+    for i in range(25):
+        dynamodb_client.put_item(TableName=TEST_TABLE, Item=to_item({
+            'design_id': f'design-{i:02d}',
+            'seller_email': TEST_SELLER if i % 5 else 'other@test.com',
+            'verification_status': 'Verified' if i % 2 else 'Pending'
+        }))
+    return dynamodb_client
+
+
+def test_iter_scan_follows_last_evaluated_key(design_table):
+    """Small pages are stitched together into the full table"""
+    items = list(dynamodb_service.iter_scan(TEST_TABLE, limit=4))
+    assert len(items) == 25
+    assert len({item['design_id']['S'] for item in items}) == 25
+
+
+def test_iter_scan_yields_pages(design_table):
+    pages = list(dynamodb_service.iter_scan(TEST_TABLE, limit=10, pages=True))
+    assert [len(page) for page in pages] == [10, 10, 5]
+
+
+def test_iter_scan_max_items_stops_early(design_table):
+    items = list(dynamodb_service.iter_scan(
+        TEST_TABLE,
+        filter_expression='verification_status = :status',
+        expression_attribute_values={':status': {'S': 'Verified'}},
+        limit=3,
+        max_items=5
+    ))
+    assert len(items) == 5
+    assert all(item['verification_status']['S'] == 'Verified' for item in items)
+
+
+def test_iter_scan_projection(design_table):
+    items = list(dynamodb_service.iter_scan(TEST_TABLE, projection_expression='design_id'))
+    assert all(set(item) == {'design_id'} for item in items)
+
+
+def test_iter_query_across_pages(design_table):
+    items = list(dynamodb_service.iter_query(
+        TEST_TABLE,
+        index_name='DesignSellerGSI',
+        key_condition_expression='seller_email = :email',
+        expression_attribute_values={':email': {'S': TEST_SELLER}},
+        limit=3
+    ))
+    assert len(items) == 20
+
+
+def test_query_helper_returns_every_page(design_table):
+    """The list helpers no longer stop at the first page"""
+    items = dynamodb_service.query_table(
+        table_name=TEST_TABLE,
+        index_name='DesignSellerGSI',
+        key_condition_expression='seller_email = :email',
+        expression_attribute_values={':email': {'S': TEST_SELLER}}
+    )
+    assert len(items) == 20
+    assert len(dynamodb_service.scan_table(TEST_TABLE)) == 25
+
+
+def test_query_page_fills_filtered_pages_and_resumes(design_table):
+    """Filtered pages are topped up and the cursor resumes right after the last returned item"""
+    seen, start_key = [], None
+    while True:
+        items, start_key = dynamodb_service.query_page(
+            TEST_TABLE,
+            index_name='DesignSellerGSI',
+            key_condition_expression='seller_email = :email',
+            filter_expression='verification_status = :status',
+            expression_attribute_values={':email': {'S': TEST_SELLER}, ':status': {'S': 'Verified'}},
+            limit=3,
+            exclusive_start_key=start_key,
+            key_attributes=('design_id', 'seller_email')
+        )
+        assert len(items) <= 3
+        seen.extend(item['design_id']['S'] for item in items)
+        if not start_key:
+            break
+    expected = [f'design-{i:02d}' for i in range(25) if i % 5 and i % 2]
+    assert sorted(seen) == expected
+    assert len(seen) == len(set(seen))
+
+
+def test_scan_page_respects_request_budget(design_table):
+    items, last_key = dynamodb_service.scan_page(
+        TEST_TABLE,
+        limit=2,
+        filter_expression='verification_status = :status',
+        expression_attribute_values={':status': {'S': 'Missing'}},
+        max_requests=2
+    )
+    assert items == []
+    assert last_key is not None
+
+
+def test_parallel_scan_merges_all_segments(design_table):
+    stats = {}
+    items = dynamodb_service.parallel_scan(TEST_TABLE, total_segments=4, limit=2, stats=stats)
+    assert len({item['design_id']['S'] for item in items}) == 25
+    assert stats['segments'] == 4
+    assert stats['count'] == 25
+    assert stats['pages'] >= 4
+    assert 'elapsed' in stats
+
+
+def test_parallel_scan_filter_and_early_stop(design_table):
+    verified = dynamodb_service.parallel_scan(
+        TEST_TABLE,
+        filter_expression='verification_status = :status',
+        expression_attribute_values={':status': {'S': 'Verified'}},
+        total_segments=3
+    )
+    assert len(verified) == 12
+
+    # Consuming only a few items must not hang on segments that are still buffered
+    stream = dynamodb_service.iter_parallel_scan(TEST_TABLE, total_segments=4, limit=1, buffer_pages=1)
+    first = [next(stream) for _ in range(3)]
+    stream.close()
+    assert len(first) == 3
+
+
+def test_batch_get_items_chunks_over_100_keys(design_table):
+    for i in range(25, 130):
+        design_table.put_item(
+            TableName=TEST_TABLE,
+            Item={'design_id': {'S': f'design-{i:03d}'}, 'seller_email': {'S': TEST_SELLER}}
+        )
+    keys = [{'design_id': {'S': f'design-{i:03d}'}} for i in range(25, 130)]
+    keys.append({'design_id': {'S': 'missing'}})
+
+    items = dynamodb_service.batch_get_items(TEST_TABLE, keys)
+    assert len(items) == 105
+
+
+def test_batch_loader_collapses_loads_into_one_dispatch(design_table, monkeypatch):
+    calls = []
+    batch_get_items = dynamodb_service.batch_get_items
+
+    def counting_batch_get_items(table_name, keys, **kwargs):
+        calls.append(len(keys))
+        return batch_get_items(table_name, keys, **kwargs)
+
+    monkeypatch.setattr(dynamodb_service, 'batch_get_items', counting_batch_get_items)
+
+    async def load():
+        loader = BatchLoader()
+        keys = [{'design_id': {'S': f'design-{i % 10:02d}'}} for i in range(30)]
+        keys.append({'design_id': {'S': 'missing'}})
+        pending = asyncio.ensure_future(loader.load_many(TEST_TABLE, keys, attributes=('seller_email',)))
+        await asyncio.sleep(0)
+        await asyncio.sleep(0)
+        # The loader holds its in-flight fetch until it completes
+        assert len(loader._fetches) == 1
+        items = await pending
+        await asyncio.sleep(0)
+        assert not loader._fetches
+        # A second load of a known key is served from the request memo
+        again = await loader.load(TEST_TABLE, {'design_id': {'S': 'design-03'}}, attributes=('seller_email',))
+        return items, again
+
+    items, again = asyncio.run(load())
+    assert calls == [11]
+    assert items[-1] is None
+    assert items[0]['design_id']['S'] == 'design-00'
+    assert set(items[1]) == {'design_id', 'seller_email'}
+    assert again['design_id']['S'] == 'design-03'
@@ -0,0 +1,108 @@
+import pytest
+from fastapi.testclient import TestClient
+from app.main import app
+from app.routes import design as design_routes
+from app.services.dynamodb import _get_dynamodb_client
+from app.utils import user as user_utils
+from app.utils.pagination import encode_cursor, decode_cursor
+from tests.conftest import create_design_table, create_user_table, design_item
+
+TEST_TABLE = 'Design'
+USER_TABLE = 'User'
+
+
+def put_design(client, design_id, category, status, price, created_at):
+    client.put_item(TableName=TEST_TABLE, Item=design_item(
+        design_id,
+        thumbnail_url=f'https://thumbs/{design_id}.png',
+        price=price,
+        category=category,
+        verification_status=status,
+        created_at=created_at,
+        metadata='{"fileType": "png", "dimensions": {"width": 10, "height": 20}}',
+        gallery_category=category if status == 'Verified' else None
+    ))
+
+
+@pytest.fixture(scope='function')
+def gallery_client(dynamodb_client, monkeypatch):
+    """Design table with the gallery indexes: 7 verified Floral designs, one pending, one in another category."""
+    client = dynamodb_client
+    monkeypatch.setattr(design_routes, 'DESIGN_TABLE', TEST_TABLE)
+    monkeypatch.setattr(user_utils, 'USER_TABLE', USER_TABLE)
+    user_utils.username_cache.clear()
+    create_design_table(client, TEST_TABLE, indexes={
+        'category-status-index': ('category', 'verification_status'),
+        'GalleryCreatedGSI': ('gallery_category', 'created_at'),
+        'GalleryPriceGSI': ('gallery_category', 'price')
+    })
+    create_user_table(client, USER_TABLE, users=[{'email': 'seller@test.com', 'username': 'seller'}])
+
+    for i in range(7):
+        put_design(client, f'floral-{i}', 'Floral', 'Verified', 100 + (i * 37) % 7, f'2024-01-0{i + 1} 10:00:00')
+    put_design(client, 'floral-pending', 'Floral', 'Pending', 1, '2024-02-01 10:00:00')
+    put_design(client, 'abstract-0', 'Abstract', 'Verified', 50, '2024-01-01 10:00:00')
+
+    app.dependency_overrides[_get_dynamodb_client] = lambda: client
+    yield TestClient(app)
+    app.dependency_overrides.clear()
+    user_utils.username_cache.clear()
+
+
+def collect_pages(client, url, limit, **extra):
+    ids, cursor = [], None
+    while True:
+        params = {'limit': limit, **extra}
+        if cursor:
+            params['cursor'] = cursor
+        body = client.get(url, params=params).json()
+        assert len(body['designs']) <= limit
+        ids.extend(design['id'] for design in body['designs'])
+        cursor = body['next_cursor']
+        if not cursor:
+            return ids, body
+
+
+def test_gallery_pages_through_category_index(gallery_client):
+    ids, _ = collect_pages(gallery_client, '/design/gallery/floral', limit=3)
+    assert sorted(ids) == [f'floral-{i}' for i in range(7)]
+    assert len(set(ids)) == 7
+
+
+def test_gallery_sorted_by_newest_and_price(gallery_client):
+    newest = gallery_client.get('/design/gallery/floral', params={'sort': 'newest', 'limit': 50}).json()
+    assert [d['id'] for d in newest['designs']] == [f'floral-{i}' for i in reversed(range(7))]
+    assert newest['designs'][0]['seller_username'] == 'seller'
+    assert newest['designs'][0]['resolution'] == '10x20'
+
+    ids, _ = collect_pages(gallery_client, '/design/gallery/floral', limit=2, sort='price')
+    prices = [100 + (int(i.split('-')[1]) * 37) % 7 for i in ids]
+    assert prices == sorted(prices)
+    assert len(ids) == 7
+
+
+def test_gallery_rejects_bad_input(gallery_client):
+    assert gallery_client.get('/design/gallery/floral', params={'sort': 'rating'}).status_code == 400
+    assert gallery_client.get('/design/gallery/floral', params={'cursor': '!!not-a-cursor'}).status_code == 400
+
+
+def test_cursor_round_trip():
+    key = {'design_id': {'S': 'd1'}, 'price': {'N': '12.5'}}
+    context = {'list': 'gallery', 'category': 'floral', 'sort': 'price'}
+    cursor = encode_cursor(key, context)
+    assert decode_cursor(cursor, context) == key
+    assert encode_cursor(None) is None
+    with pytest.raises(ValueError):
+        decode_cursor('bm90LWEtZGljdA')
+    # Signed and bound to the query it was issued for
+    payload, _, signature = cursor.partition('.')
+    with pytest.raises(ValueError):
+        decode_cursor(payload[:-2] + 'AA.' + signature, context)
+    with pytest.raises(ValueError):
+        decode_cursor(cursor, {**context, 'sort': 'newest'})
+
+
+def test_gallery_rejects_cursor_from_another_sort(gallery_client):
+    body = gallery_client.get('/design/gallery/floral', params={'sort': 'newest', 'limit': 2}).json()
+    response = gallery_client.get('/design/gallery/floral', params={'sort': 'price', 'cursor': body['next_cursor']})
+    assert response.status_code == 400
@@ -0,0 +1,99 @@
+import pytest
+import asyncio
+from fastapi.testclient import TestClient
+from app.main import app
+from app.services import design_events, home_feed
+from app.services.dynamodb import _get_dynamodb_client
+from app.utils import user as user_utils
+from tests.conftest import create_aggregate_table, create_design_table, create_user_table, design_item
+
+DESIGN_TABLE = 'Design'
+AGGREGATE_TABLE = 'Aggregate'
+USER_TABLE = 'User'
+
+
+def put_design(client, design_id, category, created_at, status='Verified'):
+    client.put_item(TableName=DESIGN_TABLE, Item=design_item(
+        design_id,
+        thumbnail_url=f'https://thumbs/{design_id}.png',
+        category=category,
+        verification_status=status,
+        created_at=created_at,
+        metadata='{"fileType": "png"}',
+        gallery_category=category if status == 'Verified' else None
+    ))
+
+
+@pytest.fixture(scope='function')
+def dynamodb(dynamodb_client, monkeypatch):
+    client = dynamodb_client
+    monkeypatch.setattr(home_feed, 'DESIGN_TABLE', DESIGN_TABLE)
+    monkeypatch.setattr(home_feed, 'AGGREGATE_TABLE', AGGREGATE_TABLE)
+    monkeypatch.setattr(home_feed, 'CATEGORY_LIMIT', 2)
+    monkeypatch.setattr(home_feed, '_current', None)
+    monkeypatch.setattr(user_utils, 'USER_TABLE', USER_TABLE)
+    user_utils.username_cache.clear()
+    create_design_table(client, DESIGN_TABLE, indexes={'GalleryCreatedGSI': ('gallery_category', 'created_at')})
+    create_aggregate_table(client, AGGREGATE_TABLE)
+    create_user_table(client, USER_TABLE, users=[{'email': 'seller@test.com', 'username': 'seller'}])
+    for i in range(3):
+        put_design(client, f'floral-{i}', 'Floral', f'2024-01-0{i + 1}')
+    put_design(client, 'abstract-0', 'Abstract', '2024-01-01')
+    put_design(client, 'floral-pending', 'Floral', '2024-03-01', status='Pending')
+
+    app.dependency_overrides[_get_dynamodb_client] = lambda: client
+    yield client
+    app.dependency_overrides.clear()
+    user_utils.username_cache.clear()
+
+
+def test_home_serves_capped_snapshot_with_etag(dynamodb):
+    client = TestClient(app)
+    response = client.get('/design/home')
+    assert response.status_code == 200
+    designs = response.json()['designs']
+    # Newest first, capped per category, pending designs excluded
+    assert [d['id'] for d in designs['Floral']] == ['floral-2', 'floral-1']
+    assert designs['Abstract'][0]['seller_username'] == 'seller'
+    assert designs['Floral'][0]['file_type'] == 'PNG'
+
+    etag = response.headers['etag']
+    assert client.get('/design/home', headers={'If-None-Match': etag}).status_code == 304
+    # The snapshot is persisted, so a cold container reads it instead of scanning
+    assert home_feed._load(dynamodb).etag == etag
+
+
+def test_design_change_refreshes_only_its_category(dynamodb):
+    first = asyncio.run(home_feed.get_home_feed(dynamodb))
+
+    put_design(dynamodb, 'floral-new', 'Floral', '2024-02-01')
+    dynamodb.delete_item(TableName=DESIGN_TABLE, Key={'design_id': {'S': 'abstract-0'}})
+    asyncio.run(design_events.design_changed(['floral-new'], ['Floral'], dynamodb))
+
+    current = asyncio.run(home_feed.get_home_feed(dynamodb))
+    assert current.version == first.version + 1
+    assert current.etag != first.etag
+    assert [d['id'] for d in current.categories['Floral']] == ['floral-new', 'floral-2']
+    # Untouched categories are carried over from the previous version
+    assert [d['id'] for d in current.categories['Abstract']] == ['abstract-0']
+
+    asyncio.run(design_events.design_changed(['abstract-0'], ['Abstract'], dynamodb))
+    assert 'Abstract' not in asyncio.run(home_feed.get_home_feed(dynamodb)).categories
+
+
+def test_refresh_does_not_trust_a_lagging_index(dynamodb):
+    asyncio.run(home_feed.get_home_feed(dynamodb))
+
+    # The base table has the approval and the rejection; GalleryCreatedGSI has caught up with neither
+    dynamodb.update_item(
+        TableName=DESIGN_TABLE, Key={'design_id': {'S': 'floral-pending'}},
+        UpdateExpression='SET verification_status = :s', ExpressionAttributeValues={':s': {'S': 'Verified'}}
+    )
+    dynamodb.update_item(
+        TableName=DESIGN_TABLE, Key={'design_id': {'S': 'floral-2'}},
+        UpdateExpression='SET verification_status = :s', ExpressionAttributeValues={':s': {'S': 'Rejected'}}
+    )
+    asyncio.run(design_events.design_changed(['floral-pending', 'floral-2'], ['Floral'], dynamodb))
+
+    current = asyncio.run(home_feed.get_home_feed(dynamodb))
+    assert [d['id'] for d in current.categories['Floral']] == ['floral-pending', 'floral-1']
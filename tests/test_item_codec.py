@@ -0,0 +1,65 @@
+from app.utils.item_codec import DESIGN, PAYMENT_HISTORY, USER, to_attribute, to_python
+
+
+def test_design_decode_applies_types_and_defaults():
+    item = DESIGN.decode({
+        'design_id': {'S': 'design-1'},
+        'price': {'N': '249.5'},
+        'total_sold': {'N': '3'},
+        'is_color_matching': {'BOOL': True}
+    })
+    assert item['design_id'] == 'design-1'
+    assert item['price'] == 249.5
+    assert item['total_sold'] == 3
+    assert item['is_color_matching'] is True
+    # Missing attributes fall back to their declared defaults
+    assert item['last_payout_sold'] == 0
+    assert item['verification_status'] == 'Pending'
+    assert item['bundle_discount'] == '0'
+
+
+def test_int_fields_accept_non_integral_numbers():
+    # dpi is stored as str() of the request value, so a JSON 300.0 is stored as '300.0'
+    item = DESIGN.decode({'design_id': {'S': 'a'}, 'dpi': {'N': '300.0'}, 'total_sold': {'N': '2E+1'}})
+    assert item['dpi'] == 300 and item['total_sold'] == 20
+    assert DESIGN.decode_many([{'design_id': {'S': 'b'}, 'dpi': {'N': '72.5'}}])[0]['dpi'] == 72
+
+
+def test_metadata_is_parsed_lazily():
+    item = DESIGN.decode({'design_id': {'S': 'd'}, 'metadata': {'S': '{"layers": 4}'}})
+    assert 'metadata' not in dict.keys(item)
+    assert 'metadata' in item
+    assert item['metadata'] == {'layers': 4}
+    assert dict.__getitem__(item, 'metadata') == {'layers': 4}
+
+    broken = DESIGN.decode({'design_id': {'S': 'd'}, 'metadata': {'S': 'not json'}})
+    assert broken.get('metadata') == {}
+    # Defaults are copied, never shared between items
+    broken['metadata']['layers'] = 1
+    assert DESIGN.decode({})['metadata'] == {}
+
+
+def test_nested_schema_round_trip():
+    values = {
+        'payment_id': 'PAY_1',
+        'seller_email': 'seller@test.com',
+        'total_amount': 120.0,
+        'total_credits': 4,
+        'paid_designs': [{'title': 'Rose', 'category': 'Floral', 'sales_count': 2, 'price': 60.0}]
+    }
+    encoded = PAYMENT_HISTORY.encode(values)
+    assert encoded['total_credits'] == {'N': '4'}
+    assert encoded['paid_designs']['L'][0]['M']['title'] == {'S': 'Rose'}
+    # None/absent fields are not written
+    assert 'notes' not in encoded
+
+    decoded = PAYMENT_HISTORY.decode(encoded)
+    assert decoded['paid_designs'][0]['price'] == 60.0
+    assert decoded['paid_designs'][0]['image_url'] is None
+    assert decoded['notes'] == ''
+
+
+def test_untyped_maps_use_plain_values():
+    user = USER.decode({'email': {'S': 'a@b.com'}, 'SellerProfile': {'M': {'upiId': {'S': 'a@upi'}, 'score': {'N': '2'}}}})
+    assert user['SellerProfile'] == {'upiId': 'a@upi', 'score': 2}
+    assert to_python(to_attribute({'a': [1, 2.5, None, True]})) == {'a': [1, 2.5, None, True]}
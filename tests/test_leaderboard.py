@@ -0,0 +1,161 @@
+import pytest
+import asyncio
+from fastapi.testclient import TestClient
+from app.main import app
+from app.services import design_cache, seller_stats
+from app.services.auth import get_current_user
+from app.services.dynamodb import _get_dynamodb_client
+from app.utils import user as user_utils
+from tests.conftest import create_aggregate_table, create_design_table, create_user_table, design_item
+
+DESIGN_TABLE = 'Design'
+AGGREGATE_TABLE = 'Aggregate'
+USER_TABLE = 'User'
+
+
+def design(design_id, seller, status='Verified', price=100, total_sold=0, payment_method='credits_100'):
+    return design_item(
+        design_id,
+        seller_email=seller,
+        verification_status=status,
+        price=price,
+        total_sold=total_sold,
+        payment_method=payment_method
+    )
+
+
+@pytest.fixture(scope='function')
+def dynamodb(dynamodb_client, monkeypatch):
+    client = dynamodb_client
+    monkeypatch.setattr(seller_stats, 'AGGREGATE_TABLE', AGGREGATE_TABLE)
+    monkeypatch.setattr(seller_stats, 'DESIGN_TABLE', DESIGN_TABLE)
+    monkeypatch.setattr(design_cache, 'DESIGN_TABLE', DESIGN_TABLE)
+    monkeypatch.setattr(user_utils, 'USER_TABLE', USER_TABLE)
+    design_cache.design_cache.clear()
+    user_utils.username_cache.clear()
+    create_aggregate_table(client, AGGREGATE_TABLE, indexes={seller_stats.LEADERBOARD_INDEX: ('board', 'weighted_score')})
+    create_design_table(client, DESIGN_TABLE)
+    create_user_table(client, USER_TABLE, users=[
+        {'email': f'{name}@test.com', 'username': name} for name in ('alice', 'bob', 'carol')
+    ])
+
+    yield client
+    app.dependency_overrides.clear()
+    design_cache.design_cache.clear()
+    user_utils.username_cache.clear()
+
+
+def approve(client, item):
+    """Store a design as verified and report the transition, as the approve route does"""
+    client.put_item(TableName=DESIGN_TABLE, Item=item)
+    asyncio.run(seller_stats.design_verification_changed(item, False, True, client))
+
+
+def sell(client, sales):
+    """Count sales on the designs and report them, as checkout does"""
+    for design_id, copies in sales:
+        client.update_item(
+            TableName=DESIGN_TABLE,
+            Key={'design_id': {'S': design_id}},
+            UpdateExpression='ADD total_sold :copies',
+            ExpressionAttributeValues={':copies': {'N': str(copies)}}
+        )
+    designs = {
+        design_id: client.get_item(TableName=DESIGN_TABLE, Key={'design_id': {'S': design_id}})['Item']
+        for design_id, _ in sales
+    }
+    asyncio.run(seller_stats.record_sales([(designs[design_id], copies) for design_id, copies in sales], client))
+
+
+def board(client, email, limit=50):
+    return asyncio.run(seller_stats.get_leaderboard(email, limit=limit, client=client))
+
+
+def buckets(client):
+    items = client.query(
+        TableName=AGGREGATE_TABLE,
+        KeyConditionExpression='pk = :pk AND begins_with(sk, :prefix)',
+        ExpressionAttributeValues={':pk': {'S': 'LEADERBOARD'}, ':prefix': {'S': seller_stats.BUCKET_PREFIX}}
+    )['Items']
+    return {item['sk']['S']: int(item['sellers']['N']) for item in items if item['sellers']['N'] != '0'}
+
+
+def test_incremental_updates_match_rebuild(dynamodb):
+    approve(dynamodb, design('a1', 'alice@test.com', price=200, total_sold=3))
+    approve(dynamodb, design('a2', 'alice@test.com', price=50))
+    approve(dynamodb, design('b1', 'bob@test.com', price=100, payment_method='cash_100'))
+    approve(dynamodb, design('c1', 'carol@test.com', price=10))
+    sell(dynamodb, [('b1', 40), ('a2', 1)])
+
+    incremental = board(dynamodb, 'carol@test.com', limit=2)
+    assert [entry['username'] for entry in incremental['top']] == ['bob', 'alice']
+    assert incremental['top'][1]['total_credits'] == 25
+    assert incremental['top'][1]['total_sold'] == 4
+    # Carol is outside the top 2 and gets her rank without reading the whole board
+    assert incremental['current']['rank'] == 3
+    assert incremental['total'] == 3
+
+    incremental_buckets = buckets(dynamodb)
+    assert asyncio.run(seller_stats.rebuild_leaderboard(dynamodb)) == 3
+    rebuilt = board(dynamodb, 'carol@test.com', limit=2)
+    assert rebuilt == incremental
+    assert buckets(dynamodb) == incremental_buckets
+
+
+def test_rejecting_last_design_leaves_the_board(dynamodb):
+    item = design('a1', 'alice@test.com')
+    approve(dynamodb, item)
+    approve(dynamodb, design('b1', 'bob@test.com'))
+    assert board(dynamodb, 'alice@test.com')['total'] == 2
+
+    asyncio.run(seller_stats.design_verification_changed(item, True, False, dynamodb))
+    after = board(dynamodb, 'alice@test.com')
+    assert [entry['username'] for entry in after['top']] == ['bob']
+    assert after['current'] is None
+    assert after['total'] == 1
+
+    # Re-approving an already verified design changes nothing
+    asyncio.run(seller_stats.design_verification_changed(item, True, True, dynamodb))
+    assert board(dynamodb, 'alice@test.com')['total'] == 1
+
+
+def test_leaderboard_route(dynamodb):
+    approve(dynamodb, design('a1', 'alice@test.com', price=1000))
+    app.dependency_overrides[_get_dynamodb_client] = lambda: dynamodb
+    app.dependency_overrides[get_current_user] = lambda: {'email': 'alice@test.com'}
+
+    body = TestClient(app).get('/community/leaderboard').json()
+    assert body['total_users'] == 1
+    assert body['leaderboard'] == [{
+        'username': 'alice',
+        'verified_designs': 1,
+        'total_sold': 0,
+        'total_credits': 100,
+        'score': 20,
+        'badge': None,
+        'is_current_user': True,
+        'rank': 1
+    }]
+
+
+def test_ranks_come_from_score_buckets(dynamodb, monkeypatch):
+    # Scores from 0.1 to a few hundred points, with ties
+    for i in range(40):
+        seller_stats._apply(f's{i}@test.com', 1, i * i % 97, (i % 7) * 50, None, dynamodb)
+    seller_stats._apply('s3@test.com', 0, 500, 0, None, dynamodb)
+    seller_stats._apply('s5@test.com', -1, 0, -100, None, dynamodb)
+
+    index_reads = []
+    query = dynamodb.query
+    monkeypatch.setattr(dynamodb, 'query', lambda **kw: index_reads.append(kw.get('IndexName')) or query(**kw))
+    entries = [
+        seller_stats._decode_entry(item) for item in dynamodb.scan(TableName=AGGREGATE_TABLE)['Items']
+        if item['sk']['S'] == 'LEADERBOARD' and 'board' in item
+    ]
+    assert len(entries) == 39
+    for entry in entries:
+        expected = sum(other['weighted_score'] > entry['weighted_score'] for other in entries)
+        assert seller_stats._count_above(entry['weighted_score'], dynamodb) == expected
+    # One bucket-counter query and at most one in-bucket index query per rank
+    assert len(index_reads) <= 2 * len(entries)
+    assert sum(buckets(dynamodb).values()) == 39
@@ -0,0 +1,94 @@
+import pytest
+from fastapi.testclient import TestClient
+from app.main import app
+from app.routes import design as design_routes
+from app.services import auth as auth_service
+from app.services import design_cache
+from app.services.auth import get_current_user
+from app.services.dynamodb import _get_dynamodb_client
+from app.utils.s3_utils import S3Handler
+from tests.conftest import create_design_table, create_user_table, design_item
+
+DESIGN_TABLE = 'Design'
+USER_TABLE = 'User'
+MODERATOR = 'designer@test.com'
+
+
+def put_design(client, design_id, created_at, status='Pending', original_id=''):
+    client.put_item(TableName=DESIGN_TABLE, Item=design_item(
+        design_id,
+        verification_status=status,
+        design_url=f'https://designs.s3.amazonaws.com/designs/{design_id}.png',
+        thumbnail_url=f'https://thumbs.s3.amazonaws.com/thumbnails/{design_id}.png',
+        created_at=created_at,
+        is_color_matching=bool(original_id),
+        color_matching_design_id=original_id,
+        pending_queue=design_routes.PENDING_QUEUE if status == 'Pending' else None
+    ))
+
+
+class RecordingS3:
+    designs_bucket = 'designs'
+    thumbnails_bucket = 'thumbnails'
+
+    def __init__(self):
+        self.batches = []
+
+    async def generate_presigned_urls(self, objects, expiration=3600):
+        self.batches.append(list(objects))
+        return [f'https://signed/{bucket}/{key}' for bucket, key in objects]
+
+
+@pytest.fixture(scope='function')
+def dynamodb(dynamodb_client, monkeypatch):
+    client = dynamodb_client
+    monkeypatch.setattr(design_routes, 'DESIGN_TABLE', DESIGN_TABLE)
+    monkeypatch.setattr(design_cache, 'DESIGN_TABLE', DESIGN_TABLE)
+    monkeypatch.setattr(auth_service, 'USERS_TABLE', USER_TABLE)
+    design_cache.design_cache.clear()
+    create_design_table(client, DESIGN_TABLE, indexes={design_routes.PENDING_QUEUE_INDEX: ('pending_queue', 'created_at')})
+    create_user_table(client, USER_TABLE, users=[{'email': MODERATOR, 'isDesigner': True}])
+    put_design(client, 'original', '2024-01-01', status='Verified')
+    put_design(client, 'first', '2024-02-01')
+    put_design(client, 'variant', '2024-02-02', original_id='original')
+    put_design(client, 'third', '2024-02-03')
+    put_design(client, 'rejected', '2024-01-15', status='Rejected')
+
+    app.dependency_overrides[_get_dynamodb_client] = lambda: client
+    app.dependency_overrides[get_current_user] = lambda: {'email': MODERATOR}
+    yield client
+    app.dependency_overrides.clear()
+    design_cache.design_cache.clear()
+
+
+def test_pending_queue_pages_oldest_first(dynamodb, monkeypatch):
+    s3 = RecordingS3()
+    app.dependency_overrides[S3Handler] = lambda: s3
+    monkeypatch.setattr(dynamodb, 'scan', lambda **kw: pytest.fail('the moderation queue must not scan'))
+    client = TestClient(app)
+
+    first = client.get('/design/pending', params={'limit': 2})
+    assert first.status_code == 200, first.text
+    body = first.json()
+    assert [d['id'] for d in body['designs']] == ['first', 'variant']
+    info = body['designs'][1]['color_matching_info']
+    assert info['original_title'] == 'original'
+    assert info['original_thumbnail_url'] == 'https://signed/thumbnails/thumbnails/original.png'
+    assert body['designs'][0]['design_url'] == 'https://signed/designs/designs/first.png'
+    # One presigning batch for the whole page: two URLs per design plus the original's thumbnail
+    assert [len(batch) for batch in s3.batches] == [5]
+
+    rest = client.get('/design/pending', params={'limit': 2, 'cursor': body['next_cursor']}).json()
+    assert [d['id'] for d in rest['designs']] == ['third']
+    assert rest['next_cursor'] is None
+
+
+def test_skipped_item_keeps_later_urls_aligned(dynamodb):
+    # The original lost its title: the variant fails after its own URLs were presigned
+    dynamodb.update_item(TableName=DESIGN_TABLE, Key={'design_id': {'S': 'original'}}, UpdateExpression='REMOVE title')
+    app.dependency_overrides[S3Handler] = RecordingS3
+
+    body = TestClient(app).get('/design/pending', params={'limit': 3}).json()
+    assert [d['id'] for d in body['designs']] == ['first', 'third']
+    assert body['designs'][1]['design_url'] == 'https://signed/designs/designs/third.png'
+    assert body['designs'][1]['thumbnail_url'] == 'https://signed/thumbnails/thumbnails/third.png'
@@ -0,0 +1,134 @@
+import pytest
+import asyncio
+import time
+from datetime import datetime
+from unittest import mock
+from botocore.config import Config
+from app.services.aws_clients import get_client, get_credentials, get_s3_client, reset_clients
+from app.utils import s3_utils
+from app.utils.presign import SigV4Presigner
+from app.utils.s3_utils import S3Handler
+
+FIXED_NOW = datetime(2024, 5, 1, 12, 0, 0)
+KEY = 'designs/seller@example.com/a b+c/ü~x.png'
+
+
+@pytest.fixture
+def s3_env(monkeypatch):
+    """The production S3 client (get_s3_client) for a region, with static or temporary credentials"""
+    def configure(region, token='TOKEN'):
+        monkeypatch.setenv('AWS_ACCESS_KEY_ID', 'AKID')
+        monkeypatch.setenv('AWS_SECRET_ACCESS_KEY', 'SECRET')
+        monkeypatch.delenv('AWS_SECURITY_TOKEN', raising=False)
+        if token:
+            monkeypatch.setenv('AWS_SESSION_TOKEN', token)
+        else:
+            monkeypatch.delenv('AWS_SESSION_TOKEN', raising=False)
+        monkeypatch.setenv('AWS_REGION', region)
+        reset_clients()
+        return get_s3_client()
+
+    yield configure
+    reset_clients()
+
+
+def make_handler(s3_client):
+    handler = S3Handler.__new__(S3Handler)
+    handler.s3_client = s3_client
+    handler.credentials = get_credentials()
+    return handler
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    s3_utils.presigned_url_cache.clear()
+    s3_utils._presigners.clear()
+    yield
+    s3_utils.presigned_url_cache.clear()
+    s3_utils._presigners.clear()
+
+
+def botocore_url(s3_client, bucket, key, expiration):
+    with mock.patch('botocore.auth.datetime') as frozen:
+        frozen.datetime.utcnow.return_value = FIXED_NOW
+        return make_handler(s3_client)._presign_get(bucket, key, expiration)
+
+
+@pytest.mark.parametrize('region', ['us-east-1', 'ap-south-1'])
+@pytest.mark.parametrize('bucket', ['textile-designs', 'Legacy_Bucket', 'dotted.bucket'])
+def test_presigner_matches_botocore(s3_env, region, bucket):
+    s3_client = s3_env(region)
+    filename = KEY.split('/')[-1]
+    url = SigV4Presigner(s3_client, get_credentials()).presign_many(
+        [(bucket, KEY, {
+            'response-content-disposition': f'attachment; filename="{filename}"',
+            'response-content-type': 'application/octet-stream'
+        })],
+        900,
+        now=FIXED_NOW
+    )[0]
+    assert url == botocore_url(s3_client, bucket, KEY, 900)
+
+
+def test_batch_reuses_cached_urls(s3_env, monkeypatch):
+    handler = make_handler(s3_env('ap-south-1'))
+    signed = []
+    original = SigV4Presigner.presign_many
+
+    def recording(self, requests, *args, **kwargs):
+        signed.append([request[1] for request in requests])
+        return original(self, requests, *args, **kwargs)
+
+    monkeypatch.setattr(SigV4Presigner, 'presign_many', recording)
+
+    first = handler.presign_batch([('designs', 'a.png'), ('designs', 'b.png'), ('designs', 'a.png')])
+    assert first[0] == first[2] and first[0] != first[1]
+    # Duplicates in a batch are signed once
+    assert signed == [['a.png', 'b.png']]
+
+    second = handler.presign_batch([('designs', 'b.png'), ('designs', 'c.png')])
+    assert second[0] == first[1]
+    assert signed == [['a.png', 'b.png'], ['c.png']]
+
+    # A different lifetime is a different URL
+    handler.presign_batch([('designs', 'a.png')], expiration=7200)
+    assert signed[-1] == ['a.png']
+
+
+def test_urls_inside_the_safety_margin_are_not_cached(s3_env, monkeypatch):
+    handler = make_handler(s3_env('ap-south-1', token=None))
+    monkeypatch.setattr(s3_utils, 'PRESIGN_CACHE_MARGIN', 300)
+    handler.presign_batch([('designs', 'a.png')], expiration=300)
+    assert len(s3_utils.presigned_url_cache) == 0
+
+    handler.presign_batch([('designs', 'a.png')], expiration=3600)
+    entry = s3_utils.presigned_url_cache._entries[('AKID', 'designs', 'a.png', 3600)]
+    # Cached for the URL's lifetime minus the margin
+    assert 3290 < entry[1] - time.monotonic() <= 3300
+
+
+def test_urls_signed_with_temporary_credentials_expire_with_them(s3_env, monkeypatch):
+    handler = make_handler(s3_env('ap-south-1'))
+    monkeypatch.setattr(s3_utils, 'PRESIGN_CACHE_MARGIN', 300)
+    url = handler.presign_batch([('designs', 'a.png')], expiration=3600)[0]
+    assert 'X-Amz-Security-Token=TOKEN' in url
+    entry = s3_utils.presigned_url_cache._entries[('AKID', 'designs', 'a.png', 3600)]
+    assert 590 < entry[1] - time.monotonic() <= 600
+
+
+def test_custom_endpoint_falls_back_to_botocore(s3_env):
+    s3_env('us-east-1')
+    s3_client = get_client('s3', region_name='us-east-1', endpoint_url='http://localhost:4566',
+                           config=Config(signature_version='s3v4'))
+    handler = make_handler(s3_client)
+    url = handler.presign_batch([('designs', 'a.png')])[0]
+    assert url.startswith('http://localhost:4566/designs/a.png?')
+    assert len(s3_utils.presigned_url_cache) == 0
+
+
+def test_single_url_goes_through_the_batch(s3_env):
+    handler = make_handler(s3_env('ap-south-1'))
+    url = asyncio.run(handler.generate_presigned_url('designs', 'a.png'))
+    assert url == asyncio.run(handler.generate_presigned_urls([('designs', 'a.png')]))[0]
+    assert 'X-Amz-Signature=' in url
+    assert asyncio.run(handler.generate_presigned_urls([])) == []
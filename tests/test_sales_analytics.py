@@ -0,0 +1,94 @@
+import pytest
+import asyncio
+from fastapi.testclient import TestClient
+from app.main import app
+from app.services import payment as payment_module
+from app.services.auth import get_current_user
+from app.services.dynamodb import _get_dynamodb_client
+from app.services.payment import PaymentService
+from tests.conftest import create_aggregate_table, create_payment_history_table
+
+PAYMENT_HISTORY_TABLE = 'PaymentHistory'
+AGGREGATE_TABLE = 'Aggregate'
+SELLER = 'seller@test.com'
+
+
+@pytest.fixture(scope='function')
+def service(dynamodb_client, monkeypatch):
+    monkeypatch.setattr(payment_module, 'PAYMENT_HISTORY_TABLE', PAYMENT_HISTORY_TABLE)
+    monkeypatch.setattr(payment_module, 'AGGREGATE_TABLE', AGGREGATE_TABLE)
+    create_payment_history_table(dynamodb_client, PAYMENT_HISTORY_TABLE)
+    create_aggregate_table(dynamodb_client, AGGREGATE_TABLE)
+    yield PaymentService(dynamodb_client)
+    app.dependency_overrides.clear()
+
+
+def paid_design(category, price, unpaid_sales):
+    return {
+        'category': category,
+        'title': f'{category} design',
+        'unpaid_sales': unpaid_sales,
+        'price': price,
+        'image_url': '',
+        'payment_method': 'hybrid_50_50'
+    }
+
+
+def pay(service, amount, credits, designs):
+    assert service.update_payment_details(SELLER, {
+        'total_amount': amount,
+        'total_credits': credits,
+        'paid_designs': designs
+    })
+
+
+def history_payment(service, payment_date, amount, credits, designs):
+    """A payment recorded before the rollups existed"""
+    service.dynamodb.put_item(TableName=PAYMENT_HISTORY_TABLE, Item={
+        'payment_id': {'S': f'PAY_{payment_date}'},
+        'seller_email': {'S': SELLER},
+        'payment_date': {'S': payment_date},
+        'total_amount': {'N': str(amount)},
+        'total_credits': {'N': str(credits)},
+        'paid_designs': {'L': [{'M': {
+            'category': {'S': d['category']},
+            'sales_count': {'N': str(d['unpaid_sales'])},
+            'price': {'N': str(d['price'])}
+        }} for d in designs]}
+    })
+
+
+def test_payouts_update_rollups(service):
+    pay(service, 150, 7, [paid_design('Floral', 100, 2), paid_design('Abstract', 50, 2)])
+    pay(service, 50.5, 1, [paid_design('Floral', 10.25, 2)])
+    year = payment_module.datetime.now(payment_module.pytz.timezone('Asia/Kolkata')).year
+    month = payment_module.datetime.now(payment_module.pytz.timezone('Asia/Kolkata')).month - 1
+
+    analytics = asyncio.run(service.get_sales_analytics(SELLER, year))
+    assert analytics['monthly_revenue'][month] == 200.5
+    assert analytics['monthly_credits'][month] == 8
+    assert sum(analytics['monthly_revenue']) == 200.5
+    assert sorted(analytics['category_revenue'], key=lambda c: c['name']) == [
+        {'name': 'Abstract', 'value': 100.0},
+        {'name': 'Floral', 'value': 220.5}
+    ]
+    assert analytics['available_years'] == [year]
+    assert service.dynamodb.scan(TableName=PAYMENT_HISTORY_TABLE)['Count'] == 2
+
+
+def test_backfill_and_route(service):
+    history_payment(service, '2023-03-10T10:00:00+05:30', 80, 4, [paid_design('Floral', 20, 4)])
+    history_payment(service, '2023-03-20T10:00:00+05:30', 20, 0, [paid_design('Floral', 20, 1)])
+    history_payment(service, '2024-12-31T23:00:00+05:30', 30, 3, [paid_design('Abstract', 30, 1)])
+    assert asyncio.run(service.rebuild_sales_rollups()) == 2
+
+    app.dependency_overrides[get_current_user] = lambda: {'email': SELLER}
+    body = TestClient(app).get('/sales/analytics', params={'year': 2023}).json()
+    assert body['monthly_revenue'][2] == 100
+    assert body['monthly_credits'] == [0, 0, 4] + [0] * 9
+    assert body['category_revenue'] == [{'name': 'Floral', 'value': 100.0}]
+    assert body['available_years'] == [2024, 2023]
+
+    # Rebuilding again is idempotent
+    asyncio.run(service.rebuild_sales_rollups())
+    assert asyncio.run(service.get_sales_analytics(SELLER, 2024))['monthly_revenue'][11] == 30
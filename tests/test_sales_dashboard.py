@@ -0,0 +1,111 @@
+import pytest
+import asyncio
+from fastapi.testclient import TestClient
+from app.main import app
+from app.services import sales_dashboard
+from app.services.auth import get_current_user
+from app.services.dynamodb import _get_dynamodb_client
+from tests.conftest import create_aggregate_table, create_design_table, design_item
+
+DESIGN_TABLE = 'Design'
+AGGREGATE_TABLE = 'Aggregate'
+SELLER = 'seller@test.com'
+
+
+def put_design(client, design_id, price, payment_method, total_sold=0, last_payout_sold=0, status='Verified'):
+    item = design_item(
+        design_id,
+        seller_email=SELLER,
+        title=design_id.title(),
+        verification_status=status,
+        price=price,
+        payment_method=payment_method,
+        total_sold=total_sold,
+        last_payout_sold=last_payout_sold
+    )
+    client.put_item(TableName=DESIGN_TABLE, Item=item)
+    return item
+
+
+@pytest.fixture(scope='function')
+def dynamodb(dynamodb_client, monkeypatch):
+    client = dynamodb_client
+    monkeypatch.setattr(sales_dashboard, 'DESIGN_TABLE', DESIGN_TABLE)
+    monkeypatch.setattr(sales_dashboard, 'AGGREGATE_TABLE', AGGREGATE_TABLE)
+    create_design_table(client, DESIGN_TABLE, indexes={'DesignSellerGSI': ('seller_email',)})
+    create_aggregate_table(client, AGGREGATE_TABLE)
+    put_design(client, 'cash', 100, 'cash_100', total_sold=5, last_payout_sold=3)
+    put_design(client, 'hybrid', 40, 'hybrid_50_50', total_sold=7, last_payout_sold=6)
+    put_design(client, 'pending', 10, 'credits_100', total_sold=0, status='Pending')
+    yield client
+    app.dependency_overrides.clear()
+
+
+def dashboard(client):
+    return asyncio.run(sales_dashboard.get_dashboard(SELLER, client))
+
+
+def test_dashboard_is_one_read_once_built(dynamodb, monkeypatch):
+    first = dashboard(dynamodb)
+    assert [entry['id'] for entry in first['designs']] == ['hybrid', 'cash']
+    assert first['currentPeriod'] == {'revenue': 180.0, 'credits': 2, 'orders': 3, 'averageOrderValue': 80.0}
+    assert first['designs'][1]['lifetime_revenue'] == 400.0
+
+    calls = []
+    for operation in ('query', 'scan', 'batch_get_item'):
+        original = getattr(dynamodb, operation)
+        monkeypatch.setattr(dynamodb, operation, lambda original=original, **kw: calls.append(kw) or original(**kw))
+    assert dashboard(dynamodb) == first
+    assert calls == []
+
+
+def test_events_refresh_only_their_designs(dynamodb):
+    dashboard(dynamodb)
+
+    # Three more copies of cash sold: it overtakes hybrid
+    sold = put_design(dynamodb, 'cash', 100, 'cash_100', total_sold=8, last_payout_sold=3)
+    asyncio.run(sales_dashboard.record_sales([(sold, 3)], dynamodb))
+    # Approving the pending design adds it; rejecting hybrid removes it
+    put_design(dynamodb, 'pending', 10, 'credits_100')
+    asyncio.run(sales_dashboard.refresh_designs(SELLER, ['pending'], dynamodb))
+    put_design(dynamodb, 'hybrid', 40, 'hybrid_50_50', total_sold=7, last_payout_sold=6, status='Rejected')
+    asyncio.run(sales_dashboard.refresh_designs(SELLER, ['hybrid'], dynamodb))
+
+    current = dashboard(dynamodb)
+    assert [entry['id'] for entry in current['designs']] == ['cash', 'pending']
+    assert current['currentPeriod']['orders'] == 5
+    assert current == asyncio.run(sales_dashboard.build(SELLER, dynamodb))
+
+
+def test_sellers_are_refreshed_concurrently(monkeypatch):
+    events = []
+
+    async def refresh(email, design_ids, client=None):
+        events.append(('start', email))
+        await asyncio.sleep(0)
+        events.append(('end', email))
+        if email == 'broken@test.com':
+            raise RuntimeError('conflict')
+
+    monkeypatch.setattr(sales_dashboard, 'refresh_designs', refresh)
+    sold = [
+        ({'seller_email': {'S': email}, 'design_id': {'S': design_id}}, 1)
+        for email, design_id in [('broken@test.com', 'a'), (SELLER, 'b')]
+    ]
+    with pytest.raises(RuntimeError):
+        asyncio.run(sales_dashboard.record_sales(sold))
+    # Both refreshes start before either finishes, and one failing does not stop the other
+    assert [kind for kind, _ in events] == ['start', 'start', 'end', 'end']
+
+
+def test_dashboard_route_after_payout(dynamodb):
+    dashboard(dynamodb)
+    for design_id, price, method, sold in (('cash', 100, 'cash_100', 5), ('hybrid', 40, 'hybrid_50_50', 7)):
+        put_design(dynamodb, design_id, price, method, total_sold=sold, last_payout_sold=sold)
+    asyncio.run(sales_dashboard.rebuild(SELLER, dynamodb))
+
+    app.dependency_overrides[get_current_user] = lambda: {'email': SELLER}
+    body = TestClient(app).get('/sales/dashboard', params={'limit': 1}).json()
+    assert body['currentPeriod'] == {'revenue': 0, 'credits': 0, 'orders': 0, 'averageOrderValue': 0}
+    assert [design['id'] for design in body['topDesigns']] == ['hybrid']
+    assert body['pagination'] == {'total': 2, 'pages': 2, 'current': 1}
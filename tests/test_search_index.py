@@ -0,0 +1,142 @@
+import pytest
+import asyncio
+from fastapi.testclient import TestClient
+from app.main import app
+from app.routes import design as design_routes
+from app.services import async_dynamodb, design_cache, design_events, search_index
+from app.services.dynamodb import _get_dynamodb_client
+from app.services.search_index import SearchIndex
+from app.services.text_search import TextSearchService
+from app.utils import user as user_utils
+from tests.conftest import create_design_table, create_user_table, design_item
+
+DESIGN_TABLE = 'Design'
+USER_TABLE = 'User'
+
+
+def design(design_id, title, tags='', category='Floral', status='Verified'):
+    return design_item(
+        design_id,
+        title=title,
+        tags=tags,
+        category=category,
+        thumbnail_url=f'https://thumbs/{design_id}.png',
+        verification_status=status
+    )
+
+
+def test_ranking_prefixes_and_all_tokens():
+    index = SearchIndex()
+    index.add(design('rose', 'Red Rose Bouquet', 'flowers,red'))
+    index.add(design('roses', 'Roses', 'flowers'))
+    index.add(design('paisley', 'Blue Paisley', 'ethnic,red', category='Ethnic'))
+    index.add(design('stripes', 'Red stripes', 'lines', category='Geometric'))
+
+    # Whole-word hits outrank prefix hits, and a title hit outranks a tag-only hit
+    assert [hit for hit, _ in index.search('rose', 10)] == ['rose', 'roses']
+    assert [hit for hit, _ in index.search('red', 10)][-1] == 'paisley'
+    # Every token has to match, as a word or a word prefix
+    assert [hit for hit, _ in index.search('red flow', 10)] == ['rose']
+    assert index.search('red tulip', 10) == []
+    assert [hit for hit, _ in index.search('ETHN', 10)] == ['paisley']
+    assert len(index.search('red', 2)) == 2
+    assert index.search('  ,, ', 10) == []
+
+
+def test_add_replaces_and_remove_prunes_the_vocabulary():
+    index = SearchIndex()
+    index.add(design('d1', 'Lotus Pond'))
+    index.add(design('d1', 'Lily Pond'))
+    assert index.search('lotus', 10) == []
+    assert [hit for hit, _ in index.search('lily', 10)] == ['d1']
+
+    index.remove('d1')
+    assert len(index) == 0
+    assert index.vocabulary == []
+    assert index.total_length == 0
+
+
+class NoAISearch:
+    async def search_similar_designs(self, query, page=1, limit=20):
+        return {'results': []}
+
+
+@pytest.fixture(scope='function')
+def search_client(dynamodb_client, monkeypatch):
+    client = dynamodb_client
+    search_index.reset()
+    design_cache.design_cache.clear()
+    user_utils.username_cache.clear()
+    monkeypatch.setattr(design_routes, 'DESIGN_TABLE', DESIGN_TABLE)
+    monkeypatch.setattr(design_cache, 'DESIGN_TABLE', DESIGN_TABLE)
+    monkeypatch.setattr(search_index, 'DESIGN_TABLE', DESIGN_TABLE)
+    monkeypatch.setattr(user_utils, 'USER_TABLE', USER_TABLE)
+    create_design_table(client, DESIGN_TABLE)
+    create_user_table(client, USER_TABLE, users=[{'email': 'seller@test.com', 'username': 'seller'}])
+    client.put_item(TableName=DESIGN_TABLE, Item=design('d-rose', 'Red Rose Bouquet', 'flowers,red'))
+    client.put_item(TableName=DESIGN_TABLE, Item=design('d-tulip', 'Tulip Field', 'flowers'))
+    client.put_item(TableName=DESIGN_TABLE, Item=design('d-draft', 'Rose Sketch', status='Pending'))
+
+    app.dependency_overrides[_get_dynamodb_client] = lambda: client
+    app.dependency_overrides[TextSearchService] = NoAISearch
+    yield client
+    app.dependency_overrides.clear()
+    search_index.reset()
+    design_cache.design_cache.clear()
+
+
+def search(query, **params):
+    response = TestClient(app).get('/design/search', params={'query': query, **params})
+    assert response.status_code == 200, response.text
+    return response.json()['designs']
+
+
+def test_search_scans_once_and_follows_approvals(search_client, monkeypatch):
+    scans = []
+    parallel_scan = async_dynamodb.parallel_scan
+
+    async def counting_scan(table_name, **kwargs):
+        scans.append(table_name)
+        return await parallel_scan(table_name, **kwargs)
+
+    monkeypatch.setattr(async_dynamodb, 'parallel_scan', counting_scan)
+
+    results = search('flow')
+    assert {d['id'] for d in results} == {'d-rose', 'd-tulip'}
+    assert results[0]['seller_username'] == 'seller'
+    assert [d['id'] for d in search('rose')] == ['d-rose']
+    assert len(search('flowers', limit=1)) == 1
+    assert scans == [DESIGN_TABLE]
+
+    # Approving the draft and rejecting the tulip reach the index without another scan
+    search_client.update_item(
+        TableName=DESIGN_TABLE, Key={'design_id': {'S': 'd-draft'}},
+        UpdateExpression='SET verification_status = :s', ExpressionAttributeValues={':s': {'S': 'Verified'}}
+    )
+    search_client.update_item(
+        TableName=DESIGN_TABLE, Key={'design_id': {'S': 'd-tulip'}},
+        UpdateExpression='SET verification_status = :s', ExpressionAttributeValues={':s': {'S': 'Rejected'}}
+    )
+    asyncio.run(design_events.design_changed(['d-draft', 'd-tulip'], [], search_client))
+
+    assert {d['id'] for d in search('rose')} == {'d-rose', 'd-draft'}
+    assert [d['id'] for d in search('flowers')] == ['d-rose']
+    assert scans == [DESIGN_TABLE]
+
+
+def test_search_rejects_bad_limits(search_client):
+    response = TestClient(app).get('/design/search', params={'query': 'rose', 'limit': 0})
+    assert response.status_code == 400
+
+
+def test_stale_index_is_rebuilt_before_serving(search_client, monkeypatch):
+    assert [d['id'] for d in search('tulip')] == ['d-tulip']
+    # Another container approved a design; no event reached this one
+    search_client.update_item(
+        TableName=DESIGN_TABLE, Key={'design_id': {'S': 'd-draft'}},
+        UpdateExpression='SET verification_status = :s', ExpressionAttributeValues={':s': {'S': 'Verified'}}
+    )
+    assert search('sketch') == []
+
+    monkeypatch.setattr(search_index._index, 'built_at', search_index._index.built_at - search_index.REBUILD_SECONDS)
+    assert [d['id'] for d in search('sketch')] == ['d-draft']
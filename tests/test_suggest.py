@@ -0,0 +1,108 @@
+import pytest
+import asyncio
+from fastapi.testclient import TestClient
+from app.main import app
+from app.services import design_cache, design_events, search_index
+from app.services.dynamodb import _get_dynamodb_client
+from app.services.search_index import SearchIndex
+from tests.conftest import create_design_table, design_item
+
+DESIGN_TABLE = 'Design'
+
+
+def design(design_id, title, tags='', category='Floral', sold=0, status='Verified'):
+    return design_item(design_id, title=title, tags=tags, category=category, total_sold=sold, verification_status=status)
+
+
+def texts(suggestions):
+    return [suggestion['text'] for suggestion in suggestions]
+
+
+def test_completions_are_ranked_by_popularity():
+    index = SearchIndex()
+    index.load([
+        design('d1', 'Red Rose Bouquet', 'roses,red', sold=2),
+        design('d2', 'Rosewood Paisley', 'paisley', category='Ethnic', sold=10),
+        design('d3', 'Blue Stripes', 'lines', category='Geometric')
+    ])
+
+    assert texts(index.suggest('ros', 10)) == ['Rosewood Paisley', 'Red Rose Bouquet', 'roses']
+    # Any word of a phrase can start the completion, and input is normalized
+    assert texts(index.suggest('  BOUQ', 10)) == ['Red Rose Bouquet']
+    assert texts(index.suggest('red ro', 10)) == ['Red Rose Bouquet']
+    assert index.suggest('geo', 10) == [{'text': 'Geometric', 'type': 'category'}]
+    # Equal popularity: the shorter completion comes first
+    assert texts(index.suggest('r', 2)) == ['Rosewood Paisley', 'red']
+    assert index.suggest('zz', 10) == [] and index.suggest('', 10) == []
+
+    # Shared phrases add up, and go away with their last design
+    index.add(design('d4', 'Floral Lines', 'lines', sold=20))
+    assert index.suggest('lin', 10)[0] == {'text': 'lines', 'type': 'tags'}
+    index.remove('d3')
+    index.remove('d4')
+    assert index.suggest('lin', 10) == []
+    assert index.suggest('geo', 10) == []
+    assert all(phrase in index.suggestions.scores for _, phrase in index.suggestions.keys)
+
+
+@pytest.fixture(scope='function')
+def suggest_client(dynamodb_client, monkeypatch):
+    client = dynamodb_client
+    search_index.reset()
+    monkeypatch.setattr(search_index, 'DESIGN_TABLE', DESIGN_TABLE)
+    create_design_table(client, DESIGN_TABLE)
+    client.put_item(TableName=DESIGN_TABLE, Item=design('d1', 'Mandala Sunset', 'mandala', sold=3))
+    client.put_item(TableName=DESIGN_TABLE, Item=design('d2', 'Mango Leaves', 'tropical', sold=1))
+    client.put_item(TableName=DESIGN_TABLE, Item=design('d3', 'Marigold Border', 'festive', status='Pending'))
+
+    app.dependency_overrides[_get_dynamodb_client] = lambda: client
+    yield client
+    app.dependency_overrides.clear()
+    search_index.reset()
+    design_cache.design_cache.clear()
+
+
+def suggest(q, **params):
+    response = TestClient(app).get('/design/suggest', params={'q': q, **params})
+    assert response.status_code == 200, response.text
+    return texts(response.json()['suggestions'])
+
+
+def test_suggest_endpoint_follows_verification_changes(suggest_client):
+    assert suggest('ma') == ['mandala', 'Mandala Sunset', 'Mango Leaves']
+    assert suggest('ma', limit=1) == ['mandala']
+
+    suggest_client.update_item(
+        TableName=DESIGN_TABLE, Key={'design_id': {'S': 'd3'}},
+        UpdateExpression='SET verification_status = :s', ExpressionAttributeValues={':s': {'S': 'Verified'}}
+    )
+    suggest_client.update_item(
+        TableName=DESIGN_TABLE, Key={'design_id': {'S': 'd2'}},
+        UpdateExpression='SET verification_status = :s', ExpressionAttributeValues={':s': {'S': 'Rejected'}}
+    )
+    asyncio.run(design_events.design_changed(['d2', 'd3'], [], suggest_client))
+
+    assert suggest('ma') == ['mandala', 'Mandala Sunset', 'Marigold Border']
+    assert TestClient(app).get('/design/suggest', params={'q': 'ma', 'limit': 21}).status_code == 400
+
+
+def test_phrase_shared_by_fields_of_one_design(suggest_client):
+    suggest_client.put_item(TableName=DESIGN_TABLE, Item=design('d4', 'Paisley', 'paisley,mauve', category='paisley', status='Pending'))
+    assert suggest('pai') == []
+
+    suggest_client.update_item(
+        TableName=DESIGN_TABLE, Key={'design_id': {'S': 'd4'}},
+        UpdateExpression='SET verification_status = :s', ExpressionAttributeValues={':s': {'S': 'Verified'}}
+    )
+    asyncio.run(design_events.design_changed(['d4'], [], suggest_client))
+    assert suggest('pai') == ['Paisley']
+    assert search_index._index.search('mauve', 10)[0][0] == 'd4'
+
+    suggest_client.update_item(
+        TableName=DESIGN_TABLE, Key={'design_id': {'S': 'd4'}},
+        UpdateExpression='SET verification_status = :s', ExpressionAttributeValues={':s': {'S': 'Rejected'}}
+    )
+    asyncio.run(design_events.design_changed(['d4'], [], suggest_client))
+    assert suggest('pai') == [] and suggest('mau') == []
+    assert search_index._index.search('mauve', 10) == []
+    assert 'd4' not in search_index._index
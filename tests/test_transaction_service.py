@@ -0,0 +1,418 @@
+import pytest
+import asyncio
+from botocore.exceptions import ClientError
+from app.services import design_cache, entitlements, sales_dashboard, seller_stats
+from app.services import payment as payment_module
+from app.services import transaction as transaction_module
+from app.services.transaction import TransactionService
+from tests.conftest import (
+    create_aggregate_table,
+    create_design_table,
+    create_payment_history_table,
+    create_table,
+    create_user_table,
+    to_item
+)
+
+TRANSACTION_TABLE = 'Transaction'
+USER_TABLE = 'User'
+DESIGN_TABLE = 'Design'
+ENTITLEMENT_TABLE = 'Entitlement'
+AGGREGATE_TABLE = 'Aggregate'
+PAYMENT_HISTORY_TABLE = 'PaymentHistory'
+BUYER = 'buyer@test.com'
+
+
+@pytest.fixture(scope='function')
+def service(dynamodb_client, monkeypatch):
+    client = dynamodb_client
+    monkeypatch.setattr(transaction_module, 'TRANSACTION_TABLE', TRANSACTION_TABLE)
+    monkeypatch.setattr(transaction_module, 'USER_TABLE', USER_TABLE)
+    monkeypatch.setattr(transaction_module, 'DESIGN_TABLE', DESIGN_TABLE)
+    monkeypatch.setattr(entitlements, 'ENTITLEMENT_TABLE', ENTITLEMENT_TABLE)
+    monkeypatch.setattr(design_cache, 'DESIGN_TABLE', DESIGN_TABLE)
+    monkeypatch.setattr(payment_module, 'DESIGN_TABLE', DESIGN_TABLE)
+    monkeypatch.setattr(payment_module, 'AGGREGATE_TABLE', AGGREGATE_TABLE)
+    monkeypatch.setattr(payment_module, 'PAYMENT_HISTORY_TABLE', PAYMENT_HISTORY_TABLE)
+    monkeypatch.setattr(seller_stats, 'AGGREGATE_TABLE', AGGREGATE_TABLE)
+    monkeypatch.setattr(sales_dashboard, 'AGGREGATE_TABLE', AGGREGATE_TABLE)
+    monkeypatch.setattr(sales_dashboard, 'DESIGN_TABLE', DESIGN_TABLE)
+    design_cache.design_cache.clear()
+    create_aggregate_table(client, AGGREGATE_TABLE, indexes={payment_module.PAYOUT_INDEX: ('payout_due', 'unpaid_since')})
+    create_table(client, TRANSACTION_TABLE, 'transaction_id', indexes={
+        'buyer_email-created_at-index': ('buyer_email', 'created_at')
+    })
+    create_table(client, ENTITLEMENT_TABLE, 'buyer_email', 'design_id', local_indexes={
+        entitlements.PURCHASED_AT_INDEX: ('buyer_email', 'purchased_at')
+    })
+    create_payment_history_table(client, PAYMENT_HISTORY_TABLE)
+    create_user_table(client, USER_TABLE, users=[{'email': BUYER}, {'email': 'idle@test.com'}])
+    create_design_table(client, DESIGN_TABLE, indexes={'DesignSellerGSI': ('seller_email',)})
+    for i in range(12):
+        client.put_item(TableName=DESIGN_TABLE, Item=to_item({'design_id': f'design-{i}', 'total_sold': 0}))
+    yield TransactionService()
+    design_cache.design_cache.clear()
+
+
+def buy(service, n):
+    for i in range(n):
+        asyncio.run(service.create_transaction(
+            [{'id': f'design-{i}', 'price': 10}],
+            BUYER,
+            f'pay_{i}'
+        ))
+
+
+def total_sold(service, design_id):
+    item = service.dynamodb.get_item(TableName=DESIGN_TABLE, Key={'design_id': {'S': design_id}})['Item']
+    return int(item['total_sold']['N'])
+
+
+def stored_count(service, email):
+    item = service.dynamodb.get_item(TableName=USER_TABLE, Key={'email': {'S': email}})['Item']
+    return item.get('transaction_count', {}).get('N')
+
+
+def test_history_total_comes_from_counter(service, monkeypatch):
+    buy(service, 3)
+    assert stored_count(service, BUYER) == '3'
+
+    calls = []
+    query = service.dynamodb.query
+    monkeypatch.setattr(service.dynamodb, 'query', lambda **kw: calls.append(kw) or query(**kw))
+    page = asyncio.run(service.get_user_transactions(BUYER, limit=2))
+    assert page['total'] == 3
+    assert len(page['transactions']) == 2
+    # Only the page itself is queried, never a Select=COUNT over the whole partition
+    assert len(calls) == 1 and 'Select' not in calls[0]
+
+
+def test_reconcile_fixes_drift(service):
+    buy(service, 2)
+    service.dynamodb.update_item(
+        TableName=USER_TABLE,
+        Key={'email': {'S': BUYER}},
+        UpdateExpression='SET transaction_count = :n',
+        ExpressionAttributeValues={':n': {'N': '7'}}
+    )
+
+    result = service.reconcile_transaction_counts()
+    assert result == {'users': 2, 'corrected': 2, 'skipped': 0}
+    assert stored_count(service, BUYER) == '2'
+    assert stored_count(service, 'idle@test.com') == '0'
+    assert service.reconcile_transaction_counts()['corrected'] == 0
+
+
+def test_checkout_is_idempotent_per_payment(service):
+    cart = [{'id': 'design-0', 'price': 10}, {'id': 'design-1', 'price': 5}, {'id': 'design-0', 'price': 10}]
+    first = asyncio.run(service.create_transaction(cart, BUYER, 'pay_once'))
+    retry = asyncio.run(service.create_transaction(cart, BUYER, 'pay_once'))
+
+    assert retry == first
+    assert first['amount'] == 25
+    assert total_sold(service, 'design-0') == 2
+    assert total_sold(service, 'design-1') == 1
+    assert stored_count(service, BUYER) == '1'
+
+
+async def inline(func, *args, **kwargs):
+    return func(*args, **kwargs)
+
+
+def test_large_cart_is_chunked_and_resumable(service, monkeypatch):
+    monkeypatch.setattr(transaction_module, 'TRANSACT_WRITE_MAX_ITEMS', 4)
+    # moto is not thread-safe, so the concurrent chunks run inline here
+    monkeypatch.setattr(transaction_module, 'run_blocking', inline)
+    calls = []
+    transact = service.dynamodb.transact_write_items
+
+    def flaky(**kwargs):
+        calls.append(len(kwargs['TransactItems']))
+        # The third call fails once, as a throttled chunk would
+        if len(calls) == 3:
+            raise ClientError({'Error': {'Code': 'ThrottlingException', 'Message': 'slow down'}}, 'TransactWriteItems')
+        return transact(**kwargs)
+
+    monkeypatch.setattr(service.dynamodb, 'transact_write_items', flaky)
+    cart = [{'id': f'design-{i}', 'price': 1} for i in range(10)]
+    with pytest.raises(ClientError):
+        asyncio.run(service.create_transaction(cart, BUYER, 'pay_big'))
+    asyncio.run(service.create_transaction(cart, BUYER, 'pay_big'))
+
+    assert all(size <= 4 for size in calls)
+    # Every design counted exactly once despite the failed chunk and the retry
+    assert [total_sold(service, f'design-{i}') for i in range(10)] == [1] * 10
+    assert all(asyncio.run(entitlements.has_entitlement(BUYER, f'design-{i}')) for i in range(10))
+    assert 'count' in transaction_module.checkout_stats()['6-20']
+
+
+def fail_chunk_of(service, monkeypatch, design_id):
+    """Throttle the first write that touches `design_id`; returns the real transact_write_items"""
+    transact = service.dynamodb.transact_write_items
+    failed = []
+
+    def flaky(**kwargs):
+        touched = {action.get('Update', {}).get('Key', {}).get('design_id', {}).get('S') for action in kwargs['TransactItems']}
+        if design_id in touched and not failed:
+            failed.append(design_id)
+            raise ClientError({'Error': {'Code': 'ThrottlingException', 'Message': 'slow down'}}, 'TransactWriteItems')
+        return transact(**kwargs)
+
+    monkeypatch.setattr(service.dynamodb, 'transact_write_items', flaky)
+    return transact
+
+
+def test_retry_replays_the_stored_chunks(service, monkeypatch):
+    monkeypatch.setattr(transaction_module, 'TRANSACT_WRITE_MAX_ITEMS', 4)
+    monkeypatch.setattr(transaction_module, 'run_blocking', inline)
+    fail_chunk_of(service, monkeypatch, 'design-2')
+    cart = [{'id': f'design-{i}', 'price': 1} for i in range(10)]
+    with pytest.raises(ClientError):
+        asyncio.run(service.create_transaction(cart, BUYER, 'pay_shift'))
+
+    # An already counted design disappears before the retry: the remaining chunks must not shift
+    service.dynamodb.delete_item(TableName=DESIGN_TABLE, Key={'design_id': {'S': 'design-1'}})
+    asyncio.run(service.create_transaction(cart, BUYER, 'pay_shift'))
+    assert [total_sold(service, f'design-{i}') for i in range(10) if i != 1] == [1] * 9
+
+
+def test_concurrent_retry_of_a_chunk_counts_it_once(service, monkeypatch):
+    monkeypatch.setattr(transaction_module, 'TRANSACT_WRITE_MAX_ITEMS', 4)
+    monkeypatch.setattr(transaction_module, 'run_blocking', inline)
+    transact = fail_chunk_of(service, monkeypatch, 'design-2')
+    cart = [{'id': f'design-{i}', 'price': 1} for i in range(4)]
+    with pytest.raises(ClientError):
+        asyncio.run(service.create_transaction(cart, BUYER, 'pay_race'))
+
+    def raced(**kwargs):
+        if 'Update' in kwargs['TransactItems'][0]:
+            # Another retry of the same payment commits the chunk first
+            monkeypatch.setattr(service.dynamodb, 'transact_write_items', transact)
+            transact(**kwargs)
+        return transact(**kwargs)
+
+    monkeypatch.setattr(service.dynamodb, 'transact_write_items', raced)
+    assert asyncio.run(service.create_transaction(cart, BUYER, 'pay_race'))['status'] == 'COMPLETED'
+    assert [total_sold(service, f'design-{i}') for i in range(4)] == [1] * 4
+
+
+def test_checkout_with_unknown_design_is_recorded_for_review(service):
+    result = asyncio.run(service.create_transaction([{'id': 'design-0', 'price': 1}, {'id': 'missing', 'price': 1}], BUYER, 'pay_bad'))
+    assert result['status'] == 'NEEDS_REVIEW'
+    # The payment was captured: the record and the existing design's sale are kept
+    record = service.dynamodb.get_item(TableName=TRANSACTION_TABLE, Key={'transaction_id': {'S': result['transaction_id']}})['Item']
+    assert record['status']['S'] == 'NEEDS_REVIEW'
+    assert record['missing_designs']['SS'] == ['missing']
+    assert total_sold(service, 'design-0') == 1
+    assert asyncio.run(entitlements.has_entitlement(BUYER, 'design-0'))
+    assert not asyncio.run(entitlements.has_entitlement(BUYER, 'missing'))
+    assert service.dynamodb.scan(TableName=DESIGN_TABLE, FilterExpression='design_id = :id',
+                                 ExpressionAttributeValues={':id': {'S': 'missing'}})['Count'] == 0
+
+    # A retry resumes from the record and changes nothing
+    assert asyncio.run(service.create_transaction([{'id': 'design-0', 'price': 1}, {'id': 'missing', 'price': 1}], BUYER, 'pay_bad'))['status'] == 'NEEDS_REVIEW'
+    assert total_sold(service, 'design-0') == 1
+
+
+def test_design_deleted_mid_checkout_is_flagged(service, monkeypatch):
+    # The read still sees the design; it is gone by the time the chunk is written
+    load = service._sold_counts
+
+    async def stale_counts(designs):
+        sold = await load(designs)
+        service.dynamodb.delete_item(TableName=DESIGN_TABLE, Key={'design_id': {'S': 'design-1'}})
+        return sold
+
+    monkeypatch.setattr(service, '_sold_counts', stale_counts)
+    result = asyncio.run(service.create_transaction([{'id': 'design-0', 'price': 1}, {'id': 'design-1', 'price': 1}], BUYER, 'pay_gone'))
+    assert result['status'] == 'NEEDS_REVIEW'
+    assert total_sold(service, 'design-0') == 1
+    record = service.dynamodb.get_item(TableName=TRANSACTION_TABLE, Key={'transaction_id': {'S': result['transaction_id']}})['Item']
+    assert record['missing_designs']['SS'] == ['design-1']
+
+
+def test_checkout_for_unknown_buyer_does_not_create_a_user(service):
+    asyncio.run(service.create_transaction([{'id': 'design-0', 'price': 1}], 'ghost@test.com', 'pay_ghost'))
+    assert total_sold(service, 'design-0') == 1
+    assert 'Item' not in service.dynamodb.get_item(TableName=USER_TABLE, Key={'email': {'S': 'ghost@test.com'}})
+
+
+def test_checkout_grants_entitlements(service):
+    asyncio.run(service.create_transaction([{'id': 'design-0', 'price': 10, 'title': 'First'}], BUYER, 'pay_a'))
+    asyncio.run(service.create_transaction(
+        [{'id': 'design-1', 'price': 5, 'is_color_matching': True, 'color_matching_design_id': 'design-0'},
+         {'id': 'design-0', 'price': 10, 'title': 'First'}],
+        BUYER, 'pay_b'
+    ))
+    asyncio.run(service.create_transaction([{'id': 'design-2', 'price': 1}], BUYER, 'pay_c', status='PENDING'))
+
+    assert asyncio.run(entitlements.has_entitlement(BUYER, 'design-0'))
+    assert not asyncio.run(entitlements.has_entitlement(BUYER, 'design-2'))
+    assert not asyncio.run(entitlements.has_entitlement('idle@test.com', 'design-0'))
+
+    first, last_key = asyncio.run(entitlements.purchased_page(BUYER, limit=1))
+    assert [d['id'] for d in first] == ['design-1']
+    assert first[0]['is_color_matching'] and first[0]['color_matching_design_id'] == 'design-0'
+    rest, last_key = asyncio.run(entitlements.purchased_page(BUYER, limit=5, exclusive_start_key=last_key))
+    # Buying design-0 again keeps a single entitlement from the first purchase
+    assert [d['id'] for d in rest] == ['design-0']
+    assert last_key is None
+
+
+def put_seller_design(service, design_id, seller, price, payment_method, total_sold=0):
+    service.dynamodb.put_item(TableName=DESIGN_TABLE, Item={
+        'design_id': {'S': design_id},
+        'seller_email': {'S': seller},
+        'verification_status': {'S': 'Verified'},
+        'price': {'N': str(price)},
+        'payment_method': {'S': payment_method},
+        'total_sold': {'N': str(total_sold)}
+    })
+
+
+def test_checkout_credits_payout_ledger(service):
+    put_seller_design(service, 'cash', 'alice@test.com', 100, 'cash_100')
+    put_seller_design(service, 'hybrid', 'alice@test.com', 30, 'hybrid_50_50')
+    put_seller_design(service, 'credits', 'bob@test.com', 25, 'credits_100')
+    cart = [{'id': 'cash', 'price': 100}, {'id': 'hybrid', 'price': 30}, {'id': 'hybrid', 'price': 30}]
+    asyncio.run(service.create_transaction(cart, BUYER, 'pay_1'))
+    asyncio.run(service.create_transaction(cart, BUYER, 'pay_1'))
+    asyncio.run(service.create_transaction([{'id': 'credits', 'price': 25}], BUYER, 'pay_2'))
+    asyncio.run(service.create_transaction([{'id': 'credits', 'price': 25}], BUYER, 'pay_3'))
+
+    due, last_key = asyncio.run(service.payments.payouts_due(limit=10))
+    assert last_key is None
+    by_email = {payout['email']: payout for payout in due}
+    # The retried payment is credited once; credits are whole credits of the combined value
+    assert by_email['alice@test.com']['payment_due'] == 110
+    assert by_email['alice@test.com']['credits_due'] == 3
+    assert by_email['alice@test.com']['designs_sold'] == 2
+    assert by_email['bob@test.com']['payment_due'] == 0
+    assert by_email['bob@test.com']['credits_due'] == 5
+    assert by_email['bob@test.com']['unpaid_sales'] == 2
+
+
+def test_paying_a_seller_clears_their_ledger(service):
+    put_seller_design(service, 'cash', 'alice@test.com', 100, 'cash_100')
+    put_seller_design(service, 'credits', 'bob@test.com', 20, 'credits_100', total_sold=4)
+    asyncio.run(service.create_transaction([{'id': 'cash', 'price': 100}], BUYER, 'pay_1'))
+
+    assert asyncio.run(service.payments.mark_designs_as_paid('alice@test.com'))
+    assert [payout['email'] for payout in asyncio.run(service.payments.payouts_due(limit=10))[0]] == []
+    asyncio.run(service.create_transaction([{'id': 'cash', 'price': 100}], BUYER, 'pay_2'))
+    assert asyncio.run(service.payments.payouts_due(limit=10))[0][0]['payment_due'] == 80
+
+    # A rebuild picks up sales made before the ledger existed
+    assert asyncio.run(service.payments.rebuild_payout_ledger()) == 2
+    due = {payout['email']: payout for payout in asyncio.run(service.payments.payouts_due(limit=10))[0]}
+    assert due['alice@test.com']['payment_due'] == 80
+    assert due['bob@test.com']['credits_due'] == 8
+
+
+def unpaid(service, design_id):
+    item = service.dynamodb.get_item(TableName=DESIGN_TABLE, Key={'design_id': {'S': design_id}})['Item']
+    return int(item['total_sold']['N']) - int(item.get('last_payout_sold', {}).get('N', '0'))
+
+
+def test_large_payout_is_chunked_with_history(service, monkeypatch):
+    monkeypatch.setattr(payment_module, 'TRANSACT_WRITE_MAX_ITEMS', 5)
+    # moto is not thread-safe, so the concurrent chunks run inline here
+    monkeypatch.setattr(payment_module, 'run_blocking', inline)
+    calls = []
+    transact = service.dynamodb.transact_write_items
+    monkeypatch.setattr(
+        service.dynamodb, 'transact_write_items',
+        lambda **kwargs: calls.append(len(kwargs['TransactItems'])) or transact(**kwargs)
+    )
+    for i in range(9):
+        put_seller_design(service, f'big-{i}', 'alice@test.com', 100, 'cash_100', total_sold=i % 3)
+    put_seller_design(service, 'sold-now', 'alice@test.com', 100, 'cash_100')
+    asyncio.run(service.create_transaction([{'id': 'sold-now', 'price': 100}], BUYER, 'pay_1'))
+    calls.clear()
+
+    assert asyncio.run(service.payments.mark_designs_as_paid('alice@test.com', {'admin_email': 'admin@test.com'}))
+    # History, rollup, years and ledger reset leave room for one of the 7 unpaid designs in the first call
+    assert calls == [5, 5, 1]
+    assert all(unpaid(service, f'big-{i}') == 0 for i in range(9)) and unpaid(service, 'sold-now') == 0
+    history = service.dynamodb.scan(TableName=PAYMENT_HISTORY_TABLE)['Items']
+    assert history[0]['total_amount']['N'] == '80.0'
+    assert len(history[0]['paid_designs']['L']) == 7
+    assert asyncio.run(service.payments.payouts_due(limit=10))[0] == []
+
+
+def test_interrupted_payout_is_finished_without_a_second_history(service, monkeypatch):
+    monkeypatch.setattr(payment_module, 'TRANSACT_WRITE_MAX_ITEMS', 5)
+    monkeypatch.setattr(payment_module, 'run_blocking', inline)
+    for i in range(7):
+        put_seller_design(service, f'big-{i}', 'alice@test.com', 100, 'cash_100', total_sold=1)
+    transact = service.dynamodb.transact_write_items
+    calls = []
+
+    def throttled_after_first(**kwargs):
+        calls.append(kwargs)
+        if len(calls) > 1:
+            raise ClientError({'Error': {'Code': 'ThrottlingException', 'Message': 'slow down'}}, 'TransactWriteItems')
+        return transact(**kwargs)
+
+    monkeypatch.setattr(service.dynamodb, 'transact_write_items', throttled_after_first)
+    assert not asyncio.run(service.payments.mark_designs_as_paid('alice@test.com', {'admin_email': 'admin@test.com'}))
+    assert sum(unpaid(service, f'big-{i}') for i in range(7)) == 6
+
+    # The retry writes the remaining designs only
+    monkeypatch.setattr(service.dynamodb, 'transact_write_items', transact)
+    assert asyncio.run(service.payments.mark_designs_as_paid('alice@test.com', {'admin_email': 'admin@test.com'}))
+    assert all(unpaid(service, f'big-{i}') == 0 for i in range(7))
+    assert len(service.dynamodb.scan(TableName=PAYMENT_HISTORY_TABLE)['Items']) == 1
+    rollups = [
+        item for item in service.dynamodb.scan(TableName=AGGREGATE_TABLE)['Items']
+        if item['sk']['S'].startswith('ANALYTICS#')
+    ]
+    assert [item['version']['N'] for item in rollups] == ['1']
+    ledger = service.dynamodb.get_item(TableName=AGGREGATE_TABLE, Key={'pk': {'S': 'SELLER#alice@test.com'}, 'sk': {'S': 'PAYOUT'}})['Item']
+    assert 'pending_payout_id' not in ledger and 'pending_payout_designs' not in ledger
+
+
+def test_sale_during_payout_restarts_it(service, monkeypatch):
+    put_seller_design(service, 'cash', 'alice@test.com', 100, 'cash_100')
+    asyncio.run(service.create_transaction([{'id': 'cash', 'price': 100}], BUYER, 'pay_1'))
+    transact = service.dynamodb.transact_write_items
+
+    def sale_first(**kwargs):
+        # Another checkout commits between the payout's reads and its write, once
+        monkeypatch.setattr(service.dynamodb, 'transact_write_items', transact)
+        asyncio.run(service.create_transaction([{'id': 'cash', 'price': 100}], BUYER, 'pay_2'))
+        return transact(**kwargs)
+
+    monkeypatch.setattr(service.dynamodb, 'transact_write_items', sale_first)
+    assert asyncio.run(service.payments.mark_designs_as_paid('alice@test.com', {}))
+    # The retry saw both sales, so ledger and designs agree
+    assert unpaid(service, 'cash') == 0
+    assert asyncio.run(service.payments.payouts_due(limit=10))[0] == []
+    history = service.dynamodb.scan(TableName=PAYMENT_HISTORY_TABLE)['Items']
+    assert [item['total_amount']['N'] for item in history] == ['160.0']
+
+
+def test_ledger_credit_ignores_stale_cached_designs(service):
+    put_seller_design(service, 'fresh', 'alice@test.com', 100, 'cash_100')
+    # Another container cached the design while it was still pending
+    design_cache.design_cache.set('fresh', {**design_cache.get_design('fresh', service.dynamodb),
+                                           'verification_status': {'S': 'Pending'}})
+    asyncio.run(service.create_transaction([{'id': 'fresh', 'price': 100}], BUYER, 'pay_fresh'))
+
+    due, _ = asyncio.run(service.payments.payouts_due(limit=10))
+    assert [(payout['email'], payout['payment_due']) for payout in due] == [('alice@test.com', 80)]
+
+
+def test_settle_all_due(service, monkeypatch):
+    # moto is not thread-safe, so the concurrent settlements run inline here
+    monkeypatch.setattr(payment_module, 'run_blocking', inline)
+    put_seller_design(service, 'a', 'alice@test.com', 100, 'cash_100')
+    put_seller_design(service, 'b', 'bob@test.com', 50, 'credits_100')
+    asyncio.run(service.create_transaction([{'id': 'a', 'price': 100}, {'id': 'b', 'price': 50}], BUYER, 'pay_1'))
+
+    settled = asyncio.run(service.payments.settle_all_due('admin@test.com'))
+    assert sorted(settled) == ['alice@test.com', 'bob@test.com']
+    assert unpaid(service, 'a') == 0 and unpaid(service, 'b') == 0
+    assert asyncio.run(service.payments.payouts_due(limit=10))[0] == []
+    history = {item['seller_email']['S']: item for item in service.dynamodb.scan(TableName=PAYMENT_HISTORY_TABLE)['Items']}
+    assert history['bob@test.com']['total_credits']['N'] == '5'
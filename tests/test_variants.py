@@ -0,0 +1,75 @@
+import pytest
+from fastapi.testclient import TestClient
+from app.main import app
+from app.routes import design as design_routes
+from app.services import design_cache, variants
+from app.services.auth import get_current_user
+from app.services.dynamodb import _get_dynamodb_client
+from tests.conftest import create_design_table, design_item
+
+DESIGN_TABLE = 'Design'
+SELLER = 'seller@test.com'
+
+
+def put_design(client, design_id, original_id='', status='Verified'):
+    item = design_item(
+        design_id,
+        seller_email=SELLER,
+        thumbnail_url=f'https://thumbs/{design_id}.png',
+        verification_status=status,
+        is_color_matching=bool(original_id),
+        color_matching_design_id=original_id,
+        bundle_discount=0
+    )
+    item['variant_family_id'] = {'S': variants.family_id(item)}
+    client.put_item(TableName=DESIGN_TABLE, Item=item)
+
+
+@pytest.fixture(scope='function')
+def dynamodb(dynamodb_client, monkeypatch):
+    client = dynamodb_client
+    monkeypatch.setattr(variants, 'DESIGN_TABLE', DESIGN_TABLE)
+    monkeypatch.setattr(variants, 'TRANSACT_WRITE_MAX_ITEMS', 2)
+    monkeypatch.setattr(design_routes, 'DESIGN_TABLE', DESIGN_TABLE)
+    create_design_table(client, DESIGN_TABLE, indexes={variants.VARIANT_FAMILY_INDEX: ('variant_family_id',)})
+    put_design(client, 'original')
+    put_design(client, 'red', 'original')
+    put_design(client, 'blue', 'original')
+    put_design(client, 'green', 'original', status='Pending')
+    put_design(client, 'unrelated')
+
+    app.dependency_overrides[_get_dynamodb_client] = lambda: client
+    app.dependency_overrides[get_current_user] = lambda: {'email': SELLER}
+    yield client
+    app.dependency_overrides.clear()
+    design_cache.design_cache.clear()
+
+
+def discount(client, design_id):
+    item = client.get_item(TableName=DESIGN_TABLE, Key={'design_id': {'S': design_id}})['Item']
+    return float(item['bundle_discount']['N'])
+
+
+def test_discount_applies_to_whole_family(dynamodb, monkeypatch):
+    calls = []
+    transact = dynamodb.transact_write_items
+    monkeypatch.setattr(dynamodb, 'transact_write_items', lambda **kw: calls.append(len(kw['TransactItems'])) or transact(**kw))
+    monkeypatch.setattr(dynamodb, 'scan', lambda **kw: pytest.fail('family lookup must not scan'))
+
+    response = TestClient(app).put('/design/red/bundle-discount', json={'bundle_discount': 15})
+    assert response.status_code == 200
+    assert [discount(dynamodb, d) for d in ('original', 'red', 'blue', 'green')] == [15, 15, 15, 15]
+    assert discount(dynamodb, 'unrelated') == 0
+    # Four family members in chunks of two
+    assert calls == [2, 2]
+
+
+def test_variants_of_a_design(dynamodb, monkeypatch):
+    monkeypatch.setattr(dynamodb, 'scan', lambda **kw: pytest.fail('family lookup must not scan'))
+    body = TestClient(app).get('/design/original/variants').json()
+    # Verified variants first, then the original
+    assert sorted(v['id'] for v in body['variants'][:-1]) == ['blue', 'red']
+    assert body['variants'][-1]['id'] == 'original'
+
+    # A variant has no variants of its own; only itself is returned
+    assert [v['id'] for v in TestClient(app).get('/design/red/variants').json()['variants']] == ['red']